@@ -0,0 +1,60 @@
+"""Helper functions that are shared by the benchmark scripts."""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+from typing import Callable, List, Sequence
+
+
+def new_parser(description: str) -> argparse.ArgumentParser:
+    """Returns a parser with the options that all benchmarks support."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "-n",
+        "--number",
+        type=int,
+        default=0,
+        help=(
+            "How many times should each statement be run per repeat? Defaults"
+            " to a value chosen by timeit.Timer.autorange()."
+        ),
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=5,
+        help="How many times should each measurement be repeated?",
+    )
+    return parser
+
+
+def measure(
+    func: Callable[[], object], *, number: int = 0, repeat: int = 5
+) -> float:
+    """Returns the best time (in seconds) that a single call to func took."""
+    timer = timeit.Timer(func)
+    if number <= 0:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def format_table(header: Sequence[str], rows: Sequence[Sequence[str]]) -> str:
+    """Formats a plain-text table."""
+    widths = [len(col) for col in header]
+    for row in rows:
+        for idx, col in enumerate(row):
+            widths[idx] = max(widths[idx], len(col))
+
+    lines: List[str] = []
+    for row in [header, ["-" * w for w in widths], *rows]:
+        lines.append(
+            "  ".join(col.rjust(width) for col, width in zip(row, widths))
+        )
+    return "\n".join(lines)
+
+
+def format_usec(seconds: float) -> str:
+    """Formats a duration (given in seconds) as microseconds."""
+    return f"{seconds * 1e6:,.1f}us"
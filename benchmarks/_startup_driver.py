@@ -0,0 +1,130 @@
+"""Runs a single clack application and reports how long each phase took.
+
+This script is run in a fresh python process by bench_startup.py:
+
+    python _startup_driver.py APP_FILE [ARG ...]
+
+...where APP_FILE is a python file that defines a clack `main()` function.
+The phase timings (in seconds) are printed to stdout as JSON on the last line
+of output.
+"""
+
+from __future__ import annotations
+
+import time
+
+
+_DRIVER_START = time.perf_counter()
+
+# pylint: disable=wrong-import-position
+from contextlib import contextmanager  # noqa: E402
+import functools  # noqa: E402
+import importlib.util  # noqa: E402
+import json  # noqa: E402
+import sys  # noqa: E402
+from typing import Any, Callable, Dict, Iterator, List, Tuple  # noqa: E402
+
+
+class PhaseTimer:
+    """Records the (exclusive) time spent in each phase.
+
+    Phases can be nested. The time spent in a nested phase is NOT counted
+    towards the time spent in its parent phase.
+    """
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, float] = {}
+        # Stack of [phase name, start time, time spent in child phases].
+        self._stack: List[Tuple[str, float, List[float]]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Context manager that times a single phase."""
+        child_time = [0.0]
+        start = time.perf_counter()
+        self._stack.append((name, start, child_time))
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - start
+            self.totals[name] = (
+                self.totals.get(name, 0.0) + elapsed - child_time[0]
+            )
+            if self._stack:
+                self._stack[-1][2][0] += elapsed
+
+    def wrap(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Returns a version of `func` whose calls are timed as `name`."""
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with self.phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+def main() -> int:
+    """Runs the clack app specified on the command-line."""
+    app_file, *app_args = sys.argv[1:]
+    timer = PhaseTimer()
+
+    with timer.phase("import clack"):
+        import clack
+
+    with timer.phase("import clack deps"):
+        import argparse
+
+        from clack import _config, _main, _parser
+        from clack._pydantic import PYDANTIC_V2, BaseSettings
+
+    # Instrument the functions / methods that make up each phase...
+    _parser.Parser = timer.wrap("Parser()", _parser.Parser)
+    clack.Parser = _parser.Parser  # type: ignore[misc]
+    for name in [
+        "config_settings_from_app_name",
+        "config_settings_from_config_file",
+    ]:
+        setattr(
+            _config,
+            name,
+            timer.wrap("config discovery", getattr(_config, name)),
+        )
+    _main.init_logging = timer.wrap(  # type: ignore[assignment]
+        "init_logging()", _main.init_logging
+    )
+    if PYDANTIC_V2:
+        # NOTE: pydantic-settings renamed this method (and made it a
+        # classmethod).
+        BaseSettings._settings_build_values = classmethod(
+            timer.wrap(
+                "config validation",
+                BaseSettings._settings_build_values.__func__,
+            )
+        )
+    else:
+        BaseSettings._build_values = timer.wrap(  # type: ignore[assignment]
+            "config validation", BaseSettings._build_values
+        )
+    argparse.ArgumentParser.parse_known_args = (  # type: ignore[assignment]
+        timer.wrap("parse_args()", argparse.ArgumentParser.parse_known_args)
+    )
+
+    with timer.phase("import app"):
+        spec = importlib.util.spec_from_file_location("app", app_file)
+        assert spec is not None and spec.loader is not None
+        app = importlib.util.module_from_spec(spec)
+        sys.modules["app"] = app
+        spec.loader.exec_module(app)
+
+    with timer.phase("main() other"):
+        status = app.main([app_file, *app_args])
+
+    timer.totals["driver total"] = time.perf_counter() - _DRIVER_START
+    print(json.dumps(timer.totals))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
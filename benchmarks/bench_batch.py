@@ -0,0 +1,115 @@
+"""Benchmarks running a clack application with many argv sets.
+
+Compares starting a fresh python process per argv set against running all of
+the argv sets with ClackApp.batch() (using a varying number of workers).
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Sequence
+
+from _bench import format_table, new_parser
+
+import clack
+
+
+DEFAULT_JOBS = [1, 2, 4]
+
+
+class Config(clack.Config):
+    """Application Config."""
+
+    value: int = 0
+
+    @classmethod
+    def from_cli_args(cls, argv: Sequence[str]) -> Config:
+        """Parse CLI arguments."""
+        parser = clack.Parser(module=__name__, executable=__file__)
+        parser.add_argument("--value", type=int)
+        args = parser.parse_args(argv[1:])
+        kwargs = clack.filter_cli_args(args)
+        return Config(**kwargs)
+
+
+def run(cfg: Config) -> int:
+    """Runner function."""
+    return 0 if cfg.value >= 0 else 1
+
+
+app = clack.main_factory("bench_batch", run)
+
+
+def run_subprocesses(argvs: Sequence[Sequence[str]]) -> None:
+    """Runs this script's app once per argv set (one process per argv set)."""
+    for argv in argvs:
+        subprocess.run(
+            [sys.executable, __file__, "--single", *argv[1:]], check=True
+        )
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs this benchmark."""
+    parser = new_parser(__doc__)
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=200,
+        help="How many argv sets should we run?",
+    )
+    parser.add_argument(
+        "--jobs",
+        nargs="*",
+        type=int,
+        default=DEFAULT_JOBS,
+        help="The number of workers used by each ClackApp.batch() run.",
+    )
+    parser.add_argument(
+        "--subprocess-items",
+        type=int,
+        default=20,
+        help=(
+            "How many argv sets should we run using one process per argv set"
+            " (the time per item is extrapolated)?"
+        ),
+    )
+    args = parser.parse_args(argv)
+
+    argvs = [["bench_batch", "--value", str(n)] for n in range(args.items)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Run from an empty CWD / XDG config dir so config discovery does not
+        # find any stray config files.
+        os.chdir(tmp_dir)
+        os.environ["XDG_CONFIG_HOME"] = str(Path(tmp_dir) / "config")
+        os.environ["PYTHONPATH"] = os.pathsep.join(
+            [str(Path(__file__).resolve().parent), *sys.path]
+        )
+
+        rows = []
+        start = time.perf_counter()
+        run_subprocesses(argvs[: args.subprocess_items])
+        per_item = (time.perf_counter() - start) / args.subprocess_items
+        rows.append(["one process per argv", f"{per_item * 1e3:,.2f}ms"])
+
+        for jobs in args.jobs:
+            start = time.perf_counter()
+            results = list(app.batch(argvs, jobs=jobs))
+            per_item = (time.perf_counter() - start) / len(results)
+            assert all(result.status == 0 for result in results)
+            rows.append([f"batch (jobs={jobs})", f"{per_item * 1e3:,.2f}ms"])
+
+    print(format_table(["method", "time per argv set"], rows))
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--single"]:
+        sys.exit(app(["bench_batch", *sys.argv[2:]]))
+    else:
+        sys.exit(main())
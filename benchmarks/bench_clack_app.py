@@ -0,0 +1,111 @@
+"""Benchmarks repeated in-process invocations of a clack application.
+
+Compares calling the main() function returned by clack.main_factory() (which
+initializes logging twice per call) against the run() and parse() methods of
+a single, reused clack.ClackApp object.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sys
+import tempfile
+from typing import Any, Dict, List, Literal, Sequence
+
+from _bench import format_table, format_usec, measure, new_parser
+
+import clack
+from clack.types import ClackRunner
+
+
+ALL_RUNNERS: List[ClackRunner] = []
+register_runner = clack.register_runner_factory(ALL_RUNNERS)
+
+
+class Config(clack.Config):
+    """Shared Configuration."""
+
+    command: Literal["bar", "foo"]
+
+
+class BarConfig(Config):
+    """The 'bar' subcommand's configuration."""
+
+    command: Literal["bar"]
+    bar: int = 0
+
+
+class FooConfig(Config):
+    """The 'foo' subcommand's configuration."""
+
+    command: Literal["foo"]
+    foo: str = "FOO"
+
+
+def clack_parser(argv: Sequence[str]) -> Dict[str, Any]:
+    """Parse CLI arguments."""
+    parser = clack.Parser(module=__name__, executable=__file__)
+    new_command = clack.new_command_factory(parser)
+
+    bar_parser = new_command("bar", help="The 'bar' subcommand.")
+    bar_parser.add_argument("--bar", type=int)
+
+    foo_parser = new_command("foo", help="The 'foo' subcommand.")
+    foo_parser.add_argument("--foo")
+
+    args = parser.parse_args(argv[1:])
+    return vars(args)
+
+
+@register_runner
+def run_bar(cfg: BarConfig) -> int:
+    """Runner function."""
+    del cfg
+    return 0
+
+
+@register_runner
+def run_foo(cfg: FooConfig) -> int:
+    """Runner function."""
+    del cfg
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs this benchmark."""
+    parser = new_parser(__doc__)
+    args = parser.parse_args(argv)
+
+    argvs = [["bench", "bar", "--bar", "5"], ["bench", "foo"]]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Run from an empty CWD / XDG config dir so config discovery does not
+        # find any stray config files.
+        os.chdir(tmp_dir)
+        os.environ["XDG_CONFIG_HOME"] = str(Path(tmp_dir) / "config")
+
+        clack_main = clack.main_factory(
+            "bench", runners=ALL_RUNNERS, parser=clack_parser
+        )
+        app = clack.ClackApp("bench", runners=ALL_RUNNERS, parser=clack_parser)
+
+        rows = []
+        for name, func in [
+            ("main()", clack_main),
+            ("ClackApp.run()", app.run),
+            ("ClackApp.parse()", app.parse),
+        ]:
+            seconds = measure(
+                lambda: [func(argv) for argv in argvs],  # noqa: B023
+                number=args.number,
+                repeat=args.repeat,
+            )
+            rows.append([name, format_usec(seconds / len(argvs))])
+
+    print(format_table(["function", "time per call"], rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Benchmarks loading an application's config files with the config cache.
+
+Compares discovering, parsing, and merging an application's config files on
+every run (i.e. what a fresh process does) against a warm start of the opt-in
+on-disk config cache.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+import os
+from pathlib import Path
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from _bench import format_table, format_usec, measure, new_parser
+
+from clack import YAMLConfigFile
+from clack._config import config_settings_from_app_name
+from clack._config_file import DOCUMENT_CACHE
+
+
+DEFAULT_NUM_KEYS = [10, 100, 1000]
+
+
+def load_settings(*, use_cache: bool) -> Dict[str, Any]:
+    """Loads the 'bench' application's config settings from scratch."""
+    DOCUMENT_CACHE.clear()
+    return config_settings_from_app_name(
+        [YAMLConfigFile], "bench", use_cache=use_cache
+    )
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs this benchmark."""
+    parser = new_parser(__doc__)
+    parser.add_argument(
+        "num_keys",
+        nargs="*",
+        type=int,
+        default=DEFAULT_NUM_KEYS,
+        help="The number of keys that each config file should define.",
+    )
+    args = parser.parse_args(argv)
+
+    rows = []
+    for num_keys in args.num_keys:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.environ["XDG_CACHE_HOME"] = str(Path(tmp_dir) / "cache")
+            os.environ["XDG_CONFIG_HOME"] = str(Path(tmp_dir) / "config")
+            cwd = Path(tmp_dir) / "cwd"
+            cwd.mkdir()
+            os.chdir(cwd)
+
+            config_dict = {f"key_{idx}": idx for idx in range(num_keys)}
+            for path in [
+                Path(tmp_dir) / "config" / "clack" / "global.yml",
+                Path(tmp_dir) / "config" / "bench" / "config.yml",
+                Path(".bench") / "bench.yml",
+            ]:
+                YAMLConfigFile.new(path, **config_dict)
+
+            # The config cache does NOT trust files that were just modified.
+            old_time = time.time() - 60
+            for root, dirs, files in os.walk(tmp_dir):
+                for name in [root, *dirs, *files]:
+                    os.utime(os.path.join(root, name), (old_time, old_time))
+
+            row = [str(num_keys)]
+            for use_cache in [False, True]:
+                load_settings(use_cache=use_cache)
+                seconds = measure(
+                    partial(load_settings, use_cache=use_cache),
+                    number=args.number,
+                    repeat=args.repeat,
+                )
+                row.append(format_usec(seconds))
+            rows.append(row)
+            os.chdir("/")
+
+    header = ["keys per file", "no cache", "warm config cache"]
+    print(format_table(header, rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
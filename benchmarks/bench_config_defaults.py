@@ -0,0 +1,166 @@
+"""Benchmarks building a clack parser that has a large number of options.
+
+Every add_argument() call made on a clack parser looks up the option's default
+value in the config defaults of the active clack context. Use the --rev option
+to compare the current implementation against older revisions of clack (e.g.
+the revision that still decoded the pickled + base64 encoded config defaults
+envvar on every add_argument() call). Each revision's `src` directory is
+exported using `git archive` and benchmarked in a separate python process.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tarfile
+import tempfile
+from typing import Any, Dict, List, Type
+
+from _bench import format_table, format_usec, measure, new_parser
+import pydantic
+
+import clack
+from clack import _dynvars as dyn
+
+
+DEFAULT_NUM_OPTIONS = [10, 100, 1000]
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+
+def make_config_type(num_options: int) -> Type[clack.Config]:
+    """Returns a new Config type that has `num_options` fields."""
+    fields: Dict[str, Any] = {
+        f"opt_{idx}": (int, idx) for idx in range(num_options)
+    }
+    fields["items"] = (List[int], [])
+    return pydantic.create_model(  # type: ignore[call-overload,no-any-return]
+        f"Config{num_options}", __base__=clack.Config, **fields
+    )
+
+
+def build_parser(num_options: int) -> Any:
+    """Builds a parser using clack.Parser()."""
+    parser = clack.Parser()
+    for idx in range(num_options):
+        parser.add_argument(f"--opt-{idx}", type=int)
+    return parser
+
+
+def run_benchmarks(
+    num_options_list: List[int], *, number: int, repeat: int
+) -> Dict[str, float]:
+    """Runs every benchmark using the clack package that we imported."""
+    results = {}
+    for num_options in num_options_list:
+        config_type = make_config_type(num_options)
+
+        def parse() -> Any:
+            with dyn.clack_envvars_set("bench_config_defaults", [config_type]):
+                return build_parser(num_options)
+
+        def enter_context() -> None:
+            with dyn.clack_envvars_set("bench_config_defaults", [config_type]):
+                pass
+
+        funcs = {
+            "Parser() + add_argument()": parse,
+            "clack_envvars_set()": enter_context,
+        }
+        for name, func in funcs.items():
+            seconds = measure(func, number=number, repeat=repeat)
+            results[f"{name} [{num_options} options]"] = seconds
+    return results
+
+
+def run_benchmarks_at_rev(rev: str, common_args: List[str]) -> Any:
+    """Runs this benchmark using the clack package found at revision `rev`."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive = subprocess.check_output(
+            ["git", "-C", str(REPO_DIR), "archive", rev, "src"]
+        )
+        archive_path = Path(tmp_dir) / "src.tar"
+        archive_path.write_bytes(archive)
+        with tarfile.open(archive_path) as tar:
+            tar.extractall(tmp_dir)
+
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [str(Path(tmp_dir) / "src"), env.get("PYTHONPATH", "")]
+        )
+        # NOTE: Older revisions of clack.Parser() log a warning every time they
+        # fail to find this script's distribution, so we hide stderr.
+        proc = subprocess.run(
+            [sys.executable, __file__, "--json", *common_args],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            sys.stderr.write(proc.stderr)
+            proc.check_returncode()
+
+    results = json.loads(proc.stdout)
+    # Make sure that we did NOT benchmark the installed clack package instead.
+    assert results["clack"].startswith(tmp_dir), results["clack"]
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs this benchmark."""
+    parser = new_parser(__doc__)
+    parser.add_argument(
+        "num_options",
+        nargs="*",
+        type=int,
+        default=DEFAULT_NUM_OPTIONS,
+        help="The number of options that each parser should have.",
+    )
+    parser.add_argument(
+        "--rev",
+        dest="revs",
+        action="append",
+        default=[],
+        help=(
+            "Also benchmark the clack package found at this git revision."
+            " This option can be specified multiple times."
+        ),
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the raw results (as JSON) instead of a table.",
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.num_options, number=args.number, repeat=args.repeat
+    )
+    if args.json:
+        print(json.dumps({"clack": clack.__file__, "timings": results}))
+        return 0
+
+    common_args = [
+        *map(str, args.num_options),
+        f"--number={args.number}",
+        f"--repeat={args.repeat}",
+    ]
+    columns = {
+        rev: run_benchmarks_at_rev(rev, common_args)["timings"]
+        for rev in args.revs
+    }
+    columns["working tree"] = results
+
+    header = ["operation", *columns]
+    rows = [
+        [name, *(format_usec(timings[name]) for timings in columns.values())]
+        for name in results
+    ]
+    print(format_table(header, rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
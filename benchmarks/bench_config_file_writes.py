@@ -0,0 +1,74 @@
+"""Benchmarks updating many values in a YAML config file.
+
+Compares calling YAMLConfigFile.set() once per key against a single
+YAMLConfigFile.set_many() call (which parses and writes the file once).
+"""
+
+from __future__ import annotations
+
+from functools import partial
+from pathlib import Path
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+from _bench import format_table, format_usec, measure, new_parser
+
+from clack import YAMLConfigFile
+
+
+DEFAULT_NUM_KEYS = [1, 10, 100]
+
+
+def set_per_key(cfg_file: YAMLConfigFile, updates: Dict[str, Any]) -> None:
+    """Updates `cfg_file` using one set() call per key."""
+    for key, value in updates.items():
+        cfg_file.set(key, value).unwrap()
+
+
+def set_many(
+    cfg_file: YAMLConfigFile, updates: Dict[str, Any], *, fsync: bool = False
+) -> None:
+    """Updates `cfg_file` using a single set_many() call."""
+    cfg_file.set_many(updates, fsync=fsync).unwrap()
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs this benchmark."""
+    parser = new_parser(__doc__)
+    parser.add_argument(
+        "num_keys",
+        nargs="*",
+        type=int,
+        default=DEFAULT_NUM_KEYS,
+        help="The number of keys that should be updated at once.",
+    )
+    args = parser.parse_args(argv)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_keys in args.num_keys:
+            keys = [f"key_{idx}" for idx in range(num_keys)]
+            cfg_file = YAMLConfigFile.new(
+                Path(tmp_dir) / f"bench_{num_keys}.yml",
+                **{key: "old" for key in keys},
+            )
+            updates = {key: "new" for key in keys}
+
+            row = [str(num_keys)]
+            for func in [
+                partial(set_per_key, cfg_file, updates),
+                partial(set_many, cfg_file, updates),
+                partial(set_many, cfg_file, updates, fsync=True),
+            ]:
+                seconds = measure(func, number=args.number, repeat=args.repeat)
+                row.append(format_usec(seconds))
+            rows.append(row)
+
+    header = ["keys", "set() per key", "set_many()", "set_many(fsync=True)"]
+    print(format_table(header, rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
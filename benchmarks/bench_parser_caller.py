@@ -0,0 +1,102 @@
+"""Benchmarks clack.Parser()'s caller resolution at several stack depths.
+
+Compares the original inspect.stack() based caller resolution against the
+stackless (i.e. sys._getframe() based) caller resolution that clack.Parser()
+now uses, as well as the cost of a full clack.Parser() call with and without
+any stack introspection.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+import inspect
+import sys
+from typing import Any, Callable, Dict, List
+
+from _bench import format_table, format_usec, measure, new_parser
+
+import clack
+from clack import _dynvars as dyn, _parser
+
+
+DEFAULT_DEPTHS = [1, 10, 50, 200]
+
+
+def inspect_stack_resolve() -> Dict[str, Any]:
+    """The caller resolution logic that clack.Parser() used to use."""
+    stack = list(inspect.stack())
+    stack.pop(0)
+    frame = stack.pop(0).frame
+    caller_mod = inspect.getmodule(frame)
+    return {
+        "description": frame.f_globals.get("__doc__"),
+        "name": getattr(caller_mod, "__name__", None),
+        "outer_files": [frame_info.filename for frame_info in stack],
+    }
+
+
+def stackless_resolve() -> Dict[str, Any]:
+    """The caller resolution logic that clack.Parser() now uses."""
+    caller = _parser._Caller(sys._getframe(1))
+    return {
+        "description": caller.module_globals.get("__doc__"),
+        "name": caller.module_globals.get("__name__"),
+        "outer_files": caller.outer_files(),
+    }
+
+
+def introspecting_parser() -> Any:
+    """Construct a clack parser that needs to inspect the call stack."""
+    return clack.Parser()
+
+
+def explicit_parser() -> Any:
+    """Construct a clack parser that does NOT inspect the call stack."""
+    return clack.Parser(module=__name__, executable=__file__)
+
+
+def at_depth(depth: int, func: Callable[[], Any]) -> Any:
+    """Calls `func` with (roughly) `depth` extra frames on the stack."""
+    if depth <= 0:
+        return func()
+    return at_depth(depth - 1, func)
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs this benchmark."""
+    parser = new_parser(__doc__)
+    parser.add_argument(
+        "depths",
+        nargs="*",
+        type=int,
+        default=DEFAULT_DEPTHS,
+        help="The stack depths to benchmark at.",
+    )
+    args = parser.parse_args(argv)
+
+    funcs = [
+        ("inspect.stack()", inspect_stack_resolve),
+        ("sys._getframe()", stackless_resolve),
+        ("Parser()", introspecting_parser),
+        ("Parser(module=, executable=)", explicit_parser),
+    ]
+
+    rows = []
+    with dyn.clack_envvars_set("bench_parser_caller", []):
+        for depth in args.depths:
+            row = [str(depth)]
+            for _, func in funcs:
+                seconds = measure(
+                    partial(at_depth, depth, func),
+                    number=args.number,
+                    repeat=args.repeat,
+                )
+                row.append(format_usec(seconds))
+            rows.append(row)
+
+    print(format_table(["depth"] + [name for name, _ in funcs], rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Benchmarks clack's pydantic backends (i.e. pydantic v1 vs pydantic v2).
+
+Measures constructing (and validating) a clack.Config object, validating its
+fields alone (i.e. without running any settings sources, such as the
+environment variable source), extracting its config defaults, and converting
+it back into a dict. Use the --python option
+to run this benchmark under several python interpreters (e.g. one whose
+environment has pydantic v1 installed and one whose environment has pydantic
+v2 and pydantic-settings installed) and compare the results side-by-side.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Type
+
+from _bench import format_table, format_usec, measure, new_parser
+import pydantic
+
+import clack
+from clack import _dynvars as dyn, _pydantic
+
+
+DEFAULT_NUM_FIELDS = [10, 100]
+
+
+def make_config_type(num_fields: int, base: Type[Any] = clack.Config) -> Any:
+    """Returns a new model type that has `num_fields` (mixed type) fields."""
+    field_specs: List[Any] = [
+        (int, 0),
+        (str, ""),
+        (List[int], []),
+        (Dict[str, float], {}),
+    ]
+    fields: Dict[str, Any] = {
+        f"opt_{idx}": field_specs[idx % len(field_specs)]
+        for idx in range(num_fields)
+    }
+    return pydantic.create_model(  # type: ignore[call-overload,no-any-return]
+        f"Config{num_fields}", __base__=base, **fields
+    )
+
+
+def make_kwargs(num_fields: int) -> Dict[str, Any]:
+    """Returns Config kwargs (which must be coerced) for every field."""
+    values: List[Any] = ["7", "text", ["1", "2", "3"], {"a": "1.5", "b": 2}]
+    return {
+        f"opt_{idx}": values[idx % len(values)] for idx in range(num_fields)
+    }
+
+
+def run_benchmarks(
+    num_fields_list: List[int], *, number: int, repeat: int
+) -> Dict[str, Any]:
+    """Runs every benchmark using the installed pydantic version."""
+    results: Dict[str, Any] = {
+        "pydantic": _pydantic.PYDANTIC_VERSION,
+        "timings": {},
+    }
+    for num_fields in num_fields_list:
+        config_type = make_config_type(num_fields)
+        kwargs = make_kwargs(num_fields)
+        # Used to measure validation WITHOUT any settings sources (e.g. the
+        # environment variable source).
+        model_type = make_config_type(num_fields, base=pydantic.BaseModel)
+        with dyn.clack_envvars_set("bench_pydantic_backend", [config_type]):
+            cfg = config_type(**kwargs)
+
+        def construct() -> Any:
+            with dyn.clack_envvars_set(
+                "bench_pydantic_backend", [config_type]
+            ):
+                return config_type(**kwargs)
+
+        funcs = {
+            "Config(**kwargs)": construct,
+            "validation only": lambda: model_type(**kwargs),
+            "config defaults": lambda: _pydantic.get_field_defaults(
+                config_type
+            ),
+            "config_to_dict()": lambda: _pydantic.config_to_dict(cfg),
+        }
+        for name, func in funcs.items():
+            seconds = measure(func, number=number, repeat=repeat)
+            results["timings"][f"{name} [{num_fields} fields]"] = seconds
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs this benchmark."""
+    parser = new_parser(__doc__)
+    parser.add_argument(
+        "num_fields",
+        nargs="*",
+        type=int,
+        default=DEFAULT_NUM_FIELDS,
+        help="The number of fields that each Config type should have.",
+    )
+    parser.add_argument(
+        "--python",
+        dest="pythons",
+        action="append",
+        help=(
+            "Run this benchmark using this python interpreter. This option"
+            " can be specified multiple times. Defaults to the current"
+            " interpreter."
+        ),
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the raw results (as JSON) instead of a table.",
+    )
+    args = parser.parse_args(argv)
+
+    common_args = [
+        *map(str, args.num_fields),
+        f"--number={args.number}",
+        f"--repeat={args.repeat}",
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Run from an empty CWD / XDG config dir so config discovery does not
+        # find any stray config files.
+        os.chdir(tmp_dir)
+        os.environ["XDG_CONFIG_HOME"] = str(Path(tmp_dir) / "config")
+
+        if args.json or not args.pythons:
+            all_results = [
+                run_benchmarks(
+                    args.num_fields, number=args.number, repeat=args.repeat
+                )
+            ]
+        else:
+            all_results = [
+                json.loads(
+                    subprocess.check_output(
+                        [python, __file__, "--json", *common_args], text=True
+                    )
+                )
+                for python in args.pythons
+            ]
+
+    if args.json:
+        print(json.dumps(all_results[0]))
+        return 0
+
+    header = ["operation"] + [
+        f"pydantic {results['pydantic']}" for results in all_results
+    ]
+    rows = [
+        [name]
+        + [format_usec(results["timings"][name]) for results in all_results]
+        for name in all_results[0]["timings"]
+    ]
+    print(format_table(header, rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
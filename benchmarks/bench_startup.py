@@ -0,0 +1,408 @@
+"""Benchmarks the startup latency of (real and synthetic) clack applications.
+
+Every application is run in a fresh python process. For each application, we
+report:
+
+    * The wall-clock time of a full run (including interpreter startup).
+    * The cumulative import time of the slowest top-level imports (as
+      reported by `python -X importtime`).
+    * A breakdown of where the time is spent (see _startup_driver.py).
+
+Besides the end-to-end test applications (tests/data/e2e), we generate
+synthetic applications with a varying number of options and subcommands so
+we can see how clack's startup cost scales.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+from _bench import format_table, measure, new_parser
+
+
+DEFAULT_NUM_OPTIONS = [10, 100, 1000]
+DEFAULT_NUM_SUBCOMMANDS = [5, 50, 500]
+
+_BENCH_DIR = Path(__file__).resolve().parent
+_DRIVER = _BENCH_DIR / "_startup_driver.py"
+_E2E_DIR = _BENCH_DIR.parent / "tests" / "data" / "e2e"
+
+# The phases reported by _startup_driver.py (in the order they happen).
+PHASES = [
+    "import clack",
+    "import clack deps",
+    "import app",
+    "Parser()",
+    "parse_args()",
+    "config discovery",
+    "config validation",
+    "init_logging()",
+    "main() other",
+]
+
+
+class App(NamedTuple):
+    """A clack application that we want to benchmark."""
+
+    name: str
+    path: Path
+    argv: List[str]
+    # Used to group synthetic applications into scaling curves.
+    group: str = "e2e"
+    size: int = 0
+
+
+OPTIONS_APP_TEMPLATE = '''\
+"""Synthetic clack application with {num_options} options."""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+import clack
+
+
+class Config(clack.Config):
+    """Application Config."""
+
+{fields}
+
+    @classmethod
+    def from_cli_args(cls, argv: Sequence[str]) -> Config:
+        """Parse CLI arguments."""
+        parser = clack.Parser()
+{add_arguments}
+        args = parser.parse_args(argv[1:])
+        kwargs = clack.filter_cli_args(args)
+        return Config(**kwargs)
+
+
+def run(cfg: Config) -> int:
+    """Runner function."""
+    del cfg
+    return 0
+
+
+main = clack.main_factory("options_{num_options}", run)
+'''
+
+SUBCOMMANDS_APP_TEMPLATE = '''\
+"""Synthetic clack application with {num_commands} subcommands."""
+
+from __future__ import annotations
+
+from typing import Any, List, Literal, Sequence
+
+import clack
+from clack.types import ClackRunner
+
+
+Command = Literal[{commands}]
+
+ALL_RUNNERS: List[ClackRunner] = []
+register_runner = clack.register_runner_factory(ALL_RUNNERS)
+
+
+class Config(clack.Config):
+    """Shared Configuration."""
+
+    command: Command
+
+{config_classes}
+
+def clack_parser(argv: Sequence[str]) -> dict[str, Any]:
+    """Parse CLI arguments."""
+    parser = clack.Parser()
+    new_command = clack.new_command_factory(parser)
+{new_commands}
+    args = parser.parse_args(argv[1:])
+    return vars(args)
+
+{runners}
+
+main = clack.main_factory(
+    "subcommands_{num_commands}", runners=ALL_RUNNERS, parser=clack_parser
+)
+'''
+
+SUBCOMMAND_CONFIG_TEMPLATE = '''\
+class Cmd{idx}Config(Config):
+    """The 'cmd{idx}' subcommand's configuration."""
+
+    command: Literal["cmd{idx}"]
+    opt{idx}: int = {idx}
+
+'''
+
+SUBCOMMAND_PARSER_TEMPLATE = """\
+    cmd{idx}_parser = new_command("cmd{idx}", help="The 'cmd{idx}' command.")
+    cmd{idx}_parser.add_argument("--opt{idx}", type=int)
+"""
+
+LAZY_SUBCOMMAND_PARSER_TEMPLATE = """\
+    new_command(
+        "cmd{idx}",
+        help="The 'cmd{idx}' command.",
+        builder=lambda p: p.add_argument("--opt{idx}", type=int),
+    )
+"""
+
+SUBCOMMAND_RUNNER_TEMPLATE = '''\
+@register_runner
+def run_cmd{idx}(cfg: Cmd{idx}Config) -> int:
+    """Runner function."""
+    del cfg
+    return 0
+
+'''
+
+
+def make_options_app(app_dir: Path, num_options: int) -> App:
+    """Generates a synthetic app that has `num_options` options."""
+    source = OPTIONS_APP_TEMPLATE.format(
+        num_options=num_options,
+        fields="\n".join(
+            f"    opt_{idx}: int = {idx}" for idx in range(num_options)
+        ),
+        add_arguments="\n".join(
+            f'        parser.add_argument("--opt-{idx}", type=int)'
+            for idx in range(num_options)
+        ),
+    )
+    path = app_dir / f"options_{num_options}.py"
+    path.write_text(source)
+    return App(
+        path.stem, path, ["--opt-0", "1"], group="options", size=num_options
+    )
+
+
+def make_subcommands_app(
+    app_dir: Path, num_commands: int, *, lazy: bool = False
+) -> App:
+    """Generates a synthetic app that has `num_commands` subcommands.
+
+    If `lazy` is set, every subcommand is registered lazily (i.e. using a
+    builder function).
+    """
+    indices = range(num_commands)
+    parser_template = (
+        LAZY_SUBCOMMAND_PARSER_TEMPLATE if lazy else SUBCOMMAND_PARSER_TEMPLATE
+    )
+    prefix = "lazy_" if lazy else ""
+    source = SUBCOMMANDS_APP_TEMPLATE.format(
+        num_commands=num_commands,
+        commands=", ".join(f'"cmd{idx}"' for idx in indices),
+        config_classes="".join(
+            SUBCOMMAND_CONFIG_TEMPLATE.format(idx=idx) for idx in indices
+        ),
+        new_commands="".join(
+            parser_template.format(idx=idx) for idx in indices
+        ),
+        runners="".join(
+            SUBCOMMAND_RUNNER_TEMPLATE.format(idx=idx) for idx in indices
+        ),
+    )
+    path = app_dir / f"{prefix}subcommands_{num_commands}.py"
+    path.write_text(source)
+    return App(
+        path.stem,
+        path,
+        [f"cmd{num_commands - 1}", f"--opt{num_commands - 1}", "1"],
+        group=f"{prefix}subcommands",
+        size=num_commands,
+    )
+
+
+def run_app(app: App, *python_opts: str) -> subprocess.CompletedProcess:
+    """Runs `app` (using the startup driver) in a fresh python process."""
+    return subprocess.run(
+        [sys.executable, *python_opts, str(_DRIVER), str(app.path), *app.argv],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+
+def phase_times(app: App, *, repeat: int) -> Dict[str, float]:
+    """Returns the (per-phase) minimum time spent in each phase."""
+    result: Dict[str, float] = {}
+    for _ in range(repeat):
+        proc = run_app(app)
+        totals = json.loads(proc.stdout.strip().splitlines()[-1])
+        for name, seconds in totals.items():
+            result[name] = min(result.get(name, float("inf")), seconds)
+    return result
+
+
+def import_times(app: App) -> Dict[str, float]:
+    """Returns the cumulative import times (in seconds) of top-level imports.
+
+    These times are parsed from the output of `python -X importtime`.
+    """
+    proc = run_app(app, "-X", "importtime")
+    result: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented, so we only keep top-level imports.
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue
+
+        result[name.strip()] = int(cumulative) / 1e6
+    return result
+
+
+def format_msec(seconds: float) -> str:
+    """Formats a duration (given in seconds) as milliseconds."""
+    return f"{seconds * 1e3:,.1f}ms"
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs this benchmark."""
+    parser = new_parser(__doc__)
+    parser.add_argument(
+        "--options",
+        nargs="*",
+        type=int,
+        default=DEFAULT_NUM_OPTIONS,
+        help="Generate synthetic apps with this many options.",
+    )
+    parser.add_argument(
+        "--subcommands",
+        nargs="*",
+        type=int,
+        default=DEFAULT_NUM_SUBCOMMANDS,
+        help="Generate synthetic apps with this many subcommands.",
+    )
+    parser.add_argument(
+        "--top-imports",
+        type=int,
+        default=5,
+        help="How many of the slowest top-level imports should we report?",
+    )
+    parser.add_argument(
+        "--json",
+        dest="json_file",
+        type=Path,
+        help="Also write all results to this JSON file.",
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app_dir = Path(tmp_dir) / "apps"
+        app_dir.mkdir()
+
+        # Run every app from an empty CWD / XDG config dir so config
+        # discovery does not find any stray config files.
+        cwd = Path(tmp_dir) / "cwd"
+        cwd.mkdir()
+        os.chdir(cwd)
+        os.environ["XDG_CONFIG_HOME"] = str(Path(tmp_dir) / "config")
+        os.environ["XDG_CACHE_HOME"] = str(Path(tmp_dir) / "cache")
+        os.environ["PYTHONPATH"] = os.pathsep.join(
+            [str(_BENCH_DIR.parent / "src"), os.environ.get("PYTHONPATH", "")]
+        )
+
+        apps = [
+            App("simple", _E2E_DIR / "simple.py", ["-B2"]),
+            App("subcommands", _E2E_DIR / "subcommands.py", ["bar", "5"]),
+        ]
+        apps.extend(make_options_app(app_dir, n) for n in args.options)
+        apps.extend(make_subcommands_app(app_dir, n) for n in args.subcommands)
+        apps.extend(
+            make_subcommands_app(app_dir, n, lazy=True)
+            for n in args.subcommands
+        )
+
+        results = [
+            benchmark_app(
+                app,
+                number=args.number,
+                repeat=args.repeat,
+                top=args.top_imports,
+            )
+            for app in apps
+        ]
+
+    print_results(results)
+    if args.json_file is not None:
+        args.json_file.write_text(json.dumps(results, indent=2))
+    return 0
+
+
+def benchmark_app(
+    app: App, *, number: int, repeat: int, top: int
+) -> Dict[str, Any]:
+    """Runs every benchmark against a single app."""
+    print(f"Benchmarking {app.name}...", file=sys.stderr)
+    imports = import_times(app)
+    slowest_imports = sorted(imports.items(), key=lambda kv: -kv[1])[:top]
+    return {
+        "name": app.name,
+        "group": app.group,
+        "size": app.size,
+        "wall_clock": measure(
+            partial(run_app, app), number=number, repeat=repeat
+        ),
+        "phases": phase_times(app, repeat=repeat),
+        "imports": dict(slowest_imports),
+    }
+
+
+def print_results(results: Sequence[Dict[str, Any]]) -> None:
+    """Prints the results returned by benchmark_app() as tables."""
+    print("\n### Wall-clock time and phase breakdown\n")
+    header = ["app", "wall clock"] + PHASES
+    rows = []
+    for result in results:
+        phases = result["phases"]
+        rows.append(
+            [result["name"], format_msec(result["wall_clock"])]
+            + [format_msec(phases.get(phase, 0.0)) for phase in PHASES]
+        )
+    print(format_table(header, rows))
+
+    print("\n### Slowest top-level imports (-X importtime)\n")
+    for result in results:
+        imports = ", ".join(
+            f"{name}={format_msec(seconds)}"
+            for name, seconds in result["imports"].items()
+        )
+        print(f"{result['name']}: {imports}")
+
+    for group in ["options", "subcommands", "lazy_subcommands"]:
+        group_results = [r for r in results if r["group"] == group]
+        if not group_results:
+            continue
+
+        print(f"\n### Scaling curve: number of {group}\n")
+        base = group_results[0]
+        header = [group, "wall clock", "vs. smallest", "us per unit"]
+        rows = []
+        for result in group_results:
+            extra = result["wall_clock"] - base["wall_clock"]
+            extra_units = result["size"] - base["size"]
+            rows.append([
+                str(result["size"]),
+                format_msec(result["wall_clock"]),
+                f"{result['wall_clock'] / base['wall_clock']:.2f}x",
+                (
+                    f"{extra / extra_units * 1e6:,.1f}us"
+                    if extra_units
+                    else "-"
+                ),
+            ])
+        print(format_table(header, rows))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
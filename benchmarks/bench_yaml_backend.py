@@ -0,0 +1,84 @@
+"""Benchmarks loading (and dumping) large YAML config files.
+
+Compares the pure-python YAML loader / dumper that clack used to use against
+the libyaml-backed implementations that clack now uses when available.
+"""
+
+from __future__ import annotations
+
+from functools import partial
+import sys
+from typing import Any, Dict, List
+
+from _bench import format_table, format_usec, measure, new_parser
+import yaml
+
+from clack import YAML_BACKEND
+
+
+DEFAULT_SIZES = ["10KB", "1MB", "20MB"]
+_UNITS = {"KB": 1024, "MB": 1024 * 1024}
+
+
+def parse_size(size: str) -> int:
+    """Converts a size string (e.g. '10KB') into a number of bytes."""
+    for unit, multiplier in _UNITS.items():
+        if size.upper().endswith(unit):
+            return int(size[: -len(unit)]) * multiplier
+    return int(size)
+
+
+def make_config_dict(num_bytes: int) -> Dict[str, Any]:
+    """Returns a config dict whose YAML dump is roughly `num_bytes` long."""
+    entry = {"name": "some_name", "enabled": True, "tags": ["a", "b", "c"]}
+    entry_size = len(yaml.safe_dump({"key_0000000": entry}))
+    num_entries = max(1, num_bytes // entry_size)
+    return {f"key_{idx:07d}": dict(entry) for idx in range(num_entries)}
+
+
+def main(argv: List[str] = None) -> int:
+    """Runs this benchmark."""
+    parser = new_parser(__doc__)
+    parser.add_argument(
+        "sizes",
+        nargs="*",
+        default=DEFAULT_SIZES,
+        help="The (approximate) sizes of the YAML files that we load.",
+    )
+    args = parser.parse_args(argv)
+
+    if YAML_BACKEND != "libyaml":
+        print(
+            "WARNING: PyYAML was not built against libyaml, so clack is using"
+            " the pure-python YAML backend.",
+            file=sys.stderr,
+        )
+
+    backends = [("python", yaml.SafeLoader, yaml.SafeDumper)]
+    if yaml.__with_libyaml__:
+        backends.append(("libyaml", yaml.CSafeLoader, yaml.CSafeDumper))
+
+    rows = []
+    for size in args.sizes:
+        config_dict = make_config_dict(parse_size(size))
+        data = yaml.safe_dump(config_dict)
+
+        row = [size, f"{len(data):,}"]
+        for _name, loader, dumper in backends:
+            for func in [
+                partial(yaml.load, data, Loader=loader),
+                partial(yaml.dump, config_dict, Dumper=dumper),
+            ]:
+                seconds = measure(func, number=args.number, repeat=args.repeat)
+                row.append(format_usec(seconds))
+        rows.append(row)
+
+    header = ["size", "bytes"]
+    for name, _loader, _dumper in backends:
+        header.extend([f"{name} load", f"{name} dump"])
+    print(format_table(header, rows))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -29,6 +29,11 @@ SUPPORTED_PYTHON_VERSIONS = [
     (3, 12),
 ]
 USE_SCM_VERSION = {"fallback_version": "0.3.9"}
+EXTRAS_REQUIRE = {
+    "msgpack": ["msgpack"],
+    "pydantic2": ["pydantic >= 2", "pydantic-settings >= 2"],
+    "toml": ["tomli; python_version < '3.11'", "tomli-w"],
+}
 
 
 ###############################################################################
@@ -96,6 +101,7 @@ setup(
         for pretty_pyver in PRETTY_PYTHON_VERSIONS
     ],
     description=DESCRIPTION,
+    extras_require=EXTRAS_REQUIRE,
     include_package_data=True,
     install_requires=install_requires(),
     license="MIT license",
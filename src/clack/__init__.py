@@ -4,26 +4,49 @@ A wrapper around the `argparse` library that aims to handle _all_ application
 configuration.
 """
 
+import importlib as _importlib
 import logging as _logging
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
 
-from . import types, xdg
-from ._config import Config
-from ._config_file import YAMLConfigFile
-from ._dynvars import clack_envvars_set, get_config
-from ._helpers import (
-    comma_list_or_file,
-    filter_cli_args,
-    new_command_factory,
-    register_runner_factory,
-)
-from ._main import main_factory
-from ._parser import Parser
+
+if TYPE_CHECKING:  # pragma: no cover
+    from . import types, xdg
+    from ._config import Config
+    from ._config_file import (
+        JSONConfigFile,
+        MsgpackConfigFile,
+        TOMLConfigFile,
+        YAMLConfigFile,
+    )
+    from ._dynvars import (
+        bind_context,
+        clack_envvars_export,
+        clack_envvars_set,
+        get_config,
+    )
+    from ._helpers import (
+        comma_list_or_file,
+        filter_cli_args,
+        new_command_factory,
+        register_runner_factory,
+    )
+    from ._main import ClackApp, main_factory
+    from ._parser import Parser
+
+    YAML_BACKEND: str
 
 
 __all__ = [
+    "ClackApp",
     "Config",
+    "JSONConfigFile",
+    "MsgpackConfigFile",
     "Parser",
+    "TOMLConfigFile",
+    "YAML_BACKEND",
     "YAMLConfigFile",
+    "bind_context",
+    "clack_envvars_export",
     "clack_envvars_set",
     "comma_list_or_file",
     "filter_cli_args",
@@ -39,4 +62,54 @@ __author__ = "Bryan M Bugyi"
 __email__ = "bryanbugyi34@gmail.com"
 __version__ = "0.3.9"
 
+# Maps the names of this package's public attributes to 2-tuples of the form
+# (module, attribute). These attributes are imported lazily (see __getattr__)
+# so that a bare `import clack` does NOT import any of clack's (relatively
+# expensive) dependencies. An attribute of None means the module itself.
+_LAZY_ATTRS: Dict[str, Tuple[str, Any]] = {
+    "ClackApp": ("._main", "ClackApp"),
+    "Config": ("._config", "Config"),
+    "JSONConfigFile": ("._config_file", "JSONConfigFile"),
+    "MsgpackConfigFile": ("._config_file", "MsgpackConfigFile"),
+    "Parser": ("._parser", "Parser"),
+    "TOMLConfigFile": ("._config_file", "TOMLConfigFile"),
+    "YAMLConfigFile": ("._config_file", "YAMLConfigFile"),
+    "bind_context": ("._dynvars", "bind_context"),
+    "clack_envvars_export": ("._dynvars", "clack_envvars_export"),
+    "clack_envvars_set": ("._dynvars", "clack_envvars_set"),
+    "comma_list_or_file": ("._helpers", "comma_list_or_file"),
+    "filter_cli_args": ("._helpers", "filter_cli_args"),
+    "get_config": ("._dynvars", "get_config"),
+    "main_factory": ("._main", "main_factory"),
+    "new_command_factory": ("._helpers", "new_command_factory"),
+    "register_runner_factory": ("._helpers", "register_runner_factory"),
+    "types": (".types", None),
+    "xdg": (".xdg", None),
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name == "YAML_BACKEND":
+        # NOTE: Determining the YAML backend requires us to import PyYAML, so
+        # this value is NOT cached in this module's namespace.
+        from ._config_file import get_yaml_backend_name
+
+        return get_yaml_backend_name()
+
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module_name, attr_name = _LAZY_ATTRS[name]
+    module = _importlib.import_module(module_name, __name__)
+    value = module if attr_name is None else getattr(module, attr_name)
+
+    # Cache this value so __getattr__ is only called once per attribute.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
+
+
 _logging.getLogger(__name__).addHandler(_logging.NullHandler())
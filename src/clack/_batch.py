@@ -0,0 +1,339 @@
+"""Run a clack application many times using a pool of worker processes.
+
+The application is imported (and its sub-command index is built) ONCE in the
+parent process. The worker processes are then forked from the parent process,
+so they inherit the application (and any caches that it has already warmed up)
+instead of importing it again. Each worker runs many argv sets and reuses its
+own caches (e.g. the parsed config file cache) across all of these runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+from contextlib import ExitStack, contextmanager
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+import tempfile
+import time
+from types import FrameType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from ._helpers import exit_status_from_system_exit
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ._main import ClackApp
+
+
+class BatchResult(NamedTuple):
+    """The result of running a clack application with a single argv set."""
+
+    # The position of this result's argv set in the batch.
+    position: int
+    argv: List[str]
+    # The application's exit status (None if the run timed out).
+    status: Optional[int]
+    # Every log record emitted during this run (see _record_to_dict()).
+    logs: List[Dict[str, Any]]
+    # How long (in seconds) this run took.
+    duration: float
+    timed_out: bool = False
+    # Everything that this run wrote to its stdout / stderr.
+    stdout: str = ""
+    stderr: str = ""
+
+
+class BatchTimeout(BaseException):
+    """Raised (in a worker process) when a single run takes too long.
+
+    NOTE: This is a BaseException so it is NOT swallowed by the `except
+    Exception` clause that protects the application's runner function.
+    """
+
+
+# The application run by each worker process (set before the workers fork).
+_WORKER_APP: Optional[ClackApp] = None
+
+
+def run_batch(
+    app: ClackApp,
+    argvs: Iterable[Sequence[str]],
+    *,
+    jobs: int = None,
+    timeout: float = None,
+    ordered: bool = True,
+) -> Iterator[BatchResult]:
+    """Runs `app` once per argv set using a pool of forked worker processes.
+
+    Args:
+        app: The clack application that we will run.
+        argvs: The argv sets (each of which includes the program name) that we
+          will run `app` with.
+        jobs: The number of worker processes to use. Defaults to the number of
+          CPUs.
+        timeout: If set, any single run that takes longer than this many
+          seconds is interrupted (its result will have `timed_out` set).
+        ordered: If set, results are yielded in the same order as `argvs`.
+          Otherwise, results are yielded as soon as they are available.
+
+    Yields:
+        One BatchResult per argv set.
+    """
+    global _WORKER_APP
+
+    # Warm up any caches that do NOT depend on argv before we fork.
+    app.warm_up()
+
+    _WORKER_APP = app
+    try:
+        # NOTE: The 'fork' start method is what allows the workers to inherit
+        # the application instead of re-importing it.
+        context = multiprocessing.get_context("fork")
+        with context.Pool(
+            jobs, initializer=_init_worker, initargs=(timeout,)
+        ) as pool:
+            tasks = ((idx, list(argv)) for idx, argv in enumerate(argvs))
+            imap = pool.imap if ordered else pool.imap_unordered
+            yield from imap(_run_in_worker, tasks)
+    finally:
+        _WORKER_APP = None
+
+
+_WORKER_TIMEOUT: Optional[float] = None
+
+
+def _init_worker(timeout: Optional[float]) -> None:
+    global _WORKER_TIMEOUT
+
+    _WORKER_TIMEOUT = timeout
+    # The parent process is responsible for handling SIGINT.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _run_in_worker(task: Tuple[int, List[str]]) -> BatchResult:
+    idx, argv = task
+    assert _WORKER_APP is not None, (
+        "Logic Error! The batch worker's application should be set before the"
+        " worker processes are forked."
+    )
+
+    logs: List[Dict[str, Any]] = []
+    output: Dict[str, str] = {}
+    status: Optional[int] = None
+    timed_out = False
+    start = time.perf_counter()
+    with _capture_output(output), _capture_log_records(logs.append), _alarm(
+        _WORKER_TIMEOUT
+    ):
+        try:
+            status = _WORKER_APP.run(argv)
+        except SystemExit as e:
+            status = exit_status_from_system_exit(e)
+        except BatchTimeout:
+            timed_out = True
+    duration = time.perf_counter() - start
+
+    return BatchResult(
+        idx,
+        argv,
+        status,
+        logs,
+        duration,
+        timed_out,
+        stdout=output["stdout"],
+        stderr=output["stderr"],
+    )
+
+
+@contextmanager
+def _capture_output(output: Dict[str, str]) -> Iterator[None]:
+    """Captures everything written to stdout and stderr while in this context.
+
+    The output is stored in `output` (using the "stdout" and "stderr" keys)
+    when this context exits.
+
+    NOTE: We redirect the stdout and stderr file descriptors (instead of only
+    replacing sys.stdout and sys.stderr) so that we also capture the output of
+    C extensions and of any subprocesses that the application runs.
+    """
+    with ExitStack() as stack:
+        for name, fd in [("stdout", 1), ("stderr", 2)]:
+            stack.enter_context(_capture_fd(name, fd, output))
+        yield
+
+
+@contextmanager
+def _capture_fd(name: str, fd: int, output: Dict[str, str]) -> Iterator[None]:
+    old_stream = getattr(sys, name)
+    old_stream.flush()
+
+    with tempfile.TemporaryFile() as tmp_file:
+        saved_fd = os.dup(fd)
+        os.dup2(tmp_file.fileno(), fd)
+        # NOTE: sys.stdout / sys.stderr might NOT write to their file
+        # descriptors (e.g. if they have been replaced by pytest).
+        stream = os.fdopen(fd, "w", closefd=False)
+        setattr(sys, name, stream)
+        try:
+            yield
+        finally:
+            stream.flush()
+            setattr(sys, name, old_stream)
+            os.dup2(saved_fd, fd)
+            os.close(saved_fd)
+
+            tmp_file.seek(0)
+            output[name] = tmp_file.read().decode(errors="replace")
+
+
+@contextmanager
+def _capture_log_records(
+    append: Callable[[Dict[str, Any]], None],
+) -> Iterator[None]:
+    """Records every log record that is created while in this context.
+
+    NOTE: We hook into the log record factory (instead of adding a handler)
+    since clack applications (re-)configure their own logging handlers.
+    """
+    old_factory = logging.getLogRecordFactory()
+
+    def factory(*args: Any, **kwargs: Any) -> logging.LogRecord:
+        record = old_factory(*args, **kwargs)
+        # NOTE: Records created by logging.makeLogRecord() (e.g. copies made
+        # by formatters) have no name when they are passed through here.
+        if record.name is not None and _is_handled(record):
+            append(_record_to_dict(record))
+        return record
+
+    logging.setLogRecordFactory(factory)
+    try:
+        yield
+    finally:
+        logging.setLogRecordFactory(old_factory)
+
+
+def _is_handled(record: logging.LogRecord) -> bool:
+    """Will at least one of the root logger's handlers handle `record`?"""
+    handlers = logging.getLogger().handlers
+    return not handlers or any(
+        record.levelno >= handler.level for handler in handlers
+    )
+
+
+def _record_to_dict(record: logging.LogRecord) -> Dict[str, Any]:
+    if isinstance(record.msg, dict):
+        # structlog (and thus logrus) passes its event dicts as the message.
+        message = str(record.msg.get("event", record.msg))
+    else:
+        message = record.getMessage()
+
+    return {
+        "name": record.name,
+        "level": record.levelname,
+        "message": message,
+        "created": record.created,
+    }
+
+
+@contextmanager
+def _alarm(timeout: Optional[float]) -> Iterator[None]:
+    """Raises BatchTimeout if this context takes more than `timeout` secs."""
+    if timeout is None:
+        yield
+        return
+
+    def handler(signum: int, frame: Optional[FrameType]) -> None:
+        del signum, frame
+        raise BatchTimeout
+
+    old_handler = signal.signal(signal.SIGALRM, handler)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, old_handler)
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """The main() function of the `clack-batch` script."""
+    from ._main import add_app_argument, import_app
+
+    parser = argparse.ArgumentParser(
+        prog="clack-batch",
+        description=(
+            "Runs a clack application once per argv set using a pool of"
+            " worker processes. Each line of input should contain one argv"
+            " set encoded as a JSON list of strings (NOT including the"
+            " program name). One JSON object is written to stdout per argv"
+            " set. The output of each run is captured and included in its"
+            " JSON object."
+        ),
+    )
+    add_app_argument(parser)
+    parser.add_argument(
+        "input",
+        nargs="?",
+        type=argparse.FileType("r"),
+        default=sys.stdin,
+        help="The file that contains the argv sets (defaults to stdin).",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="The number of worker processes (defaults to the CPU count).",
+    )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        help="Interrupt any single run that takes longer than this (secs).",
+    )
+    parser.add_argument(
+        "-u",
+        "--unordered",
+        action="store_true",
+        help=(
+            "Write results in completion order instead of in the same order"
+            " as the input."
+        ),
+    )
+    args = parser.parse_args(argv)
+
+    app = import_app(parser, args.app)
+
+    argvs = (
+        [app.app_name, *json.loads(line)]
+        for line in args.input
+        if line.strip()
+    )
+
+    all_ok = True
+    for result in run_batch(
+        app,
+        argvs,
+        jobs=args.jobs,
+        timeout=args.timeout,
+        ordered=not args.unordered,
+    ):
+        all_ok = all_ok and result.status == 0
+        print(json.dumps(result._asdict(), default=str), flush=True)
+
+    return 0 if all_ok else 1
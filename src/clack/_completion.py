@@ -0,0 +1,654 @@
+"""Generates static shell completion scripts for clack applications.
+
+Completing a command-line by asking the application itself (e.g. via
+argcomplete) means starting python, importing the application, and building
+all of its parsers on every keypress. The bash and zsh scripts generated by
+this module instead hard-code everything that can be learned by walking the
+application's parser tree ahead of time (i.e. its sub-commands, options, and
+static choices), so python is never run at completion time.
+
+Values that can NOT be known ahead of time can be completed by a "dynamic"
+shell command (e.g. `myapp list-projects`). The output of this command (one
+completion per line) is cached in the XDG cache directory, so the command is
+only re-run once its cached output has expired.
+"""
+
+from __future__ import annotations
+
+import argparse
+from contextlib import contextmanager
+from pathlib import Path
+import re
+import shlex
+import sys
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    get_args,
+)
+from urllib.parse import quote
+
+from . import _timings as timings
+from ._config_file import config_file_from_path
+from ._parser import NEW_PARSER_HOOK, _LazySubParsersAction
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ._main import ClackApp
+
+
+Shell = Literal["bash", "zsh"]
+T = TypeVar("T")
+
+# Extra words that are offered as values of clack's standard options.
+_STANDARD_VALUE_WORDS: Dict[str, Tuple[str, ...]] = {
+    # See the help message of the -L/--log option.
+    "logs": ("stderr", "stdout", "null", "+"),
+}
+# Options whose metavars contain one of these words are completed as paths.
+_PATH_METAVAR_WORDS = ("FILE", "PATH", "DIR")
+# Options whose values can only be attached to them (i.e. '--opt=value'). The
+# word that follows one of these options is NEVER consumed as its value (see
+# _timings.pop_option()).
+_ATTACHED_VALUE_OPTIONS = (timings.OPTION,)
+
+
+class _Value(NamedTuple):
+    """Describes how the value of an option (or positional) is completed."""
+
+    words: Tuple[str, ...] = ()
+    files: bool = False
+    # The dynamic shell command used to complete this value (if any).
+    command: Optional[str] = None
+    # The name of the file that caches the output of `command` (derived from
+    # the sub-command path and `dest` of the argument that we complete).
+    cache_key: str = ""
+
+
+class _Command(NamedTuple):
+    """Everything we need to know to complete a single (sub-)command."""
+
+    # Identifies this command (e.g. "" for the top-level command or "/foo/bar"
+    # for the 'bar' sub-command of the 'foo' sub-command).
+    path: str
+    options: Tuple[str, ...]
+    # Maps every option that takes a value to how that value is completed.
+    value_options: Dict[str, _Value]
+    # Like `value_options`, but for options whose values can only be attached
+    # to them (see _ATTACHED_VALUE_OPTIONS).
+    attached_value_options: Dict[str, _Value]
+    positionals: Tuple[_Value, ...]
+    # Is the last positional argument allowed to consume many words?
+    variadic: bool
+    # The position (among the positional arguments) of the sub-commands.
+    subcommand_position: Optional[int]
+    # Maps every sub-command name (and alias) to the sub-command's path.
+    subcommands: Dict[str, str]
+
+
+def completion_script(
+    parser: argparse.ArgumentParser,
+    *,
+    prog: str = None,
+    shell: Shell = "bash",
+    dynamic: Mapping[str, str] = None,
+    cache_minutes: int = 5,
+) -> str:
+    """Returns a completion script for the application that uses `parser`.
+
+    Lazy sub-commands (see `new_command_factory()`) are built while walking
+    the parser tree.
+
+    Args:
+        parser: The application's (top-level) parser.
+        prog: The name of the command that we are generating completions for.
+          Defaults to `parser.prog`.
+        shell: The shell that the completion script is written for.
+        dynamic: Maps option strings (e.g. "--project") or argument `dest`
+          names to the shell commands used to complete their values.
+        cache_minutes: How long (in minutes) the output of a dynamic command
+          is cached for. Dynamic commands are run on every completion if this
+          is zero.
+    """
+    assert shell in get_args(Shell), (
+        f"Logic Error! Unsupported shell: {shell!r} (expected one of"
+        f" {list(get_args(Shell))})"
+    )
+
+    if prog is None:
+        prog = parser.prog
+    if dynamic is None:
+        dynamic = {}
+
+    commands = list(_walk_parser(parser, "", dynamic))
+    func_name = "_clack_" + re.sub(r"\W", "_", prog)
+    if shell == "bash":
+        lines = _bash_script(prog, func_name, commands, cache_minutes)
+    else:
+        lines = _zsh_script(prog, func_name, commands, cache_minutes)
+    return "\n".join(lines) + "\n"
+
+
+def _walk_parser(
+    parser: argparse.ArgumentParser, path: str, dynamic: Mapping[str, str]
+) -> Iterator[_Command]:
+    options: List[str] = []
+    value_options: Dict[str, _Value] = {}
+    attached_value_options: Dict[str, _Value] = {}
+    positionals: List[_Value] = []
+    variadic = False
+    subcommand_position: Optional[int] = None
+    subcommands: Dict[str, str] = {}
+    children: List[Tuple[argparse.ArgumentParser, str]] = []
+
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            subcommand_position = len(positionals)
+            positionals.append(_Value())
+            child_paths: Dict[int, str] = {}
+            for name in list(action._name_parser_map):
+                if isinstance(action, _LazySubParsersAction):
+                    child = action.get_parser(name)
+                else:
+                    child = action._name_parser_map[name]
+
+                # NOTE: Aliases share their sub-command's parser.
+                if id(child) not in child_paths:
+                    child_paths[id(child)] = f"{path}/{name}"
+                    children.append((child, child_paths[id(child)]))
+                subcommands[name] = child_paths[id(child)]
+        elif action.option_strings:
+            options.extend(action.option_strings)
+            if action.nargs != 0:
+                value = _get_value(action, path, dynamic)
+                for option_string in action.option_strings:
+                    if option_string in _ATTACHED_VALUE_OPTIONS:
+                        attached_value_options[option_string] = value
+                    else:
+                        value_options[option_string] = value
+        else:
+            positionals.append(_get_value(action, path, dynamic))
+            variadic = action.nargs in ["*", "+", argparse.REMAINDER]
+
+    yield _Command(
+        path,
+        tuple(options),
+        value_options,
+        attached_value_options,
+        tuple(positionals),
+        variadic,
+        subcommand_position,
+        subcommands,
+    )
+    for child, child_path in children:
+        yield from _walk_parser(child, child_path, dynamic)
+
+
+def _get_value(
+    action: argparse.Action, path: str, dynamic: Mapping[str, str]
+) -> _Value:
+    for key in [*action.option_strings, action.dest]:
+        if key in dynamic:
+            # NOTE: Different sub-commands can use the same `dest` for
+            # unrelated arguments, so their cache files must NOT be shared.
+            cache_key = quote(f"{path}/{action.dest}".lstrip("/"), safe="")
+            return _Value(command=dynamic[key], cache_key=cache_key)
+
+    words: Tuple[str, ...] = ()
+    if action.choices is not None:
+        words = tuple(str(choice) for choice in action.choices)
+    words += _STANDARD_VALUE_WORDS.get(action.dest, ())
+
+    metavar = action.metavar if isinstance(action.metavar, str) else ""
+    files = (
+        action.type is config_file_from_path
+        or action.type is Path
+        or isinstance(action.type, argparse.FileType)
+        or any(word in metavar.upper() for word in _PATH_METAVAR_WORDS)
+    )
+    return _Value(words, files)
+
+
+def _bash_script(
+    prog: str, func_name: str, commands: Sequence[_Command], cache_minutes: int
+) -> List[str]:
+    lines = [
+        f"# bash completion for {prog}",
+        "#",
+        "# Generated by clack. Do NOT edit this file by hand.",
+        "",
+        *_dynamic_function(prog, func_name, cache_minutes),
+        "",
+        f"{func_name}_reply() {{",
+        "    # Usage: _reply CUR FILES [WORD ...]",
+        '    local cur="$1" files="$2" IFS=$\'\\n\'',
+        "    shift 2",
+        '    COMPREPLY=($(compgen -W "$*" -- "$cur"))',
+        '    if [[ -n "$files" ]]; then',
+        "        compopt -o filenames 2>/dev/null",
+        '        COMPREPLY+=($(compgen -f -- "$cur"))',
+        "    fi",
+        "}",
+        "",
+        f"{func_name}() {{",
+        "    local cur prev word cpath='' npos=0 skip=0 attached=0 i",
+        "    COMPREPLY=()",
+        '    cur="${COMP_WORDS[COMP_CWORD]}"',
+        '    prev="${COMP_WORDS[COMP_CWORD-1]}"',
+        "    # NOTE: Bash splits '--opt=value' into three words.",
+        '    if [[ "$cur" == "=" ]]; then',
+        "        cur=''",
+        "        attached=1",
+        '    elif [[ "$prev" == "=" ]]; then',
+        '        prev="${COMP_WORDS[COMP_CWORD-2]}"',
+        "        attached=1",
+        "    fi",
+        "",
+        "    for ((i = 1; i < COMP_CWORD; i++)); do",
+        '        word="${COMP_WORDS[i]}"',
+        '        if [[ "$word" == "=" ]]; then',
+        "            skip=1",
+        "            continue",
+        "        elif ((skip)); then",
+        "            skip=0",
+        "            continue",
+        "        fi",
+        *_word_loop_cases(commands),
+        "    done",
+        "",
+        *_completion_cases(commands, func_name, '"$cur"'),
+        "}",
+        "",
+        f"complete -F {func_name} {shlex.quote(prog)}",
+    ]
+    return lines
+
+
+def _zsh_script(
+    prog: str, func_name: str, commands: Sequence[_Command], cache_minutes: int
+) -> List[str]:
+    lines = [
+        f"#compdef {prog}",
+        "#",
+        f"# zsh completion for {prog}",
+        "#",
+        "# Generated by clack. Do NOT edit this file by hand.",
+        "",
+        *_dynamic_function(prog, func_name, cache_minutes),
+        "",
+        f"{func_name}_reply() {{",
+        "    # Usage: _reply CUR FILES [WORD ...]",
+        '    local files="$2"',
+        "    local -a values",
+        "    shift 2",
+        (
+            "    # NOTE: The output of a dynamic command is a single"
+            " (multi-line) word."
+        ),
+        '    (($#)) && values=(${(f)"$(printf \'%s\\n\' "$@")"})',
+        '    ((${#values})) && compadd -- "${values[@]}"',
+        '    [[ -n "$files" ]] && _files',
+        "    return 0",
+        "}",
+        "",
+        f"{func_name}() {{",
+        "    local cur prev word cpath='' npos=0 skip=0 attached=0 i",
+        '    cur="${words[CURRENT]}"',
+        '    prev="${words[CURRENT-1]}"',
+        "    # Complete the value of an option of the form '--opt=value'.",
+        "    if compset -P '-*='; then",
+        '        prev="${IPREFIX%=}"',
+        "        cur=''",
+        "        attached=1",
+        "    fi",
+        "",
+        "    for ((i = 2; i < CURRENT; i++)); do",
+        '        word="${words[i]}"',
+        "        if ((skip)); then",
+        "            skip=0",
+        "            continue",
+        "        fi",
+        *_word_loop_cases(commands),
+        "    done",
+        "",
+        *_completion_cases(commands, func_name, '"$cur"'),
+        "}",
+        "",
+        'if [[ "${zsh_eval_context[-1]}" == loadautofunc ]]; then',
+        f'    {func_name} "$@"',
+        "else",
+        f"    compdef {func_name} {shlex.quote(prog)}",
+        "fi",
+    ]
+    return lines
+
+
+def _dynamic_function(
+    prog: str, func_name: str, cache_minutes: int
+) -> List[str]:
+    """Returns the shell function that runs (and caches) dynamic commands.
+
+    NOTE: This function is valid in both bash and zsh.
+    """
+    cache_dir = f"${{XDG_CACHE_HOME:-$HOME/.cache}}/clack/completion/{prog}"
+    lines = [
+        f"{func_name}_dynamic() {{",
+        "    # Usage: _dynamic CACHE_KEY COMMAND",
+    ]
+    if cache_minutes <= 0:
+        lines.extend(['    eval "$2" 2>/dev/null', "}"])
+        return lines
+
+    lines.extend([
+        f'    local cache_dir="{cache_dir}"',
+        '    local cache_file="$cache_dir/$1"',
+        (
+            "    if [[ -z"
+            f' "$(find "$cache_file" -mmin -{cache_minutes} 2>/dev/null)" ]];'
+            " then"
+        ),
+        '        mkdir -p "$cache_dir" \\',
+        '            && eval "$2" >"$cache_file.$$" 2>/dev/null \\',
+        '            && mv -f "$cache_file.$$" "$cache_file"',
+        '        rm -f "$cache_file.$$"',
+        "    fi",
+        '    cat "$cache_file" 2>/dev/null',
+        "}",
+    ])
+    return lines
+
+
+def _word_loop_cases(commands: Sequence[_Command]) -> List[str]:
+    """Returns the cases that track which (sub-)command is being completed.
+
+    Within the loop over every word that comes before the cursor, the `cpath`
+    variable is set to the path of the current (sub-)command and `npos` is set
+    to the number of positional arguments that this command has been given.
+    """
+    option_patterns: List[str] = []
+    subcommand_cases: List[str] = []
+    for command in commands:
+        option_patterns.extend(
+            _quote_pattern(f"{command.path}:{option}")
+            for option in command.value_options
+        )
+        for name, subcommand_path in command.subcommands.items():
+            pattern = _quote_pattern(
+                f"{command.path}#{command.subcommand_position}:{name}"
+            )
+            subcommand_cases.append(
+                f"            {pattern}) cpath={shlex.quote(subcommand_path)};"
+                " npos=0; continue ;;"
+            )
+
+    lines = []
+    if option_patterns:
+        lines.extend([
+            '        case "$cpath:$word" in',
+            f"            {'|'.join(option_patterns)})",
+            "                skip=1",
+            "                continue",
+            "                ;;",
+            "        esac",
+        ])
+    if subcommand_cases:
+        lines.extend([
+            '        case "$cpath#$npos:$word" in',
+            *subcommand_cases,
+            "        esac",
+        ])
+    lines.append('        [[ "$word" == -* ]] || npos=$((npos + 1))')
+    return lines
+
+
+def _completion_cases(
+    commands: Sequence[_Command], func_name: str, cur: str
+) -> List[str]:
+    """Returns the cases that complete the word under the cursor."""
+    attached_value_cases: List[str] = []
+    value_cases: List[str] = []
+    option_cases: List[str] = []
+    positional_cases: List[str] = []
+    for command in commands:
+        attached_value_cases.extend(
+            "            " + case
+            for case in _value_cases(
+                command, command.attached_value_options, func_name, cur
+            )
+        )
+        value_cases.extend(
+            "        " + case
+            for case in _value_cases(
+                command, command.value_options, func_name, cur
+            )
+        )
+
+        if command.options:
+            reply = _reply(func_name, cur, _Value(command.options))
+            option_cases.append(
+                f"            {_quote_pattern(command.path)}) {reply} ;;"
+            )
+
+        for position, value in enumerate(command.positionals):
+            if position == command.subcommand_position:
+                value = _Value(tuple(command.subcommands))
+            pattern = _quote_pattern(f"{command.path}#{position}")
+            if command.variadic and position == len(command.positionals) - 1:
+                # Every remaining word is consumed by this positional argument.
+                pattern = f"{_quote_pattern(command.path + '#')}*"
+            reply = _reply(func_name, cur, value)
+            positional_cases.append(f"        {pattern}) {reply} ;;")
+
+    lines = []
+    if attached_value_cases:
+        lines.extend([
+            "    if ((attached)); then",
+            '        case "$cpath:$prev" in',
+            *attached_value_cases,
+            "        esac",
+            "    fi",
+            "",
+        ])
+    if value_cases:
+        lines.extend([
+            '    case "$cpath:$prev" in',
+            *value_cases,
+            "    esac",
+            "",
+        ])
+    if option_cases:
+        lines.extend([
+            f"    if [[ {cur} == -* ]]; then",
+            '        case "$cpath" in',
+            *option_cases,
+            "        esac",
+            "        return 0",
+            "    fi",
+            "",
+        ])
+    lines.extend(['    case "$cpath#$npos" in', *positional_cases, "    esac"])
+    return lines
+
+
+def _value_cases(
+    command: _Command,
+    value_options: Mapping[str, _Value],
+    func_name: str,
+    cur: str,
+) -> List[str]:
+    """Returns the (unindented) cases that complete option values."""
+    values: Dict[_Value, List[str]] = {}
+    for option, value in value_options.items():
+        values.setdefault(value, []).append(
+            _quote_pattern(f"{command.path}:{option}")
+        )
+
+    cases = []
+    for value, patterns in values.items():
+        reply = _reply(func_name, cur, value)
+        cases.append(f"{'|'.join(patterns)}) {reply} ;;")
+    return cases
+
+
+def _reply(func_name: str, cur: str, value: _Value) -> str:
+    """Returns the shell command that completes `value` (and then returns)."""
+    files = "1" if value.files else "''"
+    if value.command is not None:
+        dynamic = (
+            f"{func_name}_dynamic {shlex.quote(value.cache_key)}"
+            f" {shlex.quote(value.command)}"
+        )
+        reply = f'{func_name}_reply {cur} {files} "$({dynamic})"'
+    elif value.words or value.files:
+        words = " ".join(shlex.quote(word) for word in value.words)
+        reply = f"{func_name}_reply {cur} {files} {words}".rstrip()
+    else:
+        # This value can NOT be completed (e.g. it is an arbitrary integer).
+        reply = ":"
+    return f"{reply}; return 0"
+
+
+def _quote_pattern(pattern: str) -> str:
+    """Quotes `pattern` so it is matched literally by a shell case statement."""
+    return shlex.quote(pattern) if pattern else "''"
+
+
+class _ParserFound(BaseException):
+    """Raised (by with_app_parser()) once an application builds its parser.
+
+    NOTE: This is a BaseException so it is NOT swallowed by any `except
+    Exception` clauses in the application's parsing code.
+    """
+
+    def __init__(self, result: Any) -> None:
+        super().__init__(result)
+        self.result = result
+
+
+def with_app_parser(
+    app: ClackApp, func: Callable[[argparse.ArgumentParser], T]
+) -> T:
+    """Calls `func` with the (top-level) parser used by a clack application.
+
+    Clack applications build their parsers inside of their Config types'
+    `from_cli_args()` methods (or their `parser` functions), so we start
+    parsing an (empty) command-line and stop as soon as the first parser
+    created by clack.Parser() begins parsing. `func` is called while the
+    application's clack context is still active, so it can build lazy
+    sub-commands (whose arguments use config defaults).
+    """
+    with _intercept_parse_known_args(func):
+        try:
+            app.parse([app.app_name])
+        except _ParserFound as e:
+            result: T = e.result
+            return result
+
+    raise AssertionError(
+        "Logic Error! This application never parsed its command-line"
+        f" arguments using a clack.Parser() parser. | app={app!r}"
+    )
+
+
+@contextmanager
+def _intercept_parse_known_args(
+    func: Callable[[argparse.ArgumentParser], Any],
+) -> Iterator[None]:
+    """Intercepts parse_known_args() calls of new clack.Parser() parsers.
+
+    NOTE: We only patch the parsers created in this context (NOT the
+    argparse.ArgumentParser class), so other threads (and any parsers that
+    `func` creates) are NOT affected.
+    """
+    found = False
+
+    def new_parser_hook(parser: argparse.ArgumentParser) -> None:
+        if found:
+            return
+
+        def parse_known_args(*args: Any, **kwargs: Any) -> Any:
+            nonlocal found
+
+            del args, kwargs
+            found = True
+            raise _ParserFound(func(parser))
+
+        parser.parse_known_args = parse_known_args  # type: ignore[method-assign]
+
+    token = NEW_PARSER_HOOK.set(new_parser_hook)
+    try:
+        yield
+    finally:
+        NEW_PARSER_HOOK.reset(token)
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """The main() function of the `clack-completion` script."""
+    from ._main import add_app_argument, import_app
+
+    parser = argparse.ArgumentParser(
+        prog="clack-completion",
+        description=(
+            "Writes a static (i.e. python-free) shell completion script for a"
+            " clack application to stdout. For example, bash users can add"
+            " the output of `clack-completion pkg.cli:main` to a file in the"
+            " ~/.local/share/bash-completion/completions directory."
+        ),
+    )
+    add_app_argument(parser)
+    parser.add_argument(
+        "-s",
+        "--shell",
+        choices=list(get_args(Shell)),
+        default="bash",
+        help="The shell that the completion script is written for.",
+    )
+    parser.add_argument(
+        "-d",
+        "--dynamic",
+        metavar="OPTION=COMMAND",
+        action="append",
+        default=[],
+        help=(
+            "Complete the values of OPTION (e.g. '--project') using the lines"
+            " written to stdout by the shell command COMMAND. This option can"
+            " be specified multiple times."
+        ),
+    )
+    parser.add_argument(
+        "--cache-minutes",
+        type=int,
+        default=5,
+        help=(
+            "How long (in minutes) the output of a dynamic command is cached"
+            " for (0 disables caching)."
+        ),
+    )
+    args = parser.parse_args(argv)
+
+    app = import_app(parser, args.app)
+
+    dynamic: Dict[str, str] = {}
+    for spec in args.dynamic:
+        option, sep, command = spec.partition("=")
+        if not sep:
+            parser.error(f"Bad --dynamic specification: {spec!r}")
+        dynamic[option] = command
+
+    sys.stdout.write(
+        app.completion_script(
+            args.shell, dynamic=dynamic, cache_minutes=args.cache_minutes
+        )
+    )
+    return 0
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from pathlib import Path
 from typing import (
+    TYPE_CHECKING,
     Any,
     Callable,
     Dict,
@@ -17,15 +18,26 @@ from typing import (
 )
 
 from logrus import Log
-from pydantic import BaseSettings
 from typist import PathLike
 
-from . import xdg
-from ._config_file import YAMLConfigFile
+from . import _timings as timings, xdg
+from ._config_file import (
+    CONFIG_FILE_TYPES,
+    YAMLConfigFile,
+    config_file_type_from_path,
+)
+from ._discovery import DirectoryScanner
+from ._pydantic import PYDANTIC_V2, BaseSettings, get_config_setting
 from .types import ClackConfigFile, Config_T
 
 
-_SettingsSource = Callable[[BaseSettings], Dict[str, Any]]
+if TYPE_CHECKING:  # pragma: no cover
+    from ._config_cache import ConfigCacheKey
+
+
+# NOTE: Pydantic v1 passes the settings object to each settings source, while
+# pydantic v2 calls each settings source with no arguments.
+_SettingsSource = Callable[..., Dict[str, Any]]
 
 
 class Config(BaseSettings):
@@ -35,6 +47,15 @@ class Config(BaseSettings):
     logs: List[Log] = []
     verbose: int = 0
 
+    # NOTE: pydantic's name for `self` lets a field named 'self' be passed.
+    def __init__(  # pylint: disable=no-self-argument
+        __pydantic_self__, **values: Any
+    ) -> None:
+        # NOTE: Validation is where config discovery (and config file parsing)
+        # happens, since these are implemented as settings sources.
+        with timings.phase(timings.VALIDATION):
+            super().__init__(**values)
+
     @classmethod
     def from_cli_args(cls: Type[Config_T], argv: Sequence[str]) -> Config_T:
         """Dummy function so this class follows ClackConfig protocol."""
@@ -45,194 +66,346 @@ class Config(BaseSettings):
             " their clack.Config subclass."
         )
 
-    class Config:
-        """Pydantic BaseSettings Configuration.
-
-        NOTE:
-            It is an unfortunate coincidence that this class must be named the
-            same as its parent. This is a pydantic convention, but we (clack
-            library maintainers) refuse to give up on the 'Config' naming
-            scheme.
-        """
-
-        # Raise an Exception if anyone tries to modify the configuration
-        # classes' attributes after it has been instantiated.
-        allow_mutation = False
-
-        # Allow extra init arguments to be passed into the configuration class
-        # at initialization time (just ignore them).
-        extra = "ignore"
+    if PYDANTIC_V2:
+        # See the inner Config class below for an explanation of each of these
+        # settings (pydantic v2 renamed 'allow_mutation' to 'frozen').
+        model_config = {  # type: ignore[typeddict-unknown-key,unused-ignore]
+            "frozen": True,
+            "extra": "ignore",
+            "arbitrary_types_allowed": True,
+            "config_file_types": [YAMLConfigFile],
+            "use_config_cache": False,
+        }
 
         @classmethod
-        def customise_sources(
+        def settings_customise_sources(  # type: ignore[override,unused-ignore]
             cls,
+            settings_cls: Type[BaseSettings],
             init_settings: _SettingsSource,
             env_settings: _SettingsSource,
+            dotenv_settings: _SettingsSource,
             file_secret_settings: _SettingsSource,
         ) -> Tuple[_SettingsSource, ...]:
             """Customize where we load our application config from."""
-            # HACK: Use nested import to prevent circular import errors.
-            del file_secret_settings
+            del settings_cls, dotenv_settings, file_secret_settings
             return (
                 init_settings,
                 env_settings,
-                _config_settings_factory(YAMLConfigFile),
+                _config_settings_factory(
+                    get_config_setting(
+                        cls, "config_file_types", [YAMLConfigFile]
+                    ),
+                    use_cache=get_config_setting(
+                        cls, "use_config_cache", False
+                    ),
+                ),
             )
 
+    else:
+
+        class Config:
+            """Pydantic BaseSettings Configuration.
+
+            NOTE:
+                It is an unfortunate coincidence that this class must be named
+                the same as its parent. This is a pydantic convention, but we
+                (clack library maintainers) refuse to give up on the 'Config'
+                naming scheme.
+            """
+
+            # Raise an Exception if anyone tries to modify the configuration
+            # classes' attributes after it has been instantiated.
+            allow_mutation = False
+
+            # Allow extra init arguments to be passed into the configuration
+            # class at initialization time (just ignore them).
+            extra = "ignore"
+
+            # The types of config files that we search for (in order of
+            # preference) when no config file is specified on the
+            # command-line. Applications can override this to opt into other
+            # config file formats (e.g. [clack.YAMLConfigFile,
+            # clack.JSONConfigFile]).
+            config_file_types: Sequence[Type[ClackConfigFile]] = [
+                YAMLConfigFile
+            ]
+
+            # If set, the settings loaded from this application's config files
+            # are cached on disk (in the XDG cache directory) and are only
+            # re-loaded when one of these config files (or their directories)
+            # changes.
+            use_config_cache = False
+
+            @classmethod
+            def customise_sources(
+                cls,
+                init_settings: _SettingsSource,
+                env_settings: _SettingsSource,
+                file_secret_settings: _SettingsSource,
+            ) -> Tuple[_SettingsSource, ...]:
+                """Customize where we load our application config from."""
+                # HACK: Use nested import to prevent circular import errors.
+                del file_secret_settings
+                return (
+                    init_settings,
+                    env_settings,
+                    _config_settings_factory(
+                        cls.config_file_types, use_cache=cls.use_config_cache
+                    ),
+                )
+
 
 def _config_settings_factory(
-    config_file_type: Type[ClackConfigFile],
+    config_file_types: Sequence[Type[ClackConfigFile]],
+    *,
+    use_cache: bool = False,
 ) -> _SettingsSource:
     """Configuration Settings Factory Function
 
     Factory function that returns a pydantic.BaseSettings source callable that
-    reads values from one or more YAML config file.
+    reads values from one or more config files.
     """
 
-    class MutexConfigGroup:
-        """Mutually Exclusive Configuration File Group.
+    def config_settings(settings: BaseSettings = None) -> Dict[str, Any]:
+        """The pydantic.BaseSettings source callable that we will return."""
+        from . import _dynvars as dyn
 
-        A single MutexConfigGroup object specifies one or more configuration
-        file locations. We will ONLY load configuration values from the FIRST
-        configuration file in this group that exists on disk (if any do).
-        """
+        del settings
 
-        def __init__(self, config_paths: List[Path], *, set_config_file: bool):
-            self.config_paths = config_paths
-            self.set_config_file = set_config_file
+        app_name = dyn.get_app_name()
+        config_file = dyn.get_config_file()
 
-        @classmethod
-        def from_path_lists(
-            cls,
-            *path_like_lists: Union[List[Path], List[str]],
-            set_config_file: bool = True,
-        ) -> "MutexConfigGroup":
-            """MutexConfigGroup class constructor.
+        with timings.phase(timings.DISCOVERY):
+            if config_file is None:
+                return config_settings_from_app_name(
+                    config_file_types, app_name, use_cache=use_cache
+                )
+            else:
+                return config_settings_from_config_file(
+                    config_file_types, config_file
+                )
 
-            Given N lists of config file paths, construct a new
-            MutexConfigGroup object.
-            """
-            flat_path_list = []
-            for path_like_list in path_like_lists:
-                for path_like in path_like_list:
-                    flat_path_list.append(Path(path_like))
-            return cls(flat_path_list, set_config_file=set_config_file)
-
-        def populate_config_map(
-            self, mut_config_map: MutableMapping[str, Any]
-        ) -> None:
-            """Populate values for a config mapping using this mutex group.
-
-            Set configuration options (by adding keys to the ``mut_config_map``
-            mapping) using (at most) one of the config files corresponding with
-            this MutexConfigGroup.
-            """
-            for config_path in self.config_paths:
-                if config_path.is_file():
-                    config_file = config_file_type(config_path)
-                    config_dict = config_file.to_dict().unwrap()
-                    mut_config_map.update(config_dict)
+    return config_settings
 
-                    if self.set_config_file:
-                        mut_config_map["config_file"] = config_file
 
-                    break
+class MutexConfigGroup:
+    """Mutually Exclusive Configuration File Group.
 
-    def all_extensions(name: PathLike) -> List[str]:
-        """Helper function that adds support for all config filename exts."""
-        name = str(name)
-        return [name + "." + ext for ext in config_file_type.extensions]
+    A single MutexConfigGroup object specifies one or more configuration
+    file locations. We will ONLY load configuration values from the FIRST
+    configuration file in this group that exists on disk (if any do). The
+    type of each configuration file is chosen using its file extension.
+    """
 
-    def config_settings(settings: BaseSettings) -> Dict[str, Any]:
-        """The pydantic.BaseSettings source callable that we will return."""
-        from . import _dynvars as dyn
+    def __init__(
+        self,
+        config_file_types: Sequence[Type[ClackConfigFile]],
+        config_paths: List[Path],
+        *,
+        set_config_file: bool,
+    ):
+        self.config_file_types = config_file_types
+        self.config_paths = config_paths
+        self.set_config_file = set_config_file
 
-        del settings
+    @classmethod
+    def from_path_lists(
+        cls,
+        config_file_types: Sequence[Type[ClackConfigFile]],
+        *path_like_lists: Union[List[Path], List[str]],
+        set_config_file: bool = True,
+    ) -> "MutexConfigGroup":
+        """MutexConfigGroup class constructor.
+
+        Given N lists of config file paths, construct a new MutexConfigGroup
+        object.
+        """
+        flat_path_list = []
+        for path_like_list in path_like_lists:
+            for path_like in path_like_list:
+                flat_path_list.append(Path(path_like))
+        return cls(
+            config_file_types, flat_path_list, set_config_file=set_config_file
+        )
 
-        app_name = dyn.get_app_name()
-        config_file = dyn.get_config_file()
+    def populate_config_map(
+        self,
+        mut_config_map: MutableMapping[str, Any],
+        *,
+        is_file: Callable[[Path], bool] = Path.is_file,
+    ) -> Optional[Path]:
+        """Populate values for a config mapping using this mutex group.
 
-        if config_file is None:
-            return config_settings_from_app_name(app_name)
-        else:
-            return config_settings_from_config_file(config_file)
+        Set configuration options (by adding keys to the ``mut_config_map``
+        mapping) using (at most) one of the config files corresponding with
+        this MutexConfigGroup.
 
-    def config_settings_from_app_name(app_name: str) -> Dict[str, Any]:
-        """Load settings from multiple configuration files based on `app_name`.
+        Args:
+            mut_config_map: The config mapping that we will populate.
+            is_file: Used to check whether or not each config path exists.
 
-        NOTE:
-            This function is only used when a user has NOT specified an
-            explicit config file location (e.g. via --config=foo.yml).
+        Returns:
+            The path of the config file that we loaded (if any).
         """
-        ##### Helper variables used by MutexConfigGroup objects...
-        app_path = Path(app_name)
-        base_xdg_dir = xdg.get_base_dir("config")
-        clack_xdg_dir = base_xdg_dir / "clack"
-        clack_apps_dir = clack_xdg_dir / "apps"
-        full_xdg_dir = xdg.get_full_dir("config", app_name)
-        hidden_app_path = Path("." + app_name)
-
-        ##### MutexConfigGroup variable definitions...
-        # user config files used by ALL clack apps
-        #
-        # Note that we do NOT set the Config.config_file setting if the only
-        # configuration file found is used by all apps (i.e. belongs to the
-        # following MutexConfigGroup).
-        #
-        # e.g. ~/.config/clack/global.yml OR ~/.config/clack/apps/all.yml...
-        user_group_for_all_apps = MutexConfigGroup.from_path_lists(
-            all_extensions(clack_xdg_dir / "global"),
-            all_extensions(clack_apps_dir / "all"),
-            set_config_file=False,
-        )
+        for config_path in self.config_paths:
+            if is_file(config_path):
+                config_file_type = config_file_type_from_path(
+                    config_path, self.config_file_types
+                )
+                config_file = config_file_type(config_path)
+                config_dict = config_file.to_dict().unwrap()
+                mut_config_map.update(config_dict)
+
+                if self.set_config_file:
+                    mut_config_map["config_file"] = config_file
+
+                return config_path
+
+        return None
+
+
+def config_settings_from_app_name(
+    config_file_types: Sequence[Type[ClackConfigFile]],
+    app_name: str,
+    *,
+    scanner: DirectoryScanner = None,
+    use_cache: bool = False,
+) -> Dict[str, Any]:
+    """Load settings from multiple configuration files based on `app_name`.
+
+    Args:
+        config_file_types: The types of config files that we are looking for
+          (in order of preference). The file extensions of ALL of these types
+          are probed in a single pass over each candidate directory.
+        app_name: The name of the current application.
+        scanner: Used to check which candidate config files exist. We list the
+          contents of each candidate directory (at most) once instead of
+          checking each candidate config file individually.
+        use_cache: If set, we use the on-disk config cache (see the
+          `_config_cache` module) to avoid re-parsing config files that have
+          NOT changed since this function was last called.
+
+    NOTE:
+        This function is only used when a user has NOT specified an
+        explicit config file location (e.g. via --config=foo.yml).
+    """
+    if scanner is None:
+        scanner = DirectoryScanner(record_mtimes=use_cache)
 
-        # app-specific user config files
-        #
-        # e.g. ~/.config/APP/APP.yml OR ~/.config/APP/config.yml OR
-        #      ~/.config/clack/apps/APP.yml...
-        user_group_for_this_app = MutexConfigGroup.from_path_lists(
-            all_extensions(full_xdg_dir / app_name),
-            all_extensions(full_xdg_dir / "config"),
-            all_extensions(clack_apps_dir / app_name),
+    def all_extensions(name: PathLike) -> List[str]:
+        """Helper function that adds support for all config filename exts."""
+        name = str(name)
+        return [
+            name + "." + ext
+            for config_file_type in config_file_types
+            for ext in config_file_type.extensions
+        ]
+
+    ##### Helper variables used by MutexConfigGroup objects...
+    app_path = Path(app_name)
+    base_xdg_dir = xdg.get_base_dir("config")
+    clack_xdg_dir = base_xdg_dir / "clack"
+    clack_apps_dir = clack_xdg_dir / "apps"
+    full_xdg_dir = xdg.get_full_dir("config", app_name)
+    hidden_app_path = Path("." + app_name)
+
+    ##### MutexConfigGroup variable definitions...
+    # user config files used by ALL clack apps
+    #
+    # Note that we do NOT set the Config.config_file setting if the only
+    # configuration file found is used by all apps (i.e. belongs to the
+    # following MutexConfigGroup).
+    #
+    # e.g. ~/.config/clack/global.yml OR ~/.config/clack/apps/all.yml...
+    user_group_for_all_apps = MutexConfigGroup.from_path_lists(
+        config_file_types,
+        all_extensions(clack_xdg_dir / "global"),
+        all_extensions(clack_apps_dir / "all"),
+        set_config_file=False,
+    )
+
+    # app-specific user config files
+    #
+    # e.g. ~/.config/APP/APP.yml OR ~/.config/APP/config.yml OR
+    #      ~/.config/clack/apps/APP.yml...
+    user_group_for_this_app = MutexConfigGroup.from_path_lists(
+        config_file_types,
+        all_extensions(full_xdg_dir / app_name),
+        all_extensions(full_xdg_dir / "config"),
+        all_extensions(clack_apps_dir / app_name),
+    )
+
+    # app-specific config files that are local to the CWD
+    #
+    # e.g. ./APP.yml OR ./APP.yaml OR ./APP/APP.yml OR ./APP/config.yaml OR
+    #      ./.APP/APP.yaml OR ./.APP/config.yml...
+    local_group_for_this_app = MutexConfigGroup.from_path_lists(
+        config_file_types,
+        all_extensions(app_name),
+        all_extensions(app_path / app_name),
+        all_extensions(app_path / "config"),
+        all_extensions(hidden_app_path / app_name),
+        all_extensions(hidden_app_path / "config"),
+    )
+
+    # WARNING: Order matters here since groups listed first will potentially
+    # have their configurations overwritten by groups listed later.
+    all_groups = [
+        user_group_for_all_apps,
+        user_group_for_this_app,
+        local_group_for_this_app,
+    ]
+
+    ##### Check the (opt-in) config cache...
+    cache_key: Optional[ConfigCacheKey] = None
+    if use_cache:
+        from . import _config_cache as config_cache
+
+        cache_key = config_cache.new_key(
+            app_name,
+            config_file_types,
+            (path for group in all_groups for path in group.config_paths),
         )
-
-        # app-specific config files that are local to the CWD
-        #
-        # e.g. ./APP.yml OR ./APP.yaml OR ./APP/APP.yml OR ./APP/config.yaml OR
-        #      ./.APP/APP.yaml OR ./.APP/config.yml...
-        local_group_for_this_app = MutexConfigGroup.from_path_lists(
-            all_extensions(app_name),
-            all_extensions(app_path / app_name),
-            all_extensions(app_path / "config"),
-            all_extensions(hidden_app_path / app_name),
-            all_extensions(hidden_app_path / "config"),
+        cached_result = config_cache.load(cache_key)
+        if cached_result is not None:
+            return cached_result
+
+    ##### Populate and then return dict of configuration values...
+    result: Dict[str, Any] = {}
+
+    # Fill the `result` configuration mapping by calling the
+    # MutexConfigGroup.populate_config_map() method for each group...
+    loaded_paths = []
+    for group in all_groups:
+        loaded_path = group.populate_config_map(
+            result, is_file=scanner.is_file
         )
+        if loaded_path is not None:
+            loaded_paths.append(loaded_path)
 
-        ##### Populate and then return dict of configuration values...
-        result: Dict[str, Any] = {}
+    if cache_key is not None and scanner.dir_mtimes is not None:
+        config_cache.store(cache_key, scanner, loaded_paths, result)
 
-        # Fill the `result` configuration mapping by calling the
-        # MutexConfigGroup.populate_config_map() method for each group...
-        #
-        # WARNING: Order matters here since groups called first will
-        # potentially have their configurations overwritten by groups called
-        # later.
-        user_group_for_all_apps.populate_config_map(result)
-        user_group_for_this_app.populate_config_map(result)
-        local_group_for_this_app.populate_config_map(result)
+    timings.count(timings.PATHS_PROBED, scanner.files_probed)
+    timings.count(timings.FS_CALLS, scanner.fs_calls)
+    return result
 
-        return result
 
-    def config_settings_from_config_file(config_file: Path) -> Dict[str, Any]:
-        """Load settings from a single configuration file.
+def config_settings_from_config_file(
+    config_file_types: Sequence[Type[ClackConfigFile]], config_file: Path
+) -> Dict[str, Any]:
+    """Load settings from a single configuration file.
 
-        NOTE:
-            This function is only used when a user has specified an explicit
-            config file location (e.g. via --config=foo.yml).
-        """
-        result: Dict[str, Any] = {}
-        single_file_group = MutexConfigGroup.from_path_lists([config_file])
-        single_file_group.populate_config_map(result)
-        return result
+    The config file's type is chosen using its file extension (any of the
+    config file types supported by clack can be used here).
 
-    return config_settings
+    NOTE:
+        This function is only used when a user has specified an explicit
+        config file location (e.g. via --config=foo.yml).
+    """
+    result: Dict[str, Any] = {}
+    single_file_group = MutexConfigGroup.from_path_lists(
+        [*config_file_types, *CONFIG_FILE_TYPES], [config_file]
+    )
+    single_file_group.populate_config_map(result)
+    return result
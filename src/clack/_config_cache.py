@@ -0,0 +1,187 @@
+"""Contains the (opt-in) on-disk cache of merged config file settings.
+
+Discovering, parsing, and merging an application's config files is wasted
+work when none of those files have changed since the last time the
+application was run. This module stores the merged settings returned by
+config_settings_from_app_name() in the XDG cache directory, along with the
+mtimes of every directory that was probed and the signatures of every config
+file that was loaded. A warm start then only costs one stat() call per
+recorded directory / file and one (small) file read.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+import pickle
+from typing import (
+    Any,
+    Dict,
+    Final,
+    Iterable,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+)
+
+from logrus import Logger
+
+from . import xdg
+from ._config_file import DOCUMENT_CACHE, FileSignature, atomic_write
+from ._discovery import DirectoryScanner
+from .types import ClackConfigFile
+
+
+_CACHE_DIRNAME: Final = "config_cache"
+_CACHE_VERSION: Final = 1
+
+# Filesystem timestamps are coarse (e.g. a directory can be modified right
+# after we stat() it without its mtime changing), so we do NOT trust any
+# recorded mtime that is this close to the time that the cache file itself
+# was written.
+_RACY_WINDOW_NS: Final = 2 * 10**9
+
+logger = Logger(__name__)
+
+# Tuple of the form: (version, app_name, cwd, config_file_types, candidates).
+ConfigCacheKey = Tuple[int, str, str, Tuple[str, ...], Tuple[str, ...]]
+
+
+class _ConfigCacheEntry(NamedTuple):
+    key: ConfigCacheKey
+    dir_mtimes: Dict[str, Optional[int]]
+    file_signatures: Dict[str, FileSignature]
+    config_dict: Dict[str, Any]
+
+
+def new_key(
+    app_name: str,
+    config_file_types: Iterable[Type[ClackConfigFile]],
+    candidate_paths: Iterable[Path],
+) -> ConfigCacheKey:
+    """Returns the key used to look up cached config settings.
+
+    Args:
+        app_name: The name of the current application.
+        config_file_types: The types of config files that we search for.
+        candidate_paths: All of the config file paths that we search for.
+    """
+    return (
+        _CACHE_VERSION,
+        app_name,
+        os.getcwd(),
+        tuple(
+            f"{config_file_type.__module__}.{config_file_type.__qualname__}"
+            for config_file_type in config_file_types
+        ),
+        tuple(str(path) for path in candidate_paths),
+    )
+
+
+def get_cache_file(key: ConfigCacheKey) -> Path:
+    """Returns the path of the cache file used to store `key`'s settings."""
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()
+    return xdg.get_full_dir("cache", "clack") / _CACHE_DIRNAME / digest
+
+
+def load(key: ConfigCacheKey) -> Optional[Dict[str, Any]]:
+    """Returns the cached config settings for `key`.
+
+    Returns:
+        The cached config settings, or None if no settings have been cached
+        for `key` or if any of the directories / files that these settings
+        were derived from have changed since they were cached.
+    """
+    try:
+        with get_cache_file(key).open("rb") as f:
+            cache_mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            entry = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:  # pylint: disable=broad-except
+        logger.debug("Unable to read config cache file.", error=e)
+        return None
+
+    if not isinstance(entry, _ConfigCacheEntry) or entry.key != key:
+        return None
+
+    recorded_mtimes = [
+        mtime_ns for mtime_ns in entry.dir_mtimes.values() if mtime_ns
+    ] + [signature[0] for signature in entry.file_signatures.values()]
+    if any(
+        mtime_ns > cache_mtime_ns - _RACY_WINDOW_NS
+        for mtime_ns in recorded_mtimes
+    ):
+        return None
+
+    for dir_path, mtime_ns in entry.dir_mtimes.items():
+        try:
+            if os.stat(dir_path).st_mtime_ns != mtime_ns:
+                return None
+        except (FileNotFoundError, NotADirectoryError):
+            if mtime_ns is not None:
+                return None
+
+    for file_path, signature in entry.file_signatures.items():
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+
+        if (st.st_mtime_ns, st.st_size, st.st_ino) != signature:
+            return None
+
+    return entry.config_dict
+
+
+def store(
+    key: ConfigCacheKey,
+    scanner: DirectoryScanner,
+    loaded_paths: Iterable[Path],
+    config_dict: Dict[str, Any],
+) -> None:
+    """Stores the config settings for `key` in the on-disk cache.
+
+    Args:
+        key: The key returned by new_key().
+        scanner: The scanner used to discover which config files exist. This
+          scanner MUST have been constructed with `record_mtimes=True`.
+        loaded_paths: The config files that `config_dict` was loaded from.
+        config_dict: The merged config settings.
+    """
+    assert (
+        scanner.dir_mtimes is not None
+    ), "The config cache requires a scanner that records directory mtimes."
+    if not scanner.is_complete:
+        return
+
+    file_signatures = {}
+    for path in loaded_paths:
+        signature = DOCUMENT_CACHE.signature(path)
+        if signature is None:
+            return
+        file_signatures[os.path.abspath(path)] = signature
+
+    entry = _ConfigCacheEntry(
+        key=key,
+        dir_mtimes={
+            os.path.abspath(dir_path): mtime_ns
+            for dir_path, mtime_ns in scanner.dir_mtimes.items()
+        },
+        file_signatures=file_signatures,
+        config_dict=config_dict,
+    )
+
+    cache_file = get_cache_file(key)
+    try:
+        data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(cache_file, data)
+    except Exception as e:  # pylint: disable=broad-except
+        logger.debug(
+            "Unable to write config cache file.",
+            cache_file=cache_file,
+            error=e,
+        )
@@ -2,22 +2,403 @@
 
 from __future__ import annotations
 
+import abc
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+import importlib
+import json
+import os
 from pathlib import Path
-from typing import Any, Dict
+import stat
+import sys
+import tempfile
+import threading
+from types import MappingProxyType, ModuleType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from eris import ErisError, Err, Ok, Result, return_lazy_result
 from typist import PathLike
-import yaml
 
+from . import _timings as timings
+from .types import ClackConfigDocument, ClackConfigFile
 
-class YAMLConfigFile:
-    """A clack YAML configuration file.
 
-    This class is useful as a way to conveniently get/set configuration values
-    in/to your current application's config file.
+_ConfigFile_T = TypeVar("_ConfigFile_T", bound="ConfigFileBase")
+
+
+# The maximum total size (in bytes) of the files whose parsed contents are
+# stored in the process-wide DOCUMENT_CACHE.
+_DOCUMENT_CACHE_MAX_BYTES: Final = 64 * 1024 * 1024
+
+
+class _YAMLBackend(NamedTuple):
+    """The YAML loader and dumper used by the config file layer."""
+
+    name: str
+    loader: Type[Any]
+    dumper: Type[Any]
+
+
+def _find_yaml_backend(yaml_module: ModuleType) -> _YAMLBackend:
+    """Returns the fastest YAML backend provided by `yaml_module`.
+
+    The C (i.e. libyaml) implementations are only available when PyYAML was
+    built against libyaml, so we fall back to the pure-python implementations
+    when they are missing.
     """
+    loader = getattr(yaml_module, "CSafeLoader", None)
+    dumper = getattr(yaml_module, "CSafeDumper", None)
+    if loader is not None and dumper is not None:
+        return _YAMLBackend("libyaml", loader, dumper)
+    else:
+        return _YAMLBackend(
+            "python", yaml_module.SafeLoader, yaml_module.SafeDumper
+        )
 
-    extensions = ["yml", "yaml"]
+
+@lru_cache(maxsize=None)
+def _get_yaml_backend() -> _YAMLBackend:
+    # NOTE: We defer importing the yaml module until it is actually needed.
+    import yaml
+
+    return _find_yaml_backend(yaml)
+
+
+def get_yaml_backend_name() -> str:
+    """Returns the name of the active YAML backend ("libyaml" or "python")."""
+    return _get_yaml_backend().name
+
+
+# Used to determine whether or not a file has changed since we last parsed it.
+# Tuple of the form: (st_mtime_ns, st_size, st_ino).
+FileSignature = Tuple[int, int, int]
+
+
+class _CachedDocument(NamedTuple):
+    signature: FileSignature
+    parse: Callable[[bytes], Any]
+    document: Any
+
+
+class DocumentCache:
+    """A process-wide cache of parsed config file documents.
+
+    Parsed documents are keyed by their file's absolute path and are only
+    reused if the file's mtime, size, and inode have not changed since the
+    document was parsed. When the total size of the cached files exceeds
+    `max_bytes`, the least recently used documents are evicted.
+
+    The documents returned by this cache are frozen (i.e. all dicts are
+    converted into read-only mappings, all lists are converted into tuples,
+    and all sets are converted into frozensets) so callers cannot corrupt
+    them. Use thaw() to get a mutable copy of a document.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._total_bytes = 0
+        self._cache: OrderedDict[str, _CachedDocument] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, parse: Callable[[bytes], Any]) -> Any:
+        """Returns the frozen, parsed contents of the file at `path`.
+
+        Args:
+            path: The path to the file that we want to parse.
+            parse: Used to parse the file's contents if we have not already
+              parsed this version of the file.
+
+        Raises:
+            FileNotFoundError: If `path` does NOT exist.
+            IsADirectoryError: If `path` is NOT a regular file.
+        """
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        if not stat.S_ISREG(st.st_mode):
+            raise IsADirectoryError(f"Not a regular file: {key}")
+
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        with self._lock:
+            cached = self._cache.get(key)
+            if (
+                cached is not None
+                and cached.signature == signature
+                and cached.parse is parse
+            ):
+                self._cache.move_to_end(key)
+                timings.count(timings.CACHE_HITS)
+                return cached.document
+
+        with timings.phase(timings.CONFIG_PARSING):
+            with open(key, "rb") as f:
+                data = f.read()
+            document = freeze(parse(data))
+        timings.count(timings.FILES_PARSED)
+        timings.count(timings.BYTES_PARSED, len(data))
+
+        with self._lock:
+            self._pop(key)
+            if st.st_size <= self.max_bytes:
+                self._cache[key] = _CachedDocument(signature, parse, document)
+                self._total_bytes += st.st_size
+                while self._total_bytes > self.max_bytes:
+                    self._pop(next(iter(self._cache)))
+
+        return document
+
+    def signature(self, path: PathLike) -> Optional[FileSignature]:
+        """Returns the signature of the cached document parsed from `path`.
+
+        A file's signature is a tuple of the form (mtime_ns, size, inode) that
+        describes the version of that file that was parsed. None is returned
+        if no document has been cached for `path`.
+        """
+        with self._lock:
+            cached = self._cache.get(os.path.abspath(path))
+            return None if cached is None else cached.signature
+
+    def invalidate(self, path: Path) -> None:
+        """Removes the document parsed from `path` from this cache."""
+        with self._lock:
+            self._pop(os.path.abspath(path))
+
+    def clear(self) -> None:
+        """Removes all documents from this cache."""
+        with self._lock:
+            self._cache.clear()
+            self._total_bytes = 0
+
+    def _pop(self, key: str) -> None:
+        cached = self._cache.pop(key, None)
+        if cached is not None:
+            self._total_bytes -= cached.signature[1]
+
+
+DOCUMENT_CACHE: Final = DocumentCache(_DOCUMENT_CACHE_MAX_BYTES)
+
+
+def atomic_write(
+    path: Path, data: str | bytes, *, fsync: bool = False
+) -> None:
+    """Atomically replaces the contents of the file at `path` with `data`.
+
+    The data is first written to a temporary file, which then replaces the
+    original file using os.replace(). If `path` is a symlink, the file that it
+    points to is replaced instead (so the symlink is preserved). The original
+    file's permissions (and, if we are allowed to, its owner) are preserved.
+
+    Args:
+        path: The file that we want to write to.
+        data: The file's new contents.
+        fsync: If set, we flush the new file (and its parent directory) to
+          disk before returning.
+    """
+    target = Path(os.path.realpath(path))
+    try:
+        target_stat: Optional[os.stat_result] = os.stat(target)
+    except FileNotFoundError:
+        target_stat = None
+
+    if target_stat is None:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    else:
+        mode = stat.S_IMODE(target_stat.st_mode)
+
+    fd, tmp_fname = tempfile.mkstemp(
+        dir=target.parent, prefix=f".{target.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        os.chmod(tmp_fname, mode)
+        if target_stat is not None:
+            _copy_owner(tmp_fname, target_stat)
+        os.replace(tmp_fname, target)
+    except BaseException:
+        if os.path.exists(tmp_fname):
+            os.unlink(tmp_fname)
+        raise
+
+    if fsync:
+        dir_fd = os.open(target.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _copy_owner(path: str, target_stat: os.stat_result) -> None:
+    """Gives the file at `path` the owner described by `target_stat`."""
+    if not hasattr(os, "chown"):  # pragma: no cover
+        return
+
+    path_stat = os.stat(path)
+    owner = (target_stat.st_uid, target_stat.st_gid)
+    if (path_stat.st_uid, path_stat.st_gid) == owner:
+        return
+
+    try:
+        os.chown(path, *owner)
+    except PermissionError:
+        # Only privileged users can give files away to other users, so this
+        # is the best that we can do.
+        pass
+
+
+def _new_yaml_line(key: str, value: Any) -> str:
+    return key + ': "' + str(value) + '"'
+
+
+def yaml_load(data: bytes | str) -> Any:
+    """Parses a YAML document using the active YAML backend."""
+    import yaml
+
+    return yaml.load(data, Loader=_get_yaml_backend().loader)
+
+
+def yaml_dump(obj: Any) -> str:
+    """Serializes `obj` to a YAML document using the active YAML backend."""
+    import yaml
+
+    result: str = yaml.dump(
+        obj, Dumper=_get_yaml_backend().dumper, allow_unicode=True
+    )
+    return result
+
+
+def freeze(obj: Any) -> Any:
+    """Returns a read-only (deep) copy of a parsed config document."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    elif isinstance(obj, list):
+        return tuple(freeze(v) for v in obj)
+    elif isinstance(obj, set):
+        return frozenset(freeze(v) for v in obj)
+    else:
+        return obj
+
+
+def thaw(obj: Any) -> Any:
+    """Returns a mutable (deep) copy of a document returned by freeze()."""
+    if isinstance(obj, Mapping):
+        return {k: thaw(v) for k, v in obj.items()}
+    elif isinstance(obj, tuple):
+        return [thaw(v) for v in obj]
+    elif isinstance(obj, frozenset):
+        return {thaw(v) for v in obj}
+    else:
+        return obj
+
+
+class ConfigDocument:
+    """A loaded (i.e. parsed) config file.
+
+    Objects of this type are returned by the ClackBulkConfigFile.load()
+    method and can be used to read many values from a config file without
+    needing to re-parse that file.
+    """
+
+    def __init__(self, config_file: Any, data: Mapping[str, Any]) -> None:
+        self.config_file = config_file
+        self._data = data
+
+    def __repr__(self) -> str:  # noqa: D105
+        return f"{self.__class__.__name__}({self.config_file!r})"
+
+    def __contains__(self, key: object) -> bool:
+        """True iff `key` is defined in this config document."""
+        return key in self._data
+
+    def get(self, key: str) -> Result[Any, ErisError]:
+        """Getter for values in this config document."""
+        try:
+            return Ok(thaw(self._data[key]))
+        except KeyError as e:
+            err: Err[Any, ErisError] = Err(
+                "The desired configuration key is not present in this config"
+                f" file: key={key} config_dict={thaw(self._data)}"
+                f" self={self}"
+            )
+            return err.chain(e)
+
+    def get_many(
+        self, keys: Iterable[str]
+    ) -> Result[Dict[str, Any], ErisError]:
+        """Getter for multiple values in this config document."""
+        result: Dict[str, Any] = {}
+        missing_keys = []
+        for key in keys:
+            if key in self._data:
+                result[key] = thaw(self._data[key])
+            else:
+                missing_keys.append(key)
+
+        if missing_keys:
+            return Err(
+                "The desired configuration keys are not present in this"
+                f" config file: missing_keys={missing_keys} self={self}"
+            )
+
+        return Ok(result)
+
+    def keys(self) -> List[str]:
+        """Returns all of the keys defined in this config document."""
+        return list(self._data)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Converts this config document into a dict."""
+        result: Dict[str, Any] = thaw(self._data)
+        return result
+
+
+class ConfigTransaction:
+    """Records the config file updates made inside of a transaction.
+
+    See ClackBulkConfigFile.transaction() for more information.
+    """
+
+    def __init__(self) -> None:
+        self.updates: Dict[str, Any] = {}
+
+    def set(self, key: str, value: Any) -> None:
+        """Schedules a config value update."""
+        self.updates[key] = value
+
+    def set_many(self, updates: Mapping[str, Any]) -> None:
+        """Schedules multiple config value updates."""
+        self.updates.update(updates)
+
+
+class ConfigFileBase(abc.ABC):
+    """Base class for clack's ClackConfigFile protocol implementations.
+
+    Subclasses only need to define the `extensions` class attribute and the
+    parse() and dump() static methods.
+    """
+
+    extensions: List[str] = []
 
     def __init__(self, path: PathLike) -> None:
         self.path = Path(path)
@@ -25,43 +406,73 @@ class YAMLConfigFile:
     def __repr__(self) -> str:  # noqa: D105
         return f"{self.__class__.__name__}({self.path})"
 
+    @staticmethod
+    @abc.abstractmethod
+    def parse(data: bytes) -> Any:
+        """Parses the contents of a config file of this type."""
+
+    @staticmethod
+    @abc.abstractmethod
+    def dump(config_dict: Dict[str, Any]) -> str | bytes:
+        """Serializes `config_dict` into a config file of this type."""
+
     def get(self, key: str) -> Result[Any, ErisError]:
         """Getter for values in this config file."""
-        if not self.path.is_file():
-            return Err(
-                "This clack configuration file does NOT exist yet:"
-                f" not_a_file={self.path}"
+        doc_result = self.load()
+        if isinstance(doc_result, Err):
+            err: Err[Any, ErisError] = Err(
+                "Unable to convert this config file into a dictionary."
             )
+            return err.chain(doc_result)
 
-        config_dict_result = self.to_dict()
-        if isinstance(config_dict_result, Err):
-            err: Err[Any, ErisError] = Err(
+        return doc_result.ok().get(key)
+
+    def get_many(
+        self, keys: Iterable[str]
+    ) -> Result[Dict[str, Any], ErisError]:
+        """Getter for multiple values in this config file.
+
+        This config file is parsed (at most) once, no matter how many keys
+        are requested.
+        """
+        doc_result = self.load()
+        if isinstance(doc_result, Err):
+            err: Err[Dict[str, Any], ErisError] = Err(
                 "Unable to convert this config file into a dictionary."
             )
-            return err.chain(config_dict_result)
+            return err.chain(doc_result)
 
-        config_dict = config_dict_result.ok()
-        try:
-            return Ok(config_dict[key])
-        except KeyError as e:
-            err = Err(
-                "The desired configuration key is not present in this config"
-                f" file: key={key} config_dict={config_dict} self={self}"
+        return doc_result.ok().get_many(keys)
+
+    def load(self) -> Result[ClackConfigDocument, ErisError]:
+        """Loads this config file into memory.
+
+        The returned document can be used to read any number of values from
+        this config file without re-parsing it.
+        """
+        frozen_dict_result = self._to_frozen_dict()
+        if isinstance(frozen_dict_result, Err):
+            err: Err[ClackConfigDocument, ErisError] = Err(
+                "Unable to load this config file."
             )
-            return err.chain(e)
+            return err.chain(frozen_dict_result)
+
+        return Ok(ConfigDocument(self, frozen_dict_result.ok()))
 
     @classmethod
-    def new(cls, path: PathLike, **kwargs: Any) -> YAMLConfigFile:
-        """Construct a new YAMLConfigFile object."""
+    def new(
+        cls: Type[_ConfigFile_T], path: PathLike, **kwargs: Any
+    ) -> _ConfigFile_T:
+        """Construct a new config file object."""
         config_dict = {**kwargs}
 
         path = Path(path)
         path.parent.mkdir(parents=True, exist_ok=True)
 
         # Initialize config file...
-        with path.open("w+") as f:
-            yaml.dump(config_dict, f, allow_unicode=True)
+        atomic_write(path, cls.dump(config_dict))
 
+        DOCUMENT_CACHE.invalidate(path)
         return cls(path)
 
     @return_lazy_result
@@ -69,6 +480,88 @@ class YAMLConfigFile:
         self, key: str, value: Any, *, allow_new: bool = False
     ) -> Result[Any, ErisError]:
         """Setter for values in this config file."""
+        old_values_result = self._set_many({key: value}, allow_new=allow_new)
+        if isinstance(old_values_result, Err):
+            err: Err[Any, ErisError] = Err(
+                f"Unable to set config value. key={key} self={self}"
+            )
+            return err.chain(old_values_result)
+
+        return Ok(old_values_result.ok()[key])
+
+    @return_lazy_result
+    def set_many(
+        self,
+        updates: Mapping[str, Any],
+        *,
+        allow_new: bool = False,
+        fsync: bool = False,
+    ) -> Result[Dict[str, Any], ErisError]:
+        """Setter for multiple values in this config file.
+
+        This config file is parsed (at most) once and is then written (at
+        most) once by atomically replacing it with a temporary file. If any
+        of the `updates` can NOT be applied, this config file is left
+        untouched.
+
+        Args:
+            updates: Maps config keys to their new values.
+            allow_new: Are we allowed to add new keys (or a new file)?
+            fsync: If set, we flush all changes to disk before returning.
+
+        Returns:
+            A dictionary that maps each key in `updates` to its old value (or
+            None if that key did NOT exist yet).
+        """
+        return self._set_many(updates, allow_new=allow_new, fsync=fsync)
+
+    @contextmanager
+    def transaction(
+        self, *, allow_new: bool = False, fsync: bool = False
+    ) -> Iterator[ConfigTransaction]:
+        """Batches all updates made inside this context into a single write.
+
+        Examples:
+            >>> import tempfile
+            >>> tmp_dir = tempfile.mkdtemp()
+            >>> cfg_file = YAMLConfigFile.new(tmp_dir + "/foo.yml", foo=1)
+            >>> with cfg_file.transaction(allow_new=True) as tx:
+            ...     tx.set("foo", 2)
+            ...     tx.set("bar", 3)
+            >>> cfg_file.get_many(["foo", "bar"]).unwrap()
+            {'foo': '2', 'bar': '3'}
+
+        Raises:
+            ErisError: If the batched updates could NOT be applied. The
+              config file is NOT modified if this happens. No updates are
+              applied if the body of the with-statement raises an exception.
+        """
+        tx = ConfigTransaction()
+        yield tx
+        if tx.updates:
+            self.set_many(
+                tx.updates, allow_new=allow_new, fsync=fsync
+            ).unwrap()
+
+    def to_dict(self) -> Result[dict[str, Any], ErisError]:
+        """Converts this configuration file into a dict."""
+        frozen_dict_result = self._to_frozen_dict()
+        if isinstance(frozen_dict_result, Err):
+            err: Err[dict[str, Any], ErisError] = Err(
+                "Unable to load this config file."
+            )
+            return err.chain(frozen_dict_result)
+
+        result: Dict[str, Any] = thaw(frozen_dict_result.ok())
+        return Ok(result)
+
+    def _set_many(
+        self,
+        updates: Mapping[str, Any],
+        *,
+        allow_new: bool,
+        fsync: bool = False,
+    ) -> Result[Dict[str, Any], ErisError]:
         if self.path.exists() and not self.path.is_file():
             return Err(
                 f"This config file is NOT a file?: not_a_file={self.path}"
@@ -76,51 +569,224 @@ class YAMLConfigFile:
 
         if not self.path.exists():
             if allow_new:
-                with self.path.open("w+") as f:
-                    yaml.dump({key: value}, f)
-                    return Ok(None)
+                atomic_write(self.path, self.dump(dict(updates)), fsync=fsync)
+                DOCUMENT_CACHE.invalidate(self.path)
+                return Ok({key: None for key in updates})
             else:
                 return Err(
                     "This clack configuration file does NOT exist yet:"
                     f" not_a_file={self.path}"
                 )
 
-        old_value_result = self.get(key)
-        old_value: Any
-        if isinstance(old_value_result, Err):
-            old_value = None
-        else:
-            old_value = old_value_result.ok()
+        frozen_dict_result = self._to_frozen_dict()
+        if isinstance(frozen_dict_result, Err):
+            err: Err[Dict[str, Any], ErisError] = Err(
+                f"Unable to load this config file. self={self}"
+            )
+            return err.chain(frozen_dict_result)
 
-        new_lines = []
-        new_line = key + ': "' + str(value) + '"'
-        found_key = False
-        for line in self.path.read_text().split("\n"):
-            line = line.rstrip()
-            if line.startswith(key + ":"):
-                found_key = True
-                new_lines.append(new_line)
-            else:
-                new_lines.append(line)
+        frozen_dict = frozen_dict_result.ok()
+        old_values = {key: thaw(frozen_dict.get(key)) for key in updates}
+        missing_keys = [key for key in updates if key not in frozen_dict]
+        if missing_keys and not allow_new:
+            return Err(
+                "The provided keys do not exist."
+                f" missing_keys={missing_keys} self={self}"
+            )
 
-        if not found_key:
-            if allow_new:
-                new_lines[-1] = new_line
-            else:
-                return Err(
-                    f"The provided key does not exist. key={key} self={self}"
-                )
+        new_data = self._apply_updates(frozen_dict, updates)
+        atomic_write(self.path, new_data, fsync=fsync)
+        DOCUMENT_CACHE.invalidate(self.path)
+        return Ok(old_values)
 
-        self.path.write_text("\n".join(new_lines))
-        return Ok(old_value)
+    def _apply_updates(
+        self, frozen_dict: Mapping[str, Any], updates: Mapping[str, Any]
+    ) -> str | bytes:
+        """Returns this config file's new contents (after `updates`)."""
+        config_dict: Dict[str, Any] = thaw(frozen_dict)
+        config_dict.update(updates)
+        return self.dump(config_dict)
 
-    def to_dict(self) -> Result[dict[str, Any], ErisError]:
-        """Converts this configuration file into a dict."""
-        if not self.path.is_file():
+    def _to_frozen_dict(self) -> Result[Mapping[str, Any], ErisError]:
+        """Returns a read-only view of this configuration file's contents."""
+        try:
+            result: Optional[Mapping[str, Any]] = DOCUMENT_CACHE.get(
+                self.path, self.parse
+            )
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
             return Err(
                 "This clack configuration file does NOT exist yet:"
                 f" not_a_file={self.path}"
             )
 
-        result: Dict[str, Any] = yaml.safe_load(self.path.read_bytes())
+        # NOTE: Empty config files are parsed as None.
+        if result is None:
+            result = MappingProxyType({})
         return Ok(result)
+
+
+class YAMLConfigFile(ConfigFileBase):
+    """A clack YAML configuration file.
+
+    This class is useful as a way to conveniently get/set configuration values
+    in/to your current application's config file.
+    """
+
+    extensions = ["yml", "yaml"]
+
+    @staticmethod
+    def parse(data: bytes) -> Any:
+        """Parses the contents of a YAML config file."""
+        return yaml_load(data)
+
+    @staticmethod
+    def dump(config_dict: Dict[str, Any]) -> str:
+        """Serializes `config_dict` into a YAML config file."""
+        return yaml_dump(config_dict)
+
+    def _apply_updates(
+        self, frozen_dict: Mapping[str, Any], updates: Mapping[str, Any]
+    ) -> str:
+        """Returns this config file's new contents (after `updates`).
+
+        We edit YAML config files line-by-line (instead of re-serializing
+        them) so that comments and formatting are preserved. If a key that
+        already exists can NOT be matched this way (e.g. it is quoted or
+        written in flow style), we fall back to re-serializing the file.
+        """
+        new_lines = []
+        found_keys = set()
+        for line in self.path.read_text().split("\n"):
+            line = line.rstrip()
+            line_key, sep, _ = line.partition(":")
+            if sep and line_key in updates:
+                found_keys.add(line_key)
+                new_lines.append(_new_yaml_line(line_key, updates[line_key]))
+            else:
+                new_lines.append(line)
+
+        if any(
+            key in frozen_dict and key not in found_keys for key in updates
+        ):
+            config_dict: Dict[str, Any] = thaw(frozen_dict)
+            config_dict.update(updates)
+            return self.dump(config_dict)
+
+        # Keep the trailing newline (if this file has one).
+        idx = len(new_lines) - 1 if new_lines[-1] == "" else len(new_lines)
+        for key in updates:
+            if key not in found_keys:
+                new_lines.insert(idx, _new_yaml_line(key, updates[key]))
+                idx += 1
+
+        return "\n".join(new_lines)
+
+
+class TOMLConfigFile(ConfigFileBase):
+    """A clack TOML configuration file.
+
+    Reading TOML config files requires python>=3.11 (or the 'tomli' package).
+    Writing TOML config files requires the 'tomli-w' package.
+    """
+
+    extensions = ["toml"]
+
+    @staticmethod
+    def parse(data: bytes) -> Any:
+        """Parses the contents of a TOML config file."""
+        if sys.version_info >= (3, 11):
+            import tomllib
+        else:
+            tomllib = _import_optional("tomli", "toml")
+
+        return tomllib.loads(data.decode())
+
+    @staticmethod
+    def dump(config_dict: Dict[str, Any]) -> str:
+        """Serializes `config_dict` into a TOML config file."""
+        tomli_w = _import_optional("tomli_w", "toml")
+        result: str = tomli_w.dumps(config_dict)
+        return result
+
+
+class JSONConfigFile(ConfigFileBase):
+    """A clack JSON configuration file."""
+
+    extensions = ["json"]
+
+    @staticmethod
+    def parse(data: bytes) -> Any:
+        """Parses the contents of a JSON config file."""
+        return json.loads(data)
+
+    @staticmethod
+    def dump(config_dict: Dict[str, Any]) -> str:
+        """Serializes `config_dict` into a JSON config file."""
+        return json.dumps(config_dict, indent=2) + "\n"
+
+
+class MsgpackConfigFile(ConfigFileBase):
+    """A clack msgpack (i.e. binary) configuration file.
+
+    Using msgpack config files requires the 'msgpack' package. This format is
+    intended for generated config files (since it is NOT human-readable).
+    """
+
+    extensions = ["msgpack"]
+
+    @staticmethod
+    def parse(data: bytes) -> Any:
+        """Parses the contents of a msgpack config file."""
+        msgpack = _import_optional("msgpack", "msgpack")
+        return msgpack.unpackb(data, raw=False)
+
+    @staticmethod
+    def dump(config_dict: Dict[str, Any]) -> bytes:
+        """Serializes `config_dict` into a msgpack config file."""
+        msgpack = _import_optional("msgpack", "msgpack")
+        result: bytes = msgpack.packb(config_dict, use_bin_type=True)
+        return result
+
+
+# All of the config file types that clack supports (in order of preference).
+CONFIG_FILE_TYPES: Final[Tuple[Type[ConfigFileBase], ...]] = (
+    YAMLConfigFile,
+    TOMLConfigFile,
+    JSONConfigFile,
+    MsgpackConfigFile,
+)
+
+
+def config_file_type_from_path(
+    path: PathLike,
+    config_file_types: Sequence[Type[ClackConfigFile]] = CONFIG_FILE_TYPES,
+) -> Type[ClackConfigFile]:
+    """Returns the config file type that should be used to parse `path`.
+
+    The config file type is chosen using `path`'s file extension. We fall back
+    to the first of `config_file_types` when no type matches this extension.
+    """
+    ext = Path(path).suffix[1:].lower()
+    for config_file_type in config_file_types:
+        if ext in config_file_type.extensions:
+            return config_file_type
+    return config_file_types[0]
+
+
+def config_file_from_path(path: PathLike) -> ClackConfigFile:
+    """Returns a config file object (of the appropriate type) for `path`.
+
+    This function is used as the `type` of the -c/--config option.
+    """
+    return config_file_type_from_path(path)(path)
+
+
+def _import_optional(module_name: str, extra: str) -> Any:
+    """Imports a module provided by one of clack's optional dependencies."""
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(
+            f"The '{module_name}' module is required to use this type of"
+            f" config file. Try installing 'bolton-clack[{extra}]'."
+        ) from e
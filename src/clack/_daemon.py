@@ -0,0 +1,360 @@
+"""The server side of clack's (opt-in) warm daemon mode.
+
+The server keeps a clack application imported (with its argv-independent state
+already computed) and listens on a Unix socket (see the `_daemon_client`
+module). Every request is handled by a forked child process, which adopts the
+client's CWD, environment, and stdio file descriptors before running the
+application. This means that config file discovery (which depends on the CWD
+and environment) behaves exactly as it would if the application were run by
+the client itself. The child process sends its PID to the client, which
+forwards the signals that it receives to this child process.
+
+The server re-executes itself whenever one of the application's source files
+changes or a distribution is installed into site-packages (see the
+SourceWatcher class). The listening socket is inherited by the new server
+process, so no pending requests are lost.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import select
+import signal
+import site
+import socket
+import sys
+import sysconfig
+import time
+from types import FrameType
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence
+
+from logrus import Logger
+
+from ._daemon_client import (
+    get_socket_path,
+    recv_request,
+    send_pid,
+    send_status,
+)
+from ._helpers import exit_status_from_system_exit
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    from ._main import ClackApp
+
+
+# Used to hand the listening socket over to a re-executed server process.
+_LISTEN_FD_ENVVAR = "CLACK_DAEMON_LISTEN_FD"
+
+logger = Logger(__name__)
+
+
+class SourceWatcher:
+    """Detects changes to the source files of the currently loaded modules.
+
+    Modules that belong to the standard library are NOT watched. The source
+    files of modules that were installed into site-packages are NOT watched
+    either. Instead, we watch the site-packages directories themselves, whose
+    mtimes change whenever a distribution is installed, upgraded, or removed
+    (since each of these operations adds or removes a dist-info directory).
+
+    Args:
+        extra_paths: Additional files to watch.
+        min_interval: The minimum time (in seconds) between two checks. If
+          changed() is called again before this much time has passed, the
+          result of the previous check is returned.
+    """
+
+    def __init__(
+        self, extra_paths: Iterable[Path] = (), *, min_interval: float = 0.5
+    ) -> None:
+        self._mtimes: Dict[str, Optional[int]] = {}
+        for path in [*_get_app_source_files(), *map(str, extra_paths)]:
+            self._mtimes[path] = _get_mtime_ns(path)
+
+        self._min_interval = min_interval
+        self._last_check = time.monotonic()
+        self._changed = False
+
+    @property
+    def paths(self) -> List[str]:
+        """The paths of every file (or directory) that we are watching."""
+        return list(self._mtimes)
+
+    def changed(self) -> bool:
+        """Has any watched source file changed since we started watching?"""
+        now = time.monotonic()
+        if self._changed or now - self._last_check < self._min_interval:
+            return self._changed
+
+        self._last_check = now
+        self._changed = any(
+            _get_mtime_ns(path) != mtime
+            for path, mtime in self._mtimes.items()
+        )
+        return self._changed
+
+
+def _get_app_source_files() -> List[str]:
+    paths = sysconfig.get_paths()
+    stdlib_dirs = tuple(
+        os.path.join(paths[key], "") for key in ["stdlib", "platstdlib"]
+    )
+    site_dirs = {
+        os.path.join(site_dir, "")
+        for site_dir in [
+            paths["purelib"],
+            paths["platlib"],
+            *site.getsitepackages(),
+            site.getusersitepackages(),
+        ]
+    }
+
+    result = []
+    loaded_site_dirs = set()
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path is None or not path.endswith(".py"):
+            continue
+
+        path = os.path.abspath(path)
+        site_dir = next((d for d in site_dirs if path.startswith(d)), None)
+        if site_dir is not None:
+            loaded_site_dirs.add(site_dir)
+        elif not path.startswith(stdlib_dirs):
+            result.append(path)
+
+    result.extend(sorted(d.rstrip(os.sep) for d in loaded_site_dirs))
+    return result
+
+
+def _get_mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def serve(
+    app: ClackApp,
+    *,
+    socket_path: Path = None,
+    poll_interval: float = 1.0,
+    watch: bool = True,
+) -> None:
+    """Serves `app` invocations over a Unix socket (forever).
+
+    Args:
+        app: The clack application that we will serve.
+        socket_path: The path of the Unix socket that we listen on. Defaults
+          to a path inside the XDG runtime directory.
+        poll_interval: How often (in seconds) we check whether any of the
+          application's source files have changed while we are idle.
+        watch: If set, this server re-executes itself whenever one of the
+          application's source files changes.
+    """
+    check_owner = socket_path is None
+    if socket_path is None:
+        socket_path = get_socket_path(app.app_name)
+
+    app.warm_up()
+    watcher = SourceWatcher() if watch else None
+    listener = _get_listener(socket_path, check_owner=check_owner)
+    signal.signal(signal.SIGTERM, _raise_system_exit)
+    logger.info(
+        "Serving clack application.",
+        app_name=app.app_name,
+        socket_path=str(socket_path),
+        pid=os.getpid(),
+    )
+
+    try:
+        while True:
+            _reap_children()
+
+            readable, _, _ = select.select([listener], [], [], poll_interval)
+            if watcher is not None and watcher.changed():
+                _restart(listener)
+
+            if readable:
+                conn, _ = listener.accept()
+                with conn:
+                    _handle_connection(app, listener, conn)
+    finally:
+        # NOTE: We only get here if this server is shutting down (i.e. NOT
+        # when this server is re-executed by _restart()).
+        listener.close()
+        socket_path.unlink(missing_ok=True)
+
+
+def _get_listener(socket_path: Path, *, check_owner: bool) -> socket.socket:
+    """Returns the socket that this server will listen on.
+
+    Args:
+        socket_path: The path of the Unix socket that we will listen on.
+        check_owner: If set, we make sure that the directory that contains
+          `socket_path` is owned by the current user.
+    """
+    if listen_fd := os.environ.pop(_LISTEN_FD_ENVVAR, None):
+        # We were re-executed by _restart(), so reuse our old socket.
+        listener = socket.socket(fileno=int(listen_fd))
+        os.set_inheritable(listener.fileno(), False)
+        return listener
+
+    socket_dir = socket_path.parent
+    socket_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if check_owner and socket_dir.stat().st_uid != os.getuid():
+        raise RuntimeError(
+            f"The {socket_dir} directory is owned by a different user."
+        )
+
+    if socket_path.exists():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(str(socket_path))
+            except OSError:
+                # This socket file was left behind by a dead server.
+                socket_path.unlink()
+            else:
+                raise RuntimeError(
+                    "Another server is already listening on this socket:"
+                    f" {socket_path}"
+                )
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(socket_path))
+    os.chmod(socket_path, 0o600)
+    listener.listen()
+    return listener
+
+
+def _restart(listener: socket.socket) -> None:
+    """Re-executes this server process (keeping our listening socket)."""
+    logger.info("Source file change detected. Restarting server...")
+    os.set_inheritable(listener.fileno(), True)
+    os.environ[_LISTEN_FD_ENVVAR] = str(listener.fileno())
+    # NOTE: sys.orig_argv is only available in python>=3.10.
+    orig_argv = getattr(sys, "orig_argv", [sys.executable, *sys.argv])
+    os.execv(sys.executable, [sys.executable, *orig_argv[1:]])
+
+
+def _handle_connection(
+    app: ClackApp, listener: socket.socket, conn: socket.socket
+) -> None:
+    """Forks a child process that serves a single client request."""
+    # Otherwise, any buffered output would be written by both processes.
+    for stream in [sys.stdout, sys.stderr]:
+        stream.flush()
+
+    pid = os.fork()
+    if pid != 0:
+        return
+
+    # ----- We are now in the child process...
+    status = 1
+    try:
+        listener.close()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        # NOTE: We raise SystemExit (instead of simply dying) so that the
+        # client still receives an exit status.
+        signal.signal(signal.SIGTERM, _raise_system_exit)
+        signal.signal(signal.SIGTSTP, signal.SIG_DFL)
+
+        request, fds = recv_request(conn)
+        _adopt_client_process_state(
+            request["argv"], request["cwd"], request["env"], fds
+        )
+        send_pid(conn, os.getpid())
+
+        try:
+            status = app(request["argv"])
+        except SystemExit as e:
+            status = exit_status_from_system_exit(e)
+    except BaseException:  # pragma: no cover
+        logger.exception("Unable to handle client request.")
+    finally:
+        try:
+            for stream in [sys.stdout, sys.stderr]:
+                stream.flush()
+            send_status(conn, status)
+        finally:
+            os._exit(status & 0xFF)
+
+
+def _adopt_client_process_state(
+    argv: Sequence[str], cwd: str, env: Dict[str, str], fds: Sequence[int]
+) -> None:
+    sys.argv = list(argv)
+    os.chdir(cwd)
+    os.environ.clear()
+    os.environ.update(env)
+
+    for target_fd, fd in enumerate(fds):
+        os.dup2(fd, target_fd)
+        os.close(fd)
+
+    # NOTE: The server's own sys.std* streams may NOT be backed by the stdio
+    # file descriptors (e.g. when these streams have been replaced), so we
+    # point these streams at the client's stdio file descriptors explicitly.
+    if len(fds) > 0:
+        sys.stdin = open(0, "r", closefd=False)
+    if len(fds) > 1:
+        sys.stdout = open(1, "w", closefd=False)
+    if len(fds) > 2:
+        sys.stderr = open(2, "w", buffering=1, closefd=False)
+
+
+def _raise_system_exit(signum: int, frame: Optional[FrameType]) -> None:
+    del frame
+    raise SystemExit(128 + signum)
+
+
+def _reap_children() -> None:
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+
+        if pid == 0:
+            return
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """The main() function of the `clack-serve` script."""
+    from ._main import add_app_argument, import_app
+
+    parser = argparse.ArgumentParser(
+        prog="clack-serve",
+        description=(
+            "Keeps a clack application resident and serves its invocations"
+            " (made using the `clack-client` script) over a Unix socket."
+        ),
+    )
+    add_app_argument(parser)
+    parser.add_argument(
+        "-s",
+        "--socket",
+        type=Path,
+        help=(
+            "The path of the Unix socket to listen on. Defaults to"
+            " $XDG_RUNTIME_DIR/clack/APP_NAME.sock."
+        ),
+    )
+    parser.add_argument(
+        "--no-watch",
+        dest="watch",
+        action="store_false",
+        help="Do NOT restart when the application's source files change.",
+    )
+    args = parser.parse_args(argv)
+
+    app = import_app(parser, args.app)
+
+    try:
+        serve(app, socket_path=args.socket, watch=args.watch)
+    except KeyboardInterrupt:
+        return 0
+    return 0  # pragma: no cover
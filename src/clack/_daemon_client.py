@@ -0,0 +1,205 @@
+"""The client side of clack's (opt-in) warm daemon mode.
+
+A clack application can be kept resident by running `ClackApp.serve()` (e.g.
+via the `clack-serve` script). The `clack-client` script then forwards its
+command-line arguments, CWD, environment, and stdio file descriptors to this
+server over a Unix socket and exits with the application's exit status.
+
+The server forks a child process per request and sends this child's PID back
+to the client. The client then forwards the SIGINT, SIGTERM, and SIGTSTP
+signals that it receives (e.g. when the user presses CTRL-C) to this child.
+
+NOTE: This module is imported by the `clack-client` script on every
+invocation, so it MUST only import modules from the standard library (and
+clack modules that do the same).
+"""
+
+from __future__ import annotations
+
+import array
+from contextlib import contextmanager
+import json
+import os
+from pathlib import Path
+import signal
+import socket
+import struct
+import sys
+from types import FrameType
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import xdg
+
+
+# Used to prefix every request with its length.
+_HEADER: struct.Struct = struct.Struct("!I")
+# The server's first response is the PID of the process that handles the
+# request. Its second response is the application's exit status.
+_PID: struct.Struct = struct.Struct("!i")
+_STATUS: struct.Struct = struct.Struct("!i")
+# The stdio file descriptors that are forwarded to the server.
+_STDIO_FDS = (0, 1, 2)
+# The maximum number of file descriptors that can be sent with a request.
+_MAX_FDS = len(_STDIO_FDS)
+# The signals that the client forwards to the process that handles its request.
+_FORWARDED_SIGNALS = (signal.SIGINT, signal.SIGTERM, signal.SIGTSTP)
+
+# The exit status used when the server can NOT be reached.
+EXIT_NO_SERVER = 75
+
+
+def get_socket_path(app_name: str) -> Path:
+    """Returns the path of the Unix socket used by `app_name`'s server."""
+    return xdg.get_base_dir("runtime") / "clack" / f"{app_name}.sock"
+
+
+def send_request(
+    sock: socket.socket,
+    request: Dict[str, Any],
+    fds: Sequence[int],
+) -> None:
+    """Sends a (JSON) request and file descriptors over `sock`."""
+    payload = json.dumps(request).encode()
+    data = _HEADER.pack(len(payload)) + payload
+    fd_array = array.array("i", fds)
+    sent = sock.sendmsg(
+        [data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fd_array)]
+    )
+    sock.sendall(data[sent:])
+
+
+def recv_request(sock: socket.socket) -> Tuple[Dict[str, Any], List[int]]:
+    """Receives a request (and its file descriptors) sent by send_request()."""
+    fd_array = array.array("i")
+    data, ancdata, _flags, _addr = sock.recvmsg(
+        _HEADER.size, socket.CMSG_SPACE(_MAX_FDS * fd_array.itemsize)
+    )
+    fds: List[int] = []
+    for level, kind, cmsg_data in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            usable_size = len(cmsg_data) - len(cmsg_data) % fd_array.itemsize
+            fd_array.frombytes(cmsg_data[:usable_size])
+            fds.extend(fd_array)
+
+    data += _recv_exactly(sock, _HEADER.size - len(data))
+    (size,) = _HEADER.unpack(data)
+    request: Dict[str, Any] = json.loads(_recv_exactly(sock, size))
+    return request, fds
+
+
+def send_pid(sock: socket.socket, pid: int) -> None:
+    """Sends the PID of the process that handles a request to the client."""
+    sock.sendall(_PID.pack(pid))
+
+
+def recv_pid(sock: socket.socket) -> int:
+    """Receives the PID sent by send_pid()."""
+    (pid,) = _PID.unpack(_recv_exactly(sock, _PID.size))
+    return int(pid)
+
+
+def send_status(sock: socket.socket, status: int) -> None:
+    """Sends the application's exit status back to the client."""
+    sock.sendall(_STATUS.pack(status))
+
+
+def recv_status(sock: socket.socket) -> int:
+    """Receives the exit status sent by send_status()."""
+    (status,) = _STATUS.unpack(_recv_exactly(sock, _STATUS.size))
+    return int(status)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise ConnectionError("The connection was closed unexpectedly.")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+@contextmanager
+def _forward_signals(pid: int) -> Iterator[None]:
+    """Forwards the signals that we receive to the process with PID `pid`.
+
+    When we receive SIGTSTP (e.g. because the user pressed CTRL-Z), we also
+    stop ourselves (so the shell regains control of the terminal) and then
+    resume the other process once we are continued (e.g. by `fg`).
+    """
+
+    def forward(signum: int, frame: Optional[FrameType]) -> None:
+        del frame
+        try:
+            os.kill(pid, signum)
+            if signum == signal.SIGTSTP:
+                os.kill(os.getpid(), signal.SIGSTOP)
+                os.kill(pid, signal.SIGCONT)
+        except ProcessLookupError:
+            # The other process has already exited.
+            pass
+
+    old_handlers = {
+        signum: signal.signal(signum, forward) for signum in _FORWARDED_SIGNALS
+    }
+    try:
+        yield
+    finally:
+        for signum, old_handler in old_handlers.items():
+            signal.signal(signum, old_handler)
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """The main() function of the `clack-client` script.
+
+    Usage: clack-client APP_NAME [ARG ...]
+
+    The socket path can be overridden using the CLACK_DAEMON_SOCKET
+    environment variable.
+    """
+    if argv is None:
+        argv = sys.argv
+
+    usage = f"usage: {os.path.basename(argv[0])} APP_NAME [ARG ...]"
+    if len(argv) < 2:
+        # NOTE: Like argparse, we print usage errors to stderr.
+        print(usage, file=sys.stderr)
+        return 2
+
+    if argv[1] in ["-h", "--help"]:
+        print(usage)
+        return 0
+
+    app_name, *app_args = argv[1:]
+    socket_path = os.environ.get(
+        "CLACK_DAEMON_SOCKET", str(get_socket_path(app_name))
+    )
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError as e:
+            print(
+                f"clack-client: unable to connect to the {app_name!r} server"
+                f" ({socket_path}): {e}. Is `clack-serve` running?",
+                file=sys.stderr,
+            )
+            return EXIT_NO_SERVER
+
+        request = {
+            "argv": [app_name, *app_args],
+            "cwd": os.getcwd(),
+            "env": dict(os.environ),
+        }
+        send_request(sock, request, _STDIO_FDS)
+        try:
+            server_pid = recv_pid(sock)
+            with _forward_signals(server_pid):
+                return recv_status(sock)
+        except KeyboardInterrupt:
+            return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
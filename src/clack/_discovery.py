@@ -0,0 +1,141 @@
+"""Contains helpers used to discover which config files exist on disk."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, Final, Literal, Optional
+
+
+_EntryKind = Literal["dir", "file", "other"]
+
+_DIR: Final = "dir"
+_FILE: Final = "file"
+_OTHER: Final = "other"
+
+# Stand-in for the listings of directories that we are not allowed to list.
+_UNLISTABLE: Final[Dict[str, _EntryKind]] = {}
+
+
+class DirectoryScanner:
+    """Answers "does this file exist?" questions using directory listings.
+
+    Instead of calling stat() on every candidate config file path, we list the
+    contents of each distinct candidate directory (at most) once using
+    os.scandir(). We also avoid listing directories that we already know do
+    NOT exist (e.g. because we have already listed their parent directory).
+
+    Attributes:
+        fs_calls: The number of filesystem calls that this scanner has made so
+          far. This can be used to keep an eye on our filesystem "probe
+          budget".
+        files_probed: The number of times that is_file() has been called.
+        dir_mtimes: If `record_mtimes` is set, this maps every directory that
+          this scanner has probed to its mtime (or None if it is missing).
+          Each directory is stat()-ed BEFORE it is listed, so any change made
+          to a directory after it was listed will change its mtime.
+        is_complete: False if this scanner has had to fall back to probing
+          files individually (i.e. `dir_mtimes` does NOT capture every
+          filesystem check that this scanner has made).
+    """
+
+    def __init__(self, *, record_mtimes: bool = False) -> None:
+        self.fs_calls = 0
+        self.files_probed = 0
+        self.dir_mtimes: Optional[Dict[Path, Optional[int]]] = (
+            {} if record_mtimes else None
+        )
+        self.is_complete = True
+        # Maps directories to their listings (or None if they do not exist).
+        self._listings: Dict[Path, Optional[Dict[str, _EntryKind]]] = {}
+
+    def is_file(self, path: Path) -> bool:
+        """Returns True iff `path` is an existing (regular) file."""
+        self.files_probed += 1
+        listing = self.listing(path.parent)
+        if listing is _UNLISTABLE:
+            self.fs_calls += 1
+            self.is_complete = False
+            return path.is_file()
+
+        return listing is not None and listing.get(path.name) == _FILE
+
+    def is_dir(self, path: Path) -> bool:
+        """Returns True iff `path` is an existing directory."""
+        return self.listing(path) is not None
+
+    def listing(self, directory: Path) -> Optional[Dict[str, _EntryKind]]:
+        """Returns the contents of `directory` (or None if it is missing).
+
+        The returned dictionary maps entry names to the kind of entry that
+        name refers to.
+        """
+        if directory in self._listings:
+            return self._listings[directory]
+
+        if not self._might_exist(directory):
+            self._listings[directory] = None
+            return None
+
+        if self.dir_mtimes is not None:
+            mtime_ns = _get_mtime_ns(directory)
+            self.fs_calls += 1
+            self.dir_mtimes[directory] = mtime_ns
+            if mtime_ns is None:
+                self._listings[directory] = None
+                return None
+
+        listing: Optional[Dict[str, _EntryKind]]
+        self.fs_calls += 1
+        try:
+            with os.scandir(directory) as entries:
+                listing = {entry.name: _entry_kind(entry) for entry in entries}
+        except (FileNotFoundError, NotADirectoryError):
+            listing = None
+        except PermissionError:
+            # We are not allowed to list this directory's contents, but we
+            # might still be allowed to access the files inside of it.
+            listing = _UNLISTABLE
+
+        self._listings[directory] = listing
+        return listing
+
+    def _might_exist(self, directory: Path) -> bool:
+        """Checks the listings we already have to see if `directory` exists.
+
+        Returns:
+            False if the listings we have already made prove that `directory`
+            does NOT exist. True otherwise.
+        """
+        parent = directory.parent
+        if parent == directory or parent not in self._listings:
+            return True
+
+        parent_listing = self._listings[parent]
+        if parent_listing is _UNLISTABLE:
+            return True
+
+        return (
+            parent_listing is not None
+            and parent_listing.get(directory.name) == _DIR
+        )
+
+
+def _get_mtime_ns(path: Path) -> Optional[int]:
+    """Returns the mtime of `path` (or None if `path` does NOT exist)."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def _entry_kind(entry: os.DirEntry) -> _EntryKind:
+    # NOTE: The DirEntry.is_*() methods only make a system call when the
+    # entry's type is not available from the directory listing itself (e.g.
+    # symlinks).
+    if entry.is_file():
+        return _FILE
+    elif entry.is_dir():
+        return _DIR
+    else:
+        return _OTHER
@@ -0,0 +1,134 @@
+"""Contains a persistent index that maps packages to their distributions.
+
+Figuring out which distribution provides a given top-level package requires
+us to read the 'top_level.txt' metadata file of every installed distribution.
+This module caches the results of that search on disk (keyed by the sys.path
+entries that were searched and their mtimes) so we only need to re-scan the
+sys.path entries that have changed since the last time we looked.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import sys
+from typing import Any, Dict, Final, Iterable, Optional, Tuple
+
+from logrus import Logger
+
+from . import xdg
+from ._config_file import atomic_write
+
+
+_INDEX_BASENAME: Final = "dist_index.json"
+_INDEX_VERSION: Final = 1
+
+logger = Logger(__name__)
+
+# Maps (index file, sys.path entries) keys to in-process package indexes.
+_INDEX_CACHE: Dict[Tuple[Path, Tuple[str, ...]], Dict[str, str]] = {}
+
+
+def get_dist_name(pkg_name: str) -> Optional[str]:
+    """Returns the name of the distribution that provides `pkg_name`.
+
+    Returns:
+        The PyPI distribution name, or None if not found.
+    """
+    index_file = get_index_file()
+    path_entries = tuple(sys.path)
+
+    key = (index_file, path_entries)
+    if key not in _INDEX_CACHE:
+        _INDEX_CACHE[key] = build_index(index_file, path_entries)
+
+    return _INDEX_CACHE[key].get(pkg_name)
+
+
+def get_index_file() -> Path:
+    """Returns the path to the on-disk distribution index."""
+    return xdg.get_full_dir("cache", "clack") / _INDEX_BASENAME
+
+
+def build_index(
+    index_file: Path, path_entries: Iterable[str]
+) -> Dict[str, str]:
+    """Builds a package index (i.e. a package->distribution name mapping).
+
+    Only the sys.path entries whose mtimes differ from those recorded in
+    `index_file` are re-scanned. The `index_file` is updated if any entries
+    needed to be re-scanned.
+    """
+    cached_entries = _read_index_file(index_file)
+
+    result: Dict[str, str] = {}
+    is_dirty = False
+    for path_entry in path_entries:
+        abs_entry = os.path.abspath(path_entry or os.curdir)
+        try:
+            mtime_ns = os.stat(abs_entry).st_mtime_ns
+        except OSError:
+            continue
+
+        cached_entry = cached_entries.get(abs_entry)
+        if cached_entry is None or cached_entry["mtime_ns"] != mtime_ns:
+            cached_entry = {
+                "mtime_ns": mtime_ns,
+                "packages": _scan_path_entry(abs_entry),
+            }
+            cached_entries[abs_entry] = cached_entry
+            is_dirty = True
+
+        # Distributions found in earlier sys.path entries take precedence.
+        for pkg_name, dist_name in cached_entry["packages"].items():
+            result.setdefault(pkg_name, dist_name)
+
+    if is_dirty:
+        _write_index_file(index_file, cached_entries)
+
+    return result
+
+
+def _scan_path_entry(path_entry: str) -> Dict[str, str]:
+    from importlib import metadata
+
+    result: Dict[str, str] = {}
+    for dist in metadata.distributions(path=[path_entry]):
+        module_names = dist.read_text("top_level.txt")
+        if module_names is None:
+            continue
+
+        dist_name = dist.metadata["Name"]
+        for module_name in module_names.splitlines():
+            result.setdefault(module_name, dist_name)
+    return result
+
+
+def _read_index_file(index_file: Path) -> Dict[str, Any]:
+    try:
+        index_dict = json.loads(index_file.read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+    if (
+        not isinstance(index_dict, dict)
+        or index_dict.get("version") != _INDEX_VERSION
+    ):
+        return {}
+
+    entries: Dict[str, Any] = index_dict.get("entries", {})
+    return entries
+
+
+def _write_index_file(index_file: Path, entries: Dict[str, Any]) -> None:
+    index_dict = {"version": _INDEX_VERSION, "entries": entries}
+    try:
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write(index_file, json.dumps(index_dict))
+    except OSError as e:
+        logger.debug(
+            "Unable to write distribution index to disk.",
+            index_file=index_file,
+            error=e,
+        )
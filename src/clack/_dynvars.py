@@ -2,16 +2,45 @@
 
 This module is a bit of a HACK, but is better than using mutable global
 variables IMO.
+
+The values set by clack_envvars_set() are stored in a context variable (see
+the `contextvars` module), so they are local to the current thread / asyncio
+task and are NOT visible to child processes. Use clack_envvars_export() to
+export these values to environment variables when a child process needs them.
+
+Worker threads (e.g. threads started by a runner via threading.Thread or a
+ThreadPoolExecutor) do NOT inherit the context of the thread that started
+them. Use bind_context() to pass the active clack context to these threads.
 """
 
 from __future__ import annotations
 
 import codecs
 from contextlib import contextmanager
+from contextvars import ContextVar
+import copy
+from enum import Enum
+from functools import lru_cache, wraps
 import os
-from pathlib import Path
+from pathlib import Path, PurePath
 import pickle
-from typing import Any, Final, Iterable, Iterator, Optional, Type
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Final,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
+from weakref import WeakKeyDictionary
 
 from .types import ClackConfig, Config_T
 
@@ -19,6 +48,45 @@ from .types import ClackConfig, Config_T
 _CODECS_ENCODING: Final = "base64"
 _NOT_SET: Final = "CLACK_ENVVAR_NOT_SET"
 
+_T = TypeVar("_T")
+
+
+class _ClackContext(NamedTuple):
+    """The dynamic variable values set by clack_envvars_set()."""
+
+    app_name: str
+    config_defaults: Mapping[str, Any]
+    config_file: Optional[Path]
+    cfg: Optional[ClackConfig]
+    # Only set when these variables were exported by a parent process.
+    exported_cfg_dict: Optional[Dict[str, Any]]
+    # Cache of the Config objects returned by get_config() (by Config type).
+    projections: Dict[Type[Any], Any]
+
+
+_CLACK_CONTEXT: ContextVar[Optional[_ClackContext]] = ContextVar(
+    "clack_context", default=None
+)
+
+# Caches the defaults of each Config type (see _cached_config_defaults()). This
+# cache does NOT keep Config types alive.
+_CONFIG_DEFAULTS_CACHE: WeakKeyDictionary[
+    Type[Any], Tuple[Mapping[str, Any], FrozenSet[str]]
+] = WeakKeyDictionary()
+# Default values of these types are never copied (see
+# _config_defaults_from_config_types()).
+_IMMUTABLE_TYPES: Final = (
+    type(None),
+    bool,
+    int,
+    float,
+    str,
+    bytes,
+    frozenset,
+    Enum,
+    PurePath,
+)
+
 
 @contextmanager
 def clack_envvars_set(
@@ -27,112 +95,287 @@ def clack_envvars_set(
     *,
     config_file: Path = None,
     cfg: ClackConfig = None,
+    export: bool = False,
 ) -> Iterator[None]:
-    """Context manager that sets temporary envvars.
+    """Context manager that sets clack's dynamic variables.
+
+    The following variables are set on __enter__ and reset on __exit__:
+        - CLACK_APP_NAME
+        - CLACK_CONFIG_DEFAULTS
+        - CLACK_CONFIG_DICT
+        - CLACK_CONFIG_FILE
+
+    Args:
+        app_name: The name of the current application.
+        config_types: All of the current application's Config types.
+        config_file: The config file specified on the command-line (if any).
+        cfg: The current application's Config object (if it exists yet).
+        export: If set, these variables will also be exported to environment
+          variables while in this context (see clack_envvars_export()).
+    """
+    config_defaults = _config_defaults_from_config_types(tuple(config_types))
+
+    context = _ClackContext(
+        app_name=app_name,
+        config_defaults=config_defaults,
+        config_file=config_file,
+        cfg=cfg,
+        exported_cfg_dict=None,
+        projections={},
+    )
+    token = _CLACK_CONTEXT.set(context)
+    try:
+        if export:
+            with clack_envvars_export():
+                yield
+        else:
+            yield
+    finally:
+        _CLACK_CONTEXT.reset(token)
+
+
+def bind_context(func: Callable[..., _T]) -> Callable[..., _T]:
+    """Binds `func` to the active clack context.
+
+    The returned function can be called from any thread (e.g. passed to
+    threading.Thread or ThreadPoolExecutor.submit()) and always runs `func`
+    in the clack context that was active when bind_context() was called.
+
+    Raises:
+        A RuntimeError if called outside of the context that
+        clack_envvars_set() creates.
+    """
+    context = _get_context("bind_context")
+
+    @wraps(func)
+    def bound_func(*args: Any, **kwargs: Any) -> _T:
+        token = _CLACK_CONTEXT.set(context)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _CLACK_CONTEXT.reset(token)
+
+    return bound_func
 
-    The following envvars are set on __enter__ and removed on __exit__:
+
+@contextmanager
+def clack_envvars_export() -> Iterator[None]:
+    """Exports the current clack context's variables to envvars.
+
+    This is only necessary when a child process (e.g. another python script)
+    needs to access these variables. The following envvars are set on
+    __enter__ and restored to their previous values on __exit__:
         - CLACK_APP_NAME
         - CLACK_CONFIG_DEFAULTS
         - CLACK_CONFIG_DICT
         - CLACK_CONFIG_FILE
+
+    Raises:
+        A RuntimeError if called outside of the context that
+        clack_envvars_set() creates.
     """
-    config_defaults = {}
+    from ._pydantic import config_to_dict
+
+    context = _get_context("clack_envvars_export")
+
+    if context.cfg is not None:
+        cfg_dict: Optional[Dict[str, Any]] = config_to_dict(context.cfg)
+    else:
+        cfg_dict = context.exported_cfg_dict
+
+    new_env = {
+        "CLACK_APP_NAME": context.app_name,
+        "CLACK_CONFIG_DEFAULTS": _encode(dict(context.config_defaults)),
+        "CLACK_CONFIG_DICT": (
+            _encode(cfg_dict) if cfg_dict is not None else _NOT_SET
+        ),
+        "CLACK_CONFIG_FILE": (
+            _NOT_SET
+            if context.config_file is None
+            else str(context.config_file)
+        ),
+    }
+    old_env = {key: os.environ.get(key) for key in new_env}
+
+    os.environ.update(new_env)
+    try:
+        yield
+    finally:
+        for key, old_value in old_env.items():
+            if old_value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = old_value
+
+
+def _config_defaults_from_config_types(
+    config_types: Tuple[Type[ClackConfig], ...],
+) -> Mapping[str, Any]:
+    """Returns a read-only snapshot of the defaults of ALL `config_types`.
+
+    The defaults of each Config type are only computed once (see
+    _cached_config_defaults()). Mutable default values (e.g. lists) are copied
+    into every new snapshot, so mutating a default value in one clack context
+    does NOT affect any other clack context.
+    """
+    config_defaults: Dict[str, Any] = {}
     for some_config_type in config_types:
-        some_config_defaults = _config_defaults_from_config_type(
+        some_config_defaults, mutable_keys = _cached_config_defaults(
             some_config_type
         )
         config_defaults.update(some_config_defaults)
+        for key in mutable_keys:
+            config_defaults[key] = copy.deepcopy(some_config_defaults[key])
+    return MappingProxyType(config_defaults)
 
-    os.environ["CLACK_APP_NAME"] = app_name
-    os.environ["CLACK_CONFIG_DEFAULTS"] = codecs.encode(
-        pickle.dumps(config_defaults), _CODECS_ENCODING
-    ).decode()
-    os.environ["CLACK_CONFIG_DICT"] = (
-        codecs.encode(pickle.dumps(cfg.dict()), _CODECS_ENCODING).decode()
-        if cfg is not None
-        else _NOT_SET
-    )
-    os.environ["CLACK_CONFIG_FILE"] = (
-        _NOT_SET if config_file is None else str(config_file)
-    )
 
-    yield
+def _cached_config_defaults(
+    config_type: Type[ClackConfig],
+) -> Tuple[Mapping[str, Any], FrozenSet[str]]:
+    """Returns the (cached) defaults of `config_type`.
 
-    del os.environ["CLACK_APP_NAME"]
-    del os.environ["CLACK_CONFIG_DEFAULTS"]
-    del os.environ["CLACK_CONFIG_DICT"]
-    del os.environ["CLACK_CONFIG_FILE"]
+    Returns:
+        A 2-tuple of the form (defaults, mutable_keys), where `mutable_keys`
+        contains the keys of every default value that might be mutable.
+    """
+    try:
+        return _CONFIG_DEFAULTS_CACHE[config_type]
+    except KeyError:
+        pass
+
+    defaults = _config_defaults_from_config_type(config_type)
+    mutable_keys = frozenset(
+        key
+        for key, value in defaults.items()
+        if not isinstance(value, _IMMUTABLE_TYPES)
+    )
+    result = (MappingProxyType(defaults), mutable_keys)
+    _CONFIG_DEFAULTS_CACHE[config_type] = result
+    return result
 
 
 def _config_defaults_from_config_type(
     config_type: Type[ClackConfig],
 ) -> dict[str, Any]:
-    result = {}
-    for key, value in config_type.__fields__.items():
-        if value.default is not None or value.allow_none:
-            result[key] = value.default
-    return result
+    from ._pydantic import get_field_defaults
+
+    return get_field_defaults(config_type)
 
 
 def get_app_name() -> str:
-    """Getter function for CLACK_APP_NAME envvar.
+    """Getter function for the CLACK_APP_NAME variable.
 
     Raises:
-        A RuntimeError if the CLACK_APP_NAME envvar is not defined.
+        A RuntimeError if the CLACK_APP_NAME variable is not defined.
     """
-    with _catch_key_error("get_app_name"):
-        return os.environ["CLACK_APP_NAME"]
+    return _get_context("get_app_name").app_name
 
 
-def get_config_defaults() -> dict[str, Any]:
-    """Getter function for CLACK_CONFIG_DEFAULTS envvar.
+def get_config_defaults() -> Mapping[str, Any]:
+    """Getter function for the CLACK_CONFIG_DEFAULTS variable.
 
     Raises:
-        A RuntimeError if the CLACK_CONFIG_DEFAULTS envvar is not defined.
+        A RuntimeError if the CLACK_CONFIG_DEFAULTS variable is not defined.
     """
-    with _catch_key_error("get_config_defaults"):
-        config_defaults_string = os.environ["CLACK_CONFIG_DEFAULTS"]
-
-    result: dict[str, Any] = pickle.loads(
-        codecs.decode(config_defaults_string.encode(), _CODECS_ENCODING)
-    )
-    return result
+    return _get_context("get_config_defaults").config_defaults
 
 
 def get_config_file() -> Optional[Path]:
-    """Getter function for CLACK_CONFIG_FILE envvar.
+    """Getter function for the CLACK_CONFIG_FILE variable.
 
     Raises:
-        A RuntimeError if the CLACK_CONFIG_FILE envvar is not defined.
+        A RuntimeError if the CLACK_CONFIG_FILE variable is not defined.
     """
-    with _catch_key_error("get_config_file"):
-        config_file = os.environ["CLACK_CONFIG_FILE"]
-
-    if config_file == _NOT_SET:
-        return None
-    else:
-        return Path(config_file)
+    return _get_context("get_config_file").config_file
 
 
 def get_config(cfg_type: Type[Config_T]) -> Optional[Config_T]:
     """Returns a clack configuration object of type `cfg_type`.
 
+    If the active Config object is an instance of `cfg_type`, it is returned
+    as is. Otherwise, a new `cfg_type` object is constructed from the active
+    Config object's values. This new object is cached, so it is only
+    constructed (and validated) once per clack context.
+
     WARNING: This function should probably only be used when there is no way to
     pass the config object directly to the calling function.
 
     Raises:
-        A RuntimeError if the CLACK_CONFIG_DICT envvar is not defined.
+        A RuntimeError if the CLACK_CONFIG_DICT variable is not defined.
     """
-    with _catch_key_error("get_config"):
-        clack_config_dict = os.environ["CLACK_CONFIG_DICT"]
+    context = _get_context("get_config")
+    if context.cfg is not None and isinstance(context.cfg, cfg_type):
+        return context.cfg
 
-    if clack_config_dict == _NOT_SET:
-        return None
+    if cfg_type in context.projections:
+        result: Config_T = context.projections[cfg_type]
+        return result
+
+    if context.cfg is not None:
+        from ._pydantic import config_to_dict
+
+        cfg_dict = config_to_dict(context.cfg)
+    elif context.exported_cfg_dict is not None:
+        cfg_dict = context.exported_cfg_dict
     else:
-        cfg_dict = pickle.loads(
-            codecs.decode(clack_config_dict.encode(), _CODECS_ENCODING)
+        return None
+
+    result = cfg_type(**cfg_dict)
+    context.projections[cfg_type] = result
+    return result
+
+
+def _get_context(func_name: str) -> _ClackContext:
+    """Returns the active clack context.
+
+    If clack_envvars_set() has not been called in this context, we fall back
+    to the envvars exported by clack_envvars_export() (e.g. by a parent
+    process).
+    """
+    context = _CLACK_CONTEXT.get()
+    if context is not None:
+        return context
+
+    with _catch_key_error(func_name):
+        return _context_from_envvars(
+            os.environ["CLACK_APP_NAME"],
+            os.environ["CLACK_CONFIG_DEFAULTS"],
+            os.environ["CLACK_CONFIG_DICT"],
+            os.environ["CLACK_CONFIG_FILE"],
         )
-        return cfg_type(**cfg_dict)
+
+
+@lru_cache(maxsize=8)
+def _context_from_envvars(
+    app_name: str,
+    config_defaults_string: str,
+    clack_config_dict: str,
+    config_file: str,
+) -> _ClackContext:
+    """Decodes the envvars exported by clack_envvars_export().
+
+    The result is cached so these envvars only need to be decoded once.
+    """
+    return _ClackContext(
+        app_name=app_name,
+        config_defaults=MappingProxyType(_decode(config_defaults_string)),
+        config_file=None if config_file == _NOT_SET else Path(config_file),
+        cfg=None,
+        exported_cfg_dict=(
+            None
+            if clack_config_dict == _NOT_SET
+            else _decode(clack_config_dict)
+        ),
+        projections={},
+    )
+
+
+def _encode(obj: Any) -> str:
+    return codecs.encode(pickle.dumps(obj), _CODECS_ENCODING).decode()
+
+
+def _decode(string: str) -> Any:
+    return pickle.loads(codecs.decode(string.encode(), _CODECS_ENCODING))
 
 
 @contextmanager
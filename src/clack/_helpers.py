@@ -3,10 +3,27 @@
 from __future__ import annotations
 
 import argparse
-from typing import Any, Callable, List, Mapping, MutableSequence
+import importlib
+import sys
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    MutableSequence,
+    Optional,
+    Tuple,
+    Type,
+    cast,
+)
 
-from ._parser import monkey_patch_parser
-from .types import ClackNewCommand, ClackRunner
+from ._parser import CommandBuilder, _LazySubParsersAction, monkey_patch_parser
+from .types import (
+    ClackConfig,
+    ClackNewCommand,
+    ClackRegisterRunner,
+    ClackRunner,
+)
 
 
 def new_command_factory(
@@ -27,7 +44,14 @@ def new_command_factory(
         description: This argument describes what the subcommand is used for.
         kwargs: These keyword arguments are relayed to the
           ``parser.add_subparsers()`` function call.
+
+    The returned `new_command()` function returns the new subcommand's parser.
+    If a `builder` function is given to `new_command()`, however, the
+    subcommand is registered lazily: its parser is only constructed (and then
+    passed to `builder`) if this subcommand is chosen on the command-line, and
+    `new_command()` returns None.
     """
+    kwargs.setdefault("action", _LazySubParsersAction)
     subparsers = parser.add_subparsers(
         dest=dest, required=required, description=description, **kwargs
     )
@@ -36,31 +60,148 @@ def new_command_factory(
         name: str,
         *,
         help: str,  # pylint: disable=redefined-builtin
+        builder: CommandBuilder = None,
         **inner_kwargs: Any,
-    ) -> argparse.ArgumentParser:
-        result: argparse.ArgumentParser = subparsers.add_parser(
-            name,
-            formatter_class=parser.formatter_class,
-            help=help,
-            description=help,
+    ) -> Optional[argparse.ArgumentParser]:
+        parser_kwargs: Dict[str, Any] = {
+            "formatter_class": parser.formatter_class,
+            "help": help,
+            "description": help,
             **inner_kwargs,
+        }
+        if builder is not None:
+            assert isinstance(subparsers, _LazySubParsersAction), (
+                "Lazy subcommands require the sub-parsers action to be a"
+                f" _LazySubParsersAction | action={type(subparsers)!r}"
+            )
+            subparsers.add_lazy_parser(name, builder, **parser_kwargs)
+            return None
+
+        result: argparse.ArgumentParser = subparsers.add_parser(
+            name, **parser_kwargs
         )
         monkey_patch_parser(result)
         return result
 
-    return new_command
+    return cast(ClackNewCommand, new_command)
 
 
 def register_runner_factory(
     mut_runner_registry: MutableSequence[ClackRunner],
-) -> Callable[[ClackRunner], ClackRunner]:
-    """Creates a decorator that can be used to register runner functions."""
+) -> ClackRegisterRunner:
+    """Creates a decorator that can be used to register runner functions.
+
+    The returned `register_runner()` function can also be used to register a
+    runner by its import path (e.g. "pkg.mod:run_foo"). In this case, the
+    sub-command that this runner handles and the import path of its Config
+    type (e.g. "pkg.mod:FooConfig") MUST also be given. The runner's module is
+    then only imported if its sub-command is chosen on the command-line (see
+    the LazyRunner class).
+    """
+
+    def register_runner(
+        runner: ClackRunner | str,
+        *,
+        command: str = None,
+        config: str | Type[ClackConfig] | None = None,
+    ) -> ClackRunner:
+        if isinstance(runner, str):
+            assert command is not None and config is not None, (
+                "Logic Error! The 'command' and 'config' keyword arguments"
+                " MUST be given when a runner is registered by its import"
+                f" path. | runner={runner!r}"
+            )
+            runner = LazyRunner(runner, command=command, config=config)
+        else:
+            assert command is None and config is None, (
+                "Logic Error! The 'command' and 'config' keyword arguments"
+                " can ONLY be given when a runner is registered by its import"
+                f" path. | runner={runner!r}"
+            )
 
-    def register_runner(runner: ClackRunner) -> ClackRunner:
         mut_runner_registry.append(runner)
         return runner
 
-    return register_runner
+    return cast(ClackRegisterRunner, register_runner)
+
+
+class LazyRunner:
+    """A runner function that is only imported when it is first used.
+
+    Args:
+        runner_path: The runner function's import path, which should be of the
+          form "package.module:function".
+        command: The sub-command that this runner handles.
+        config: The runner's Config type (or its import path).
+    """
+
+    def __init__(
+        self,
+        runner_path: str,
+        *,
+        command: str,
+        config: str | Type[ClackConfig],
+    ) -> None:
+        _split_import_path(runner_path)
+        if isinstance(config, str):
+            _split_import_path(config)
+
+        self.runner_path = runner_path
+        self.command = command
+        self._config = config
+        self._runner: Optional[ClackRunner] = None
+        self._config_type: Optional[Type[ClackConfig]] = None
+
+    def __repr__(self) -> str:
+        """Returns this runner's (unimported) import paths."""
+        return (
+            f"{type(self).__name__}({self.runner_path!r},"
+            f" command={self.command!r}, config={self._config!r})"
+        )
+
+    def __call__(self, cfg: Any) -> int:
+        """Imports the runner function (if necessary) and calls it."""
+        runner = self.runner
+        return runner(cfg)
+
+    @property
+    def runner(self) -> ClackRunner:
+        """The (imported) runner function."""
+        if self._runner is None:
+            self._runner = cast(
+                ClackRunner, _import_from_path(self.runner_path)
+            )
+        return self._runner
+
+    @property
+    def config_type(self) -> Type[ClackConfig]:
+        """The (imported) Config type used by this runner."""
+        if self._config_type is None:
+            if isinstance(self._config, str):
+                self._config_type = cast(
+                    Type[ClackConfig], _import_from_path(self._config)
+                )
+            else:
+                self._config_type = self._config
+        return self._config_type
+
+
+def _import_from_path(import_path: str) -> Any:
+    """Imports an object given its import path (e.g. "pkg.mod:Class.attr")."""
+    module_name, attr_path = _split_import_path(import_path)
+    result: Any = importlib.import_module(module_name)
+    for attr in attr_path.split("."):
+        result = getattr(result, attr)
+    return result
+
+
+def _split_import_path(import_path: str) -> Tuple[str, str]:
+    module_name, sep, attr_path = import_path.partition(":")
+    assert module_name and sep and attr_path, (
+        "Logic Error! Import paths MUST be of the form"
+        f' "package.module:attribute". | import_path={import_path!r}'
+    )
+    return module_name, attr_path
 
 
 def filter_cli_args(
@@ -73,6 +214,7 @@ def filter_cli_args(
     """
     from . import _dynvars as dyn
     from ._parser import ARGPARSE_ARGUMENT_DEFAULT
+    from ._profile import DEST as PROFILE_DEST
 
     if not isinstance(args, argparse.Namespace):
         kwargs = args
@@ -89,10 +231,29 @@ def filter_cli_args(
         if value is ARGPARSE_ARGUMENT_DEFAULT:
             continue
 
+        # The --profile option is handled by clack.ClackApp (NOT the config).
+        if key == PROFILE_DEST:
+            continue
+
         result[key] = value
     return result
 
 
+def exit_status_from_system_exit(e: SystemExit) -> int:
+    """Returns the exit status that the python interpreter would use for `e`.
+
+    Like the python interpreter, we print non-integer exit codes (e.g. error
+    messages) to stderr.
+    """
+    if e.code is None:
+        return 0
+    elif isinstance(e.code, int):
+        return e.code
+    else:
+        print(e.code, file=sys.stderr)
+        return 1
+
+
 class comma_list_or_file:
     """Namespace class for comma list CLI arguments.
 
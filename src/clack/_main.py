@@ -2,29 +2,51 @@
 
 from __future__ import annotations
 
+from contextlib import ExitStack
 from pathlib import Path
 import signal
 import sys
+import threading
 from typing import (
-    Any,
+    TYPE_CHECKING,
     Callable,
+    Dict,
     Final,
     Iterable,
+    Iterator,
     List,
+    Mapping,
+    NamedTuple,
     Optional,
     Sequence,
+    Tuple,
     Type,
     cast,
     get_type_hints,
     overload,
 )
 
-from logrus import Log, Logger, init_logging
+from logrus import BetterBoundLogger, Log, Logger, init_logging
 from typist import literal_to_list
 
-from . import _dynvars as dyn
-from ._helpers import filter_cli_args
-from .types import ClackConfig, ClackMain, ClackParser, ClackRunner
+from . import _dynvars as dyn, _timings as timings
+from ._helpers import LazyRunner, _import_from_path, filter_cli_args
+from ._parser import COMMAND_HOOK
+from ._profile import (
+    get_profile_from_argv,
+    get_requested_profile,
+    profiling,
+    requesting,
+)
+from ._pydantic import get_field_type, get_fields
+from .types import ClackConfig, ClackParser, ClackRunner
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    import argparse
+
+    from ._batch import BatchResult
+    from ._completion import Shell
 
 
 ASSERT_MAIN_FACTORY_PRECOND: Final = (
@@ -46,13 +68,13 @@ ASSERT_MAIN_RUNNERS_PRECOND: Final = (
 @overload
 def main_factory(  # noqa: E704
     app_name: str, run: ClackRunner
-) -> ClackMain: ...
+) -> ClackApp: ...
 
 
 @overload
 def main_factory(  # noqa: E704
     app_name: str, *, runners: Iterable[ClackRunner], parser: ClackParser
-) -> ClackMain: ...
+) -> ClackApp: ...
 
 
 def main_factory(
@@ -61,104 +83,373 @@ def main_factory(
     *,
     runners: Iterable[ClackRunner] = None,
     parser: ClackParser = None,
-) -> ClackMain:
+) -> ClackApp:
     """Factory used to create a new `main()` function.
 
     Returns:
-        A generic main() function to be used as a script's entry point.
+        A generic main() function (i.e. a callable ClackApp object) to be used
+        as a script's entry point.
+    """
+    return ClackApp(app_name, run, runners=runners, parser=parser)
+
+
+class ClackApp:
+    """A clack application that can be invoked many times in one process.
+
+    Everything that does NOT depend on the command-line arguments (e.g. the
+    index that maps sub-commands to runners) is computed once and reused by
+    every invocation. Calling a ClackApp object behaves exactly like calling
+    the main() function returned by main_factory(). The parse() and run()
+    methods are meant for long-lived processes that embed a clack
+    application. Neither of these methods touches `os.environ`.
+
+    Args:
+        app_name: The name of this application.
+        run: The runner function used by applications that do NOT use
+          sub-commands.
+        runners: The runner functions used by applications that use
+          sub-commands (one runner per sub-command).
+        parser: Parses the command-line arguments of applications that use
+          sub-commands.
     """
 
-    run_is_set = bool(run is not None)
-    kwargs_only = bool(runners is not None and parser is not None)
+    def __init__(
+        self,
+        app_name: str,
+        run: ClackRunner = None,
+        *,
+        runners: Iterable[ClackRunner] = None,
+        parser: ClackParser = None,
+    ) -> None:
+        run_is_set = bool(run is not None)
+        kwargs_only = bool(runners is not None and parser is not None)
+
+        assert run_is_set or kwargs_only, ASSERT_MAIN_FACTORY_PRECOND
+        assert not (run_is_set and kwargs_only), ASSERT_MAIN_FACTORY_PRECOND
+
+        self.app_name = app_name
+        self._run = run
+        self._runners = runners
+        self._parser = parser
+
+        # Maps each sub-command to its (Config type, runner) pair. This index
+        # is built (and validated) the first time that it is needed, since
+        # runners are often registered AFTER main_factory() is called. Since
+        # one ClackApp can be run by many threads at once, the index is only
+        # ever built (or extended) while holding its lock.
+        self._command_index: Optional[_CommandIndex] = None
+        self._command_index_lock = threading.Lock()
+        # The Config type used by the `run` runner (resolved on first use).
+        self._run_config_type: Optional[Type[ClackConfig]] = None
+        # The (logs, verbose) settings that logging was last initialized with.
+        self._logging_key: Optional[Tuple[Tuple[Log, ...], int]] = None
+        # Binding a logrus logger is relatively expensive, so we only create a
+        # new logger when logging is (re-)initialized.
+        self._logger: Optional[BetterBoundLogger] = None
+
+    def __call__(self, argv: Sequence[str] = None) -> int:
+        """Runs this application (like a script's main() function would)."""
+        if argv is None:  # pragma: no cover
+            argv = sys.argv
+
+        return self._invoke(self._call, argv, include_startup=True)
+
+    def _call(self, argv: Sequence[str]) -> int:
+        # We first initialize logging here with no config, so we can log
+        # messages in the clack parser.
+        verbose = 0
+        for opt_or_arg in argv:
+            if opt_or_arg.startswith("-v"):
+                verbose = opt_or_arg.count("v")
+                break
+
+        with timings.phase(timings.INIT_LOGGING):
+            init_logging(verbose=verbose)
+        self._logging_key = None
+
+        return self._parse_and_run(argv)
+
+    def batch(
+        self,
+        argvs: Iterable[Sequence[str]],
+        *,
+        jobs: int = None,
+        timeout: float = None,
+        ordered: bool = True,
+    ) -> Iterator[BatchResult]:
+        """Runs this application once per argv set using a process pool.
+
+        See the `_batch.run_batch()` function for more information.
+        """
+        from ._batch import run_batch
+
+        return run_batch(
+            self, argvs, jobs=jobs, timeout=timeout, ordered=ordered
+        )
+
+    def serve(
+        self,
+        *,
+        socket_path: Path = None,
+        poll_interval: float = 1.0,
+        watch: bool = True,
+    ) -> None:
+        """Serves this application's invocations over a Unix socket.
+
+        This method never returns. See the `_daemon.serve()` function for more
+        information.
+        """
+        from ._daemon import serve
+
+        serve(
+            self,
+            socket_path=socket_path,
+            poll_interval=poll_interval,
+            watch=watch,
+        )
+
+    def completion_script(
+        self,
+        shell: Shell = "bash",
+        *,
+        dynamic: Mapping[str, str] = None,
+        cache_minutes: int = 5,
+    ) -> str:
+        """Returns a static shell completion script for this application.
+
+        See the `_completion.completion_script()` function for more
+        information.
+        """
+        from ._completion import completion_script, with_app_parser
+
+        return with_app_parser(
+            self,
+            lambda parser: completion_script(
+                parser,
+                prog=self.app_name,
+                shell=shell,
+                dynamic=dynamic,
+                cache_minutes=cache_minutes,
+            ),
+        )
+
+    def warm_up(self) -> None:
+        """Computes everything that does NOT depend on argv ahead of time."""
+        if self._run is not None:
+            self._get_run_config_type()
+        else:
+            self._get_command_index()
+
+    def parse(self, argv: Sequence[str]) -> ClackConfig:
+        """Parses `argv` into this application's Config object.
+
+        Args:
+            argv: The command-line arguments (including the program name).
+        """
+        _, cfg = self._parse(argv)
+        return cfg
 
-    assert run_is_set or kwargs_only, ASSERT_MAIN_FACTORY_PRECOND
-    assert not (run_is_set and kwargs_only), ASSERT_MAIN_FACTORY_PRECOND
+    def run(self, argv: Sequence[str]) -> int:
+        """Runs this application with the command-line arguments `argv`.
+
+        Unlike __call__(), logging is only (re-)initialized when the logging
+        settings differ from those used by the previous invocation.
+
+        Args:
+            argv: The command-line arguments (including the program name).
+
+        Returns:
+            The exit status returned by this application's runner.
+        """
+        return self._invoke(self._parse_and_run, argv)
+
+    def _invoke(
+        self,
+        main: Callable[[Sequence[str]], int],
+        argv: Sequence[str],
+        *,
+        include_startup: bool = False,
+    ) -> int:
+        """Calls `main(argv)` with any instrumentation that `argv` requests.
+
+        See the --clack-timings and --profile options.
+        """
+        argv, timings_dest = timings.pop_option(argv)
+        with ExitStack() as stack:
+            if timings_dest is not None:
+                stack.enter_context(
+                    timings.recording(
+                        timings_dest,
+                        app_name=self.app_name,
+                        include_startup=include_startup,
+                    )
+                )
+
+            profile = get_profile_from_argv(argv, self.app_name)
+            stack.enter_context(requesting(profile))
+            stack.enter_context(profiling(profile, scope="main"))
+            return main(argv)
+
+    def _parse_and_run(self, argv: Sequence[str]) -> int:
+        runner, cfg = self._parse(argv)
+        return self._do_main_work(runner, cfg)
+
+    def _parse(self, argv: Sequence[str]) -> Tuple[ClackRunner, ClackConfig]:
+        if self._run is not None:
+            return self._parse_run(argv)
+        else:
+            return self._parse_runners(argv)
 
-    def main_run(argv: Sequence[str]) -> int:
-        assert run is not None
+    def _parse_run(
+        self, argv: Sequence[str]
+    ) -> Tuple[ClackRunner, ClackConfig]:
+        assert self._run is not None
 
         config_file = _get_config_file_from_argv(argv)
-        config_type = _get_run_cfg(run)
+        config_type = self._get_run_config_type()
         with dyn.clack_envvars_set(
-            app_name, [config_type], config_file=config_file
+            self.app_name, [config_type], config_file=config_file
         ):
             cfg = config_type.from_cli_args(argv)
 
-        return do_main_work(run, cfg)
-
-    def main_runners(argv: Sequence[str]) -> int:
-        assert runners is not None
-        assert parser is not None
+        return self._run, cfg
 
-        runner_list = list(runners)
-        all_config_types = _get_all_config_types(runner_list)
+    def _parse_runners(
+        self, argv: Sequence[str]
+    ) -> Tuple[ClackRunner, ClackConfig]:
+        assert self._parser is not None
 
+        # NOTE: The parser can only look up the defaults of a sub-command's
+        # Config type (e.g. to show them in its --help output) if this Config
+        # type has been imported BEFORE `argv` is parsed. When the parser
+        # chooses a sub-command whose (lazy) Config type is NOT known yet, we
+        # import this Config type and parse `argv` again.
+        index = self._get_command_index()
         config_file = _get_config_file_from_argv(argv)
+        while True:
+            try:
+                return self._parse_runners_with_index(index, argv, config_file)
+            except _NewConfigType as e:
+                index = self._get_command_index(e.config_type)
+
+    def _parse_runners_with_index(
+        self,
+        index: _CommandIndex,
+        argv: Sequence[str],
+        config_file: Optional[Path],
+    ) -> Tuple[ClackRunner, ClackConfig]:
+        assert self._parser is not None
+
         with dyn.clack_envvars_set(
-            app_name, all_config_types, config_file=config_file
+            self.app_name, index.config_types, config_file=config_file
         ):
-            parser_kwargs = parser(argv)
+            token = COMMAND_HOOK.set(index.check_command)
+            try:
+                parser_kwargs = self._parser(argv)
+            finally:
+                COMMAND_HOOK.reset(token)
 
-            config_type = _config_type_from_command(
-                all_config_types, parser_kwargs["command"]
-            )
+            config_type, runner = index.dispatch(parser_kwargs["command"])
 
             filtered_kwargs = filter_cli_args(parser_kwargs)
             cfg = config_type(**filtered_kwargs)
 
-        run = _main_runner_factory(runners)
-        return do_main_work(run, cfg)
+        return runner, cfg
+
+    def _get_run_config_type(self) -> Type[ClackConfig]:
+        assert self._run is not None
+
+        config_type = self._run_config_type
+        if config_type is None:
+            config_type = _get_run_cfg(self._run)
+            self._run_config_type = config_type
+        return config_type
+
+    def _get_command_index(
+        self, config_type: Type[ClackConfig] = None
+    ) -> _CommandIndex:
+        """Returns this application's (up-to-date) command index.
+
+        Args:
+            config_type: If given, the returned index's `config_types` will
+              also contain this (lazily imported) Config type.
+        """
+        assert self._runners is not None
 
-    def do_main_work(runner: ClackRunner, cfg: ClackConfig) -> int:
+        with self._command_index_lock:
+            runner_tuple = tuple(self._runners)
+            index = self._command_index
+            if index is None or index.runners != runner_tuple:
+                index = _CommandIndex.from_runners(runner_tuple)
+
+            if config_type is not None:
+                index = index.with_config_type(config_type)
+
+            self._command_index = index
+        return index
+
+    def _do_main_work(self, runner: ClackRunner, cfg: ClackConfig) -> int:
         verbose: int = getattr(cfg, "verbose", 0)
         logs: List[Log] = getattr(cfg, "logs", [])
 
-        init_logging(logs=logs, verbose=verbose)
+        logging_key = (tuple(logs), verbose)
+        if logging_key != self._logging_key or self._logger is None:
+            with timings.phase(timings.INIT_LOGGING):
+                init_logging(logs=logs, verbose=verbose)
+            self._logging_key = logging_key
+            self._logger = Logger("clack", app_name=self.app_name)
 
-        logger = Logger("clack", app_name=app_name, cfg=cfg)
+        logger = self._logger
 
         # The following log messages will obviously only be visible if the
         # corresponding log level really is enabled, but stating the obvious in
         # this case seemed like the right thing to do so ¯\_(ツ)_/¯.
-        logger.trace("TRACE level logging enabled.")
-        logger.debug("DEBUG level logging enabled.")
+        logger.trace("TRACE level logging enabled.", cfg=cfg)
+        logger.debug("DEBUG level logging enabled.", cfg=cfg)
 
         try:
-            with dyn.clack_envvars_set(app_name, [type(cfg)], cfg=cfg):
-                status = runner(cfg)
+            with dyn.clack_envvars_set(self.app_name, [type(cfg)], cfg=cfg):
+                with timings.phase(timings.RUNNER), profiling(
+                    get_requested_profile(), scope="runner"
+                ):
+                    status = runner(cfg)
         except KeyboardInterrupt:  # pragma: no cover
-            logger.info("Received SIGINT signal. Terminating script...")
+            logger.info(
+                "Received SIGINT signal. Terminating script...", cfg=cfg
+            )
             return 128 + signal.SIGINT.value
         except Exception:  # pragma: no cover
             logger.exception(
-                "An unrecoverable error has been raised. Terminating script..."
+                "An unrecoverable error has been raised. Terminating"
+                " script...",
+                cfg=cfg,
             )
             return 1
         else:
             return status
 
-    def wrap_main(outer_main: Callable[[Sequence[str]], int]) -> ClackMain:
-        def inner_main(argv: Sequence[str] = None) -> int:
-            if argv is None:  # pragma: no cover
-                argv = sys.argv
 
-            # We first initialize logging here with no config, so we can log
-            # messages in the clack parser.
-            verbose = 0
-            for opt_or_arg in argv:
-                if opt_or_arg.startswith("-v"):
-                    verbose = opt_or_arg.count("v")
-                    break
+def add_app_argument(parser: argparse.ArgumentParser) -> None:
+    """Adds the 'app' argument used by clack's scripts (e.g. clack-batch)."""
+    parser.add_argument(
+        "app",
+        help=(
+            "The import path of the clack application (i.e. the object"
+            " returned by clack.main_factory()), e.g. 'pkg.cli:main'."
+        ),
+    )
 
-            init_logging(verbose=verbose)
-            return outer_main(argv)
 
-        return inner_main
+def import_app(parser: argparse.ArgumentParser, import_path: str) -> ClackApp:
+    """Imports the clack application found at `import_path`.
 
-    if run is None:
-        return wrap_main(main_runners)
-    else:
-        return wrap_main(main_run)
+    Exits using parser.error() if `import_path` does NOT point to a clack
+    application (see add_app_argument()).
+    """
+    app = _import_from_path(import_path)
+    if not isinstance(app, ClackApp):
+        parser.error(f"{import_path!r} is not a clack application: {app!r}")
+    return app
 
 
 def _get_config_file_from_argv(argv: Sequence[str]) -> Optional[Path]:
@@ -178,19 +469,113 @@ def _get_config_file_from_argv(argv: Sequence[str]) -> Optional[Path]:
     return None
 
 
-def _main_runner_factory(runners: Iterable[ClackRunner]) -> ClackRunner:
-    def run(cfg: Any) -> int:
-        for run in runners:
-            run_config_type = _get_run_cfg(run)
-            if isinstance(cfg, run_config_type):
-                return run(cfg)
+class _CommandIndex(NamedTuple):
+    """Maps sub-commands to the Config types and runners that handle them.
 
-        return -1
+    The type hints of every runner are resolved exactly once: when the index
+    is built or, for runners that were registered by their import paths (see
+    LazyRunner), when their sub-command is first dispatched.
+    """
 
-    return run
+    runners: Tuple[ClackRunner, ...]
+    # The Config types whose defaults are used while parsing argv (i.e. the
+    # Config types of every runner that has already been imported).
+    config_types: Tuple[Type[ClackConfig], ...]
+    commands: Dict[str, Tuple[Type[ClackConfig], ClackRunner] | LazyRunner]
+
+    @classmethod
+    def from_runners(cls, runners: Tuple[ClackRunner, ...]) -> _CommandIndex:
+        """Builds (and validates) a new command index."""
+        config_types: List[Type[ClackConfig]] = []
+        commands: Dict[
+            str, Tuple[Type[ClackConfig], ClackRunner] | LazyRunner
+        ] = {}
+        for runner in runners:
+            # NOTE: The first runner registered for a command wins.
+            if isinstance(runner, LazyRunner):
+                commands.setdefault(runner.command, runner)
+                continue
+
+            config_type = _get_run_cfg(runner)
+            config_types.append(config_type)
+
+            command = _get_single_command(config_type)
+            commands.setdefault(command, (config_type, runner))
+
+        return cls(runners, tuple(config_types), commands)
+
+    def with_config_type(
+        self, config_type: Type[ClackConfig]
+    ) -> _CommandIndex:
+        """Returns a command index whose `config_types` has `config_type`."""
+        if config_type in self.config_types:
+            return self
+        return self._replace(config_types=(*self.config_types, config_type))
+
+    def check_command(self, choosen_command: str) -> None:
+        """Imports the lazy runner of the sub-command chosen by the parser.
+
+        This method is called (via COMMAND_HOOK) as soon as the parser chooses
+        a sub-command, i.e. after every option that precedes this sub-command
+        (and the values of these options) has been parsed.
+
+        Raises:
+            _NewConfigType: If the Config type of `choosen_command` is NOT in
+              `config_types` yet.
+        """
+        if choosen_command not in self.commands:
+            return
+
+        config_type, _ = self.dispatch(choosen_command)
+        if config_type not in self.config_types:
+            raise _NewConfigType(config_type)
+
+    def dispatch(
+        self, choosen_command: str
+    ) -> Tuple[Type[ClackConfig], ClackRunner]:
+        """Returns the Config type and runner used by `choosen_command`."""
+        try:
+            entry = self.commands[choosen_command]
+        except KeyError as e:
+            raise AssertionError(
+                "Logic Error! None of the given Config types seem to match the"
+                f" choosen sub-command. | {ASSERT_MAIN_RUNNERS_PRECOND} |"
+                f" choosen_command={choosen_command}"
+                f" commands={self.commands!r}"
+            ) from e
+
+        if not isinstance(entry, LazyRunner):
+            return entry
+
+        config_type = entry.config_type
+        command = _get_single_command(config_type)
+        assert command == choosen_command, (
+            "Logic Error! The Config type of a lazily registered runner does"
+            " NOT match the sub-command that this runner was registered with."
+            f" | runner={entry!r} config_command={command!r}"
+        )
+
+        result = (config_type, entry.runner)
+        self.commands[choosen_command] = result
+        return result
+
+
+class _NewConfigType(BaseException):
+    """Raised when the parser chooses a sub-command whose Config type is new.
+
+    NOTE: This is a BaseException so it is NOT swallowed by any `except
+    Exception` clauses in the application's parsing code.
+    """
+
+    def __init__(self, config_type: Type[ClackConfig]) -> None:
+        super().__init__(config_type)
+        self.config_type = config_type
 
 
 def _get_run_cfg(run: ClackRunner) -> Type[ClackConfig]:
+    # NOTE: Evaluating the (stringified) annotations of a runner is relatively
+    # expensive, so callers should only do this once per runner (e.g. when
+    # building a _CommandIndex).
     run_hints = get_type_hints(run)
     try:
         cfg: Type[ClackConfig] = run_hints["cfg"]
@@ -201,52 +586,28 @@ def _get_run_cfg(run: ClackRunner) -> Type[ClackConfig]:
         ) from e
 
 
-def _config_type_from_command(
-    all_config_types: Iterable[Type[ClackConfig]],
-    choosen_command: str,
-) -> Type[ClackConfig]:
-    config_type_to_command = {}
-    for some_config_type in all_config_types:
-        some_command = _get_single_command(some_config_type)
-        config_type_to_command[some_config_type] = some_command
-        if some_command == choosen_command:
-            return some_config_type
-
-    raise AssertionError(
-        "Logic Error! None of the given Config types seem to match the"
-        f" choosen sub-command. | {ASSERT_MAIN_RUNNERS_PRECOND} |"
-        f" choosen_command={choosen_command}"
-        f" config_type_to_command={config_type_to_command!r}"
-    )
-
-
-def _get_all_commands(config_type: Type[ClackConfig]) -> List[str]:
-    config_type_hints = get_type_hints(config_type)
+def _get_all_commands(config_type: Type[ClackConfig]) -> Tuple[str, ...]:
+    # NOTE: Pydantic has already resolved the types of every field, which is
+    # MUCH cheaper than calling get_type_hints() on the Config type (this
+    # evaluates the annotations of every class in the Config type's MRO).
+    fields = get_fields(config_type)
     try:
-        command_type = config_type_hints["command"]
+        if "command" in fields:
+            command_type = get_field_type(fields["command"])
+        else:
+            command_type = get_type_hints(config_type)["command"]
     except KeyError as e:
         raise AssertionError(
             "Logic Error! When using sub-commands in your CLI interface with"
             " clack, ALL Config classes MUST have a 'command' attribute!"
         ) from e
 
-    result = cast(List[str], literal_to_list(command_type))
-    return result
+    return tuple(cast(List[str], literal_to_list(command_type)))
 
 
 def _get_single_command(config_type: Type[ClackConfig]) -> str:
     all_commands = _get_all_commands(config_type)
     assert len(all_commands) == 1, (
-        ASSERT_MAIN_RUNNERS_PRECOND + f" | {all_commands!r}"
+        ASSERT_MAIN_RUNNERS_PRECOND + f" | {list(all_commands)!r}"
     )
     return all_commands[0]
-
-
-def _get_all_config_types(
-    runners: Iterable[ClackRunner],
-) -> List[Type[ClackConfig]]:
-    result: List[Type[ClackConfig]] = []
-    for runner in runners:
-        config_type = _get_run_cfg(runner)
-        result.append(config_type)
-    return result
@@ -3,123 +3,340 @@
 from __future__ import annotations
 
 import argparse
-from importlib.metadata import (
-    PackageNotFoundError,
-    distribution as get_dist_from_name,
-    distributions as get_all_dists,
-    version as get_version,
-)
-import inspect
+from contextvars import ContextVar
+from functools import lru_cache, partial
+import importlib
 import os
 from pathlib import Path
 import re
 import sys
-from types import ModuleType
+from types import FrameType, ModuleType
 from typing import (
     Any,
     Callable,
+    Dict,
     Iterable,
+    Iterator,
     List,
     Mapping,
+    NamedTuple,
     Optional,
     Sequence,
+    Tuple,
     cast,
 )
 
 from logrus import Log, LogFormat, Logger, LogLevel, get_default_logfile
 from typist import literal_to_list
 
-from . import _dynvars as dyn
-from ._config_file import YAMLConfigFile
+from . import _dynvars as dyn, _profile as profile, _timings as timings
+from ._config_file import config_file_from_path
+from ._dist_index import get_dist_name
 
 
 ARGPARSE_ARGUMENT_DEFAULT = object()
 
 logger = Logger(__name__)
 
+# If set, this hook is called with every parser that clack.Parser() creates
+# (see _completion.with_app_parser()).
+NEW_PARSER_HOOK: ContextVar[
+    Optional[Callable[[argparse.ArgumentParser], None]]
+] = ContextVar("clack_new_parser_hook", default=None)
+# If set, this hook is called with every sub-command that a clack sub-parsers
+# action chooses, BEFORE this sub-command's parser is built (see
+# ClackApp._parse_runners()).
+COMMAND_HOOK: ContextVar[Optional[Callable[[str], None]]] = ContextVar(
+    "clack_command_hook", default=None
+)
+
 
-def Parser(*args: Any, **kwargs: Any) -> argparse.ArgumentParser:
-    """Wrapper for argparse.ArgumentParser."""
+def Parser(
+    *args: Any,
+    module: ModuleType | str | None = None,
+    executable: str = None,
+    **kwargs: Any,
+) -> argparse.ArgumentParser:
+    """Wrapper for argparse.ArgumentParser.
 
+    Args:
+        args: These arguments are relayed to ``argparse.ArgumentParser()``.
+        module: The module (or name of the module) that this parser belongs
+          to. This module's docstring is used as the default description and
+          its distribution is used to build the --version banner. Defaults to
+          the module of whatever function called clack.Parser().
+        executable: The path to the script that is running this application,
+          which is mentioned in the --version banner. Defaults to the
+          filename of the first executable file in the call stack.
+        kwargs: These keyword arguments are relayed to
+          ``argparse.ArgumentParser()``.
+    """
     app_name = dyn.get_app_name()
 
-    stack = list(inspect.stack())
-    stack.pop(0)
-    frame = stack.pop(0).frame
+    # NOTE: We only inspect the call stack when the caller has not provided
+    # all of the information we would otherwise use the call stack for.
+    if module is None or executable is None:
+        caller = _Caller(sys._getframe(1))
+    else:
+        caller = None
+
+    if module is None:
+        assert caller is not None
+        caller_globals = caller.module_globals
+    else:
+        if isinstance(module, str):
+            module = importlib.import_module(module)
+        caller_globals = vars(module)
+
+    # NOTE: Walking the frames above our caller is deferred until --version
+    # is specified (by handing the version action a thunk instead of a list).
+    if executable is None:
+        assert caller is not None
+        get_outer_files: Callable[[], Iterable[str]] = caller.iter_outer_files
+    else:
+        get_outer_files = partial(list, [executable])
 
     if kwargs.get("description") is None:
         try:
-            kwargs["description"] = frame.f_globals["__doc__"]
+            kwargs["description"] = caller_globals["__doc__"]
         except KeyError:
             pass
 
     if kwargs.get("formatter_class") is None:
         kwargs["formatter_class"] = _HelpFormatter
 
+    with timings.phase(timings.PARSER):
+        valid_log_levels, valid_log_formats = (
+            _get_valid_log_levels_and_formats()
+        )
+
+        parser = argparse.ArgumentParser(*args, **kwargs)
+        monkey_patch_parser(parser)
+
+        parser.add_argument(
+            "-c",
+            "--config",
+            dest="config_file",
+            type=config_file_from_path,
+            help=(
+                "Absolute or relative path to a config file (e.g. a YAML,"
+                " TOML, JSON, or msgpack file) that contains this"
+                " application's configuration. The file's format is chosen"
+                " using its file extension."
+            ),
+        )
+        parser.add_argument(
+            "-L",
+            "--log",
+            metavar="FILE[:LEVEL][@FORMAT]",
+            dest="logs",
+            action="append",
+            nargs="?",
+            const="+",
+            type=_log_type_factory(app_name),
+            help=(
+                "This option can be used to enable a new logging handler."
+                " FILE should be either a path to a logfile or one of the"
+                " following special file types: [1] 'stderr' to log to"
+                " standard error (enabled by default), [2] 'stdout' to log to"
+                " standard out, [3] 'null' to disable all console (e.g."
+                " stderr) handlers, or [4] '+[NAME]' to choose a default"
+                " logfile path (where NAME is an optional basename for the"
+                " logfile). LEVEL can be any valid log level (i.e. one of"
+                f" {valid_log_levels}) and FORMAT can be any valid log format"
+                f" (i.e. one of {valid_log_formats}). NOTE: This option can be"
+                " specified multiple times and has a default argument of"
+                " %(const)r."
+            ),
+        )
+        parser.add_argument(
+            profile.OPTION,
+            metavar="FILE[@SCOPE]",
+            dest=profile.DEST,
+            default=argparse.SUPPRESS,
+            type=_profile_type_factory(app_name),
+            help=(
+                "Profile this application (using cProfile) and write the"
+                " profile to FILE. The profile is written in the pstats format"
+                " unless FILE ends with '.folded', '.collapsed', or '.txt', in"
+                " which case collapsed stacks (e.g. for flamegraph.pl) are"
+                " written. FILE can also be of the form '+[NAME]' to write the"
+                " profile next to the default logfile location. SCOPE can be"
+                " either 'runner' (the default) to only profile the runner or"
+                " 'main' to profile the entire invocation (e.g. including"
+                " argument parsing and config discovery)."
+            ),
+        )
+        parser.add_argument(
+            "-v",
+            "--verbose",
+            action="count",
+            help=(
+                "How verbose should the output be? This option can be"
+                " specified multiple times (e.g. -v, -vv, -vvv, ...)."
+            ),
+        )
+
+        parser.add_argument(
+            "--version",
+            action=_VersionAction,
+            caller_name=caller_globals.get("__name__"),
+            caller_package=caller_globals.get("__package__"),
+            caller_file=caller_globals.get("__file__"),
+            get_outer_files=get_outer_files,
+        )
+        parser.add_argument(
+            timings.OPTION,
+            action=_AttachedValueAction,
+            metavar="FILE",
+            dest="clack_timings",
+            nargs="?",
+            const="-",
+            default=argparse.SUPPRESS,
+            help=(
+                "Report how long each phase of this invocation took (e.g."
+                " config discovery, config validation, and the application's"
+                " own work). The report is written to FILE as JSON or to"
+                " stderr if FILE is omitted. NOTE: FILE MUST be attached to"
+                f" this option using '=' (e.g. {timings.OPTION}=timings.json),"
+                " since the argument that follows this option is never used"
+                " as FILE."
+            ),
+        )
+
+    if timings.get_recorder() is not None:
+        _time_parse_known_args(parser)
+
+    if (new_parser_hook := NEW_PARSER_HOOK.get()) is not None:
+        new_parser_hook(parser)
+
+    return parser
+
+
+def _time_parse_known_args(parser: argparse.ArgumentParser) -> None:
+    """Adds the time spent parsing arguments to the parse_args() phase."""
+    parse_known_args = parser.parse_known_args
+
+    def timed_parse_known_args(*args: Any, **kwargs: Any) -> Any:
+        with timings.phase(timings.PARSE_ARGS):
+            return parse_known_args(*args, **kwargs)
+
+    parser.parse_known_args = timed_parse_known_args  # type: ignore[method-assign]
+
+
+@lru_cache(maxsize=None)
+def _get_valid_log_levels_and_formats() -> Tuple[List[str], List[str]]:
     valid_log_levels = sorted(cast(List[str], literal_to_list(LogLevel)))
     valid_log_formats = sorted(cast(List[str], literal_to_list(LogFormat)))
+    return valid_log_levels, valid_log_formats
 
-    parser = argparse.ArgumentParser(*args, **kwargs)
-    monkey_patch_parser(parser)
-
-    parser.add_argument(
-        "-c",
-        "--config",
-        dest="config_file",
-        type=YAMLConfigFile,
-        help=(
-            "Absolute or relative path to a YAML file that contains this"
-            " application's configuration."
-        ),
-    )
-    parser.add_argument(
-        "-L",
-        "--log",
-        metavar="FILE[:LEVEL][@FORMAT]",
-        dest="logs",
-        action="append",
-        nargs="?",
-        const="+",
-        type=_log_type_factory(app_name),
-        help=(
-            "This option can be used to enable a new logging handler. FILE"
-            " should be either a path to a logfile or one of the following"
-            " special file types: [1] 'stderr' to log to standard error"
-            " (enabled by default), [2] 'stdout' to log to standard out, [3]"
-            " 'null' to disable all console (e.g. stderr) handlers, or [4]"
-            " '+[NAME]' to choose a default logfile path (where NAME is an"
-            " optional basename for the logfile). LEVEL can be any valid log"
-            f" level (i.e. one of {valid_log_levels}) and FORMAT can be any"
-            f" valid log format (i.e. one of {valid_log_formats}). NOTE: This"
-            " option can be specified multiple times and has a default"
-            " argument of %(const)r."
-        ),
-    )
-    parser.add_argument(
-        "-v",
-        "--verbose",
-        action="count",
-        help=(
-            "How verbose should the output be? This option can be specified"
-            " multiple times (e.g. -v, -vv, -vvv, ...)."
+
+class _Caller:
+    """Describes the function that called clack.Parser().
+
+    Unlike inspect.stack(), this class never loads any source code and only
+    walks the frames above the caller if we actually need to.
+    """
+
+    def __init__(self, frame: FrameType) -> None:
+        self.frame = frame
+
+    @property
+    def module_globals(self) -> Mapping[str, Any]:
+        """The global namespace of the caller's module."""
+        return self.frame.f_globals
+
+    def iter_outer_files(self) -> Iterator[str]:
+        """Yields the filenames of every frame above the caller's frame."""
+        outer_frame = self.frame.f_back
+        while outer_frame is not None:
+            yield outer_frame.f_code.co_filename
+            outer_frame = outer_frame.f_back
+
+
+class _VersionAction(argparse.Action):
+    """Lazy alternative to argparse's builtin 'version' action.
+
+    Computing the version banner requires us to search through the metadata of
+    every installed distribution, which is too expensive to do every time
+    clack.Parser() is called. We instead record a few cheap identifiers at
+    construction time and only build the banner if --version is actually
+    specified on the command-line.
+    """
+
+    def __init__(
+        self,
+        option_strings: Sequence[str],
+        *,
+        caller_name: str | None,
+        caller_package: str | None,
+        caller_file: str | None,
+        get_outer_files: Callable[[], Iterable[str]],
+        dest: str = argparse.SUPPRESS,
+        default: Any = argparse.SUPPRESS,
+        help: str = (  # pylint: disable=redefined-builtin
+            "show program's version number and exit"
         ),
-    )
+    ) -> None:
+        super().__init__(
+            option_strings=option_strings,
+            dest=dest,
+            default=default,
+            nargs=0,
+            help=help,
+        )
+        self.caller_name = caller_name
+        self.caller_package = caller_package
+        self.caller_file = caller_file
+        self.get_outer_files = get_outer_files
+
+    def __call__(
+        self,
+        parser: argparse.ArgumentParser,
+        namespace: argparse.Namespace,
+        values: Any,
+        option_string: str = None,
+    ) -> None:
+        with timings.phase(timings.VERSION):
+            version = self.get_version()
+        if version is None:
+            parser.exit(
+                1,
+                f"{parser.prog}: error: unable to determine the version of"
+                " this application\n",
+            )
+
+        formatter = parser._get_formatter()
+        formatter.add_text(version)
+        parser._print_message(formatter.format_help(), sys.stdout)
+        parser.exit()
+
+    def get_version(self) -> str | None:
+        """Returns the full version banner (or None if we can't find it)."""
+        from importlib import metadata
+
+        if self.caller_name is None:
+            logger.warn(
+                "Aborting distribution name search since from module is None."
+            )
+            return None
+
+        caller_dist_name = _get_dist_name_from_mod_and_pkg_name(
+            self.caller_name, self.caller_package
+        )
+        if not caller_dist_name or not self.caller_file:
+            return None
 
-    caller_mod = inspect.getmodule(frame)
-    caller_dist_name = _get_dist_name_from_mod(caller_mod)
-    caller_file = getattr(caller_mod, "__file__", None)
-    if caller_dist_name and caller_file:
         try:
-            package_version = get_version(caller_dist_name)
+            package_version = metadata.version(caller_dist_name)
             version = f"{caller_dist_name} {package_version}"
 
             package_location = _get_package_location(
-                caller_file, caller_dist_name
+                self.caller_file, caller_dist_name
             )
             version += f"\n    from {package_location}"
 
-            while stack:
-                exe_fname = stack.pop(0).filename
+            for exe_fname in self.get_outer_files():
                 if os.access(exe_fname, os.X_OK):
                     version += f"\n    by {_shorten_homedir(exe_fname)}"
                     break
@@ -129,50 +346,118 @@ def Parser(*args: Any, **kwargs: Any) -> argparse.ArgumentParser:
 
             clack_dist_name = _get_dist_name_from_pkg_name(__package__)
             assert clack_dist_name is not None
-            clack_version = get_version(clack_dist_name)
+            clack_version = metadata.version(clack_dist_name)
 
             version += f"\n{clack_dist_name} {clack_version}"
 
             clack_location = _get_package_location(__file__, __package__)
             version += f"\n    from {clack_location}"
+        except metadata.PackageNotFoundError:
+            return None
 
-            parser.add_argument("--version", action="version", version=version)
-        except PackageNotFoundError:
-            pass
+        return version
 
-    return parser
 
+CommandBuilder = Callable[[argparse.ArgumentParser], None]
 
-def _get_dist_name_from_mod(from_mod: ModuleType | None) -> str | None:
-    """
-    Retrieves the PyPI distribution name associated with a given module.
 
-    Args:
-        from_mod: The module object for which to find the distribution.
+class _LazyParser(NamedTuple):
+    """Placeholder for a sub-command parser that has not been built yet."""
+
+    builder: CommandBuilder
+    kwargs: Dict[str, Any]
+
+
+class _LazySubParsersAction(argparse._SubParsersAction):
+    """An argparse sub-parsers action that supports lazy sub-commands.
 
-    Returns:
-        The PyPI distribution name, or None if not found.
+    A lazy sub-command is registered with a builder function instead of a
+    parser. The sub-command's parser is only constructed (and passed to its
+    builder function) when the sub-command is actually chosen on the
+    command-line. Lazy sub-commands are still listed (using the help strings
+    given when they were registered) by the parent parser's --help output.
     """
-    if from_mod is None:
-        logger.warn(
-            "Aborting distribution name search since from module is None."
-        )
-        return None
 
-    dist_name = _get_dist_name_from_mod_and_pkg_name(
-        from_mod.__name__, from_mod.__package__
-    )
-    return dist_name
+    def add_lazy_parser(
+        self, name: str, builder: CommandBuilder, **kwargs: Any
+    ) -> None:
+        """Registers a new lazy sub-command.
+
+        Args:
+            name: The name of this sub-command.
+            builder: Called with this sub-command's parser (after it has been
+              constructed) so it can add this sub-command's arguments.
+            kwargs: These keyword arguments are relayed to this sub-command's
+              parser class when (and if) it is constructed.
+        """
+        if kwargs.get("prog") is None:
+            kwargs["prog"] = f"{self._prog_prefix} {name}"
+
+        aliases = kwargs.pop("aliases", ())
+        for some_name in [name, *aliases]:
+            if some_name in self._name_parser_map:
+                raise argparse.ArgumentError(
+                    self, f"conflicting subparser: {some_name}"
+                )
+
+        if "help" in kwargs:
+            choice_action = self._ChoicesPseudoAction(
+                name, aliases, kwargs.pop("help")
+            )
+            self._choices_actions.append(choice_action)
+
+        # NOTE: The placeholder is stored in the parser map (instead of in some
+        # other container) so argparse still treats every lazy sub-command
+        # (and its aliases) as a valid choice.
+        lazy_parser = _LazyParser(builder, kwargs)
+        for some_name in [name, *aliases]:
+            self._name_parser_map[some_name] = lazy_parser
+
+    def get_parser(self, name: str) -> argparse.ArgumentParser:
+        """Returns the parser used by the `name` sub-command.
+
+        The sub-command's parser is constructed first if it is lazy.
+        """
+        parser_or_lazy = self._name_parser_map[name]
+        if not isinstance(parser_or_lazy, _LazyParser):
+            parser: argparse.ArgumentParser = parser_or_lazy
+            return parser
+
+        lazy_parser = parser_or_lazy
+        parser = self._parser_class(**lazy_parser.kwargs)
+        monkey_patch_parser(parser)
+        lazy_parser.builder(parser)
+
+        for some_name, some_parser in self._name_parser_map.items():
+            if some_parser is lazy_parser:
+                self._name_parser_map[some_name] = parser
+        return parser
+
+    def __call__(
+        self,
+        parser: argparse.ArgumentParser,
+        namespace: argparse.Namespace,
+        values: Any,
+        option_string: str = None,
+    ) -> None:
+        if (command_hook := COMMAND_HOOK.get()) is not None:
+            command_hook(values[0])
+
+        if values[0] in self._name_parser_map:
+            self.get_parser(values[0])
+        super().__call__(parser, namespace, values, option_string)
 
 
 def _get_dist_name_from_mod_and_pkg_name(
     mod_name: str, pkg_name: str | None
 ) -> str | None:
+    from importlib import metadata
+
     try:
         # Attempt to get the dist metadata directly using the module name
-        distribution = get_dist_from_name(mod_name)
+        distribution = metadata.distribution(mod_name)
         return distribution.metadata["Name"]
-    except PackageNotFoundError:
+    except metadata.PackageNotFoundError:
         return _get_dist_name_from_pkg_name(pkg_name)
 
 
@@ -180,10 +465,10 @@ def _get_dist_name_from_pkg_name(pkg_name: str | None) -> str | None:
     # Fallback logic: For packages where the module name might not
     # directly match the distribution name, try finding distributions
     # that contain this module
-    for dist in get_all_dists():
-        module_names = dist.read_text("top_level.txt")
-        if module_names is not None and pkg_name in module_names.splitlines():
-            return dist.metadata["Name"]
+    if pkg_name is not None:
+        dist_name = get_dist_name(pkg_name)
+        if dist_name is not None:
+            return dist_name
 
     logger.warn(
         "Unable to match package name to any known distribution.",
@@ -198,10 +483,17 @@ def monkey_patch_parser(parser: argparse.ArgumentParser) -> None:
 
 
 def _patch_add_argument_method(parser: argparse.ArgumentParser) -> None:
+    # The config defaults are looked up (at most) once per parser.
+    config_defaults: Optional[Mapping[str, Any]] = None
+
     def add_argument(*args: Any, **kwargs: Any) -> None:
+        nonlocal config_defaults
+
         if "default" not in kwargs:
+            if config_defaults is None:
+                config_defaults = dyn.get_config_defaults()
+
             field_name = _get_field_name(args, kwargs)
-            config_defaults = dyn.get_config_defaults()
             default = config_defaults.get(
                 field_name, ARGPARSE_ARGUMENT_DEFAULT
             )
@@ -227,6 +519,18 @@ def _get_field_name(args: Sequence[str], kwargs: Mapping[str, Any]) -> str:
     return long_opt.lstrip("-").replace("-", "_")
 
 
+def _profile_type_factory(
+    app_name: str,
+) -> Callable[[str], profile.Profile]:
+    def profile_type(arg: str) -> profile.Profile:
+        try:
+            return profile.Profile.from_arg(arg, app_name)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e)) from e
+
+    return profile_type
+
+
 def _log_type_factory(app_name: str) -> Callable[[str], Log]:
     def log_type(arg: str) -> Log:
         # This regex will match arguments of the form 'FILE[:LEVEL][@FORMAT]'.
@@ -293,6 +597,29 @@ def _shorten_homedir(path: str) -> str:
     return path.replace(home, "~")
 
 
+class _AttachedValueAction(argparse.Action):
+    """Stores an option's optional value, which MUST use the '--opt=VAL' form.
+
+    See the _HelpFormatter class, which formats these options accordingly.
+    """
+
+    def __call__(
+        self,
+        parser: argparse.ArgumentParser,
+        namespace: argparse.Namespace,
+        values: Any,
+        option_string: str = None,
+    ) -> None:
+        """Stores `values` in `namespace`."""
+        del parser, option_string
+        setattr(namespace, self.dest, values)
+
+
+def _attached_value_invocation(action: argparse.Action) -> str:
+    """Returns the '--opt[=VAL]' string used to document `action`."""
+    return f"{action.option_strings[-1]}[={action.metavar}]"
+
+
 class _HelpFormatter(argparse.RawDescriptionHelpFormatter):
     """
     Custom argparse.HelpFormatter that uses raw descriptions and sorts optional
@@ -303,6 +630,30 @@ class _HelpFormatter(argparse.RawDescriptionHelpFormatter):
         actions = sorted(actions, key=_argparse_action_key)
         super().add_arguments(actions)
 
+    def _format_action_invocation(self, action: argparse.Action) -> str:
+        if isinstance(action, _AttachedValueAction):
+            return _attached_value_invocation(action)
+        return super()._format_action_invocation(action)
+
+    def _format_usage(
+        self,
+        usage: Optional[str],
+        actions: Iterable[argparse.Action],
+        groups: Iterable[argparse._MutuallyExclusiveGroup],
+        prefix: Optional[str],
+    ) -> str:
+        actions = list(actions)
+        result = super()._format_usage(usage, actions, groups, prefix)
+        # NOTE: argparse would otherwise document these options using the
+        # '--opt [VAL]' form, which they do NOT support.
+        for action in actions:
+            if isinstance(action, _AttachedValueAction):
+                result = result.replace(
+                    f"{action.option_strings[-1]} [{action.metavar}]",
+                    _attached_value_invocation(action),
+                )
+        return result
+
 
 def _argparse_action_key(action: argparse.Action) -> str:
     opts = action.option_strings
@@ -0,0 +1,284 @@
+"""Deterministic profiling (via cProfile) of clack applications.
+
+Profiling is enabled using the `--profile FILE[@SCOPE]` option that
+clack.Parser() adds to every parser. The profile is written when the profiled
+code returns, raises, or is interrupted (e.g. by SIGINT).
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    ContextManager,
+    Dict,
+    Final,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from logrus import Logger, get_default_logfile
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    import cProfile
+    import pstats
+
+
+ProfileScope = Literal["runner", "main"]
+
+OPTION: Final = "--profile"
+# The argparse destination of the --profile option. This is NOT a
+# clack.Config field, so clack.filter_cli_args() drops it.
+DEST: Final = "clack_profile"
+PROFILE_SCOPES: Final[Tuple[ProfileScope, ...]] = ("runner", "main")
+# Profiles are written using the pstats format (see the pstats module) unless
+# the profile file has one of these extensions, in which case we write
+# collapsed stacks (i.e. the input format of flamegraph.pl and speedscope).
+COLLAPSED_SUFFIXES: Final = (".collapsed", ".folded", ".txt")
+PSTATS_SUFFIX: Final = ".pstats"
+
+# Call stacks whose (estimated) time is below this threshold (in seconds) are
+# omitted from collapsed stack profiles.
+_MIN_STACK_TIME: Final = 1e-6
+# Bounds on the call stacks that we expand when writing collapsed stack
+# profiles, since the number of distinct call stacks can grow exponentially
+# with the depth of the call graph.
+_MAX_STACK_DEPTH: Final = 128
+_MAX_STACKS: Final = 10_000
+_NULL_CONTEXT: Final = nullcontext()
+
+logger = Logger(__name__)
+
+# A function is identified by a (filename, line number, name) 3-tuple.
+_Func = Tuple[str, int, str]
+
+
+@dataclass(frozen=True)
+class Profile:
+    """Profile specification (see the --profile option).
+
+    Args:
+        file: The file that the profile is written to.
+        scope: The code that is profiled. Either "runner" (i.e. only the
+          runner function) or "main" (i.e. the application's entire
+          invocation, including argument parsing and config discovery).
+    """
+
+    file: Path
+    scope: ProfileScope = "runner"
+
+    @classmethod
+    def from_arg(cls, arg: str, app_name: str) -> Profile:
+        """Parses a --profile argument of the form 'FILE[@SCOPE]'.
+
+        If FILE is of the form '+[NAME]', the profile is written next to the
+        default logfile location (see logrus.get_default_logfile()). NAME
+        defaults to the application's name and may include a file extension.
+
+        Raises:
+            ValueError: If SCOPE is NOT a valid profile scope.
+        """
+        file, sep, scope = arg.rpartition("@")
+        if not sep:
+            file, scope = arg, "runner"
+
+        if scope not in PROFILE_SCOPES:
+            raise ValueError(
+                f"Bad profile scope ({scope!r}) in profile specification"
+                f" ({arg!r}). Must be one of {list(PROFILE_SCOPES)}."
+            )
+
+        # If FILE is of the form '+[NAME]'...
+        if file.startswith("+"):
+            name = Path(file[1:] or app_name)
+            suffix = name.suffix
+            if suffix not in (PSTATS_SUFFIX, *COLLAPSED_SUFFIXES):
+                name, suffix = Path(f"{name}{PSTATS_SUFFIX}"), PSTATS_SUFFIX
+            path = get_default_logfile(name.stem).with_suffix(suffix)
+        else:
+            path = Path(file)
+
+        return cls(path, scope)
+
+    @property
+    def is_collapsed(self) -> bool:
+        """True iff this profile should be written as collapsed stacks."""
+        return self.file.suffix in COLLAPSED_SUFFIXES
+
+
+_ACTIVE_PROFILE: ContextVar[Optional[Profile]] = ContextVar(
+    "clack_active_profile", default=None
+)
+# The profile requested by the current invocation's argv (see requesting()).
+_REQUESTED_PROFILE: ContextVar[Optional[Profile]] = ContextVar(
+    "clack_requested_profile", default=None
+)
+
+
+def get_profile_from_argv(
+    argv: Sequence[str], app_name: str
+) -> Optional[Profile]:
+    """Returns the profile specified by `argv` (if any).
+
+    NOTE: This is used to start profiling BEFORE we parse `argv`. Invalid
+    profile specifications are ignored here, since argparse reports them
+    when `argv` is parsed.
+    """
+    for idx, arg in enumerate(argv):
+        if arg == "--":
+            break
+
+        if arg == OPTION and idx + 1 < len(argv):
+            value = argv[idx + 1]
+        elif arg.startswith(OPTION + "="):
+            value = arg[len(OPTION) + 1 :]
+        else:
+            continue
+
+        try:
+            return Profile.from_arg(value, app_name)
+        except ValueError:
+            return None
+
+    return None
+
+
+@contextmanager
+def requesting(profile: Optional[Profile]) -> Iterator[None]:
+    """Makes `profile` the requested profile while in this context."""
+    token = _REQUESTED_PROFILE.set(profile)
+    try:
+        yield
+    finally:
+        _REQUESTED_PROFILE.reset(token)
+
+
+def get_requested_profile() -> Optional[Profile]:
+    """Returns the profile requested by the current invocation (if any)."""
+    return _REQUESTED_PROFILE.get()
+
+
+def profiling(
+    profile: Optional[Profile], *, scope: ProfileScope
+) -> ContextManager[None]:
+    """Profiles the code run in this context if `profile` uses `scope`.
+
+    Nested profiling contexts are no-ops (i.e. the outermost context wins).
+    """
+    if (
+        profile is None
+        or profile.scope != scope
+        or _ACTIVE_PROFILE.get() is not None
+    ):
+        return _NULL_CONTEXT
+    return _profiling(profile)
+
+
+@contextmanager
+def _profiling(profile: Profile) -> Iterator[None]:
+    import cProfile
+
+    profiler = cProfile.Profile()
+    token = _ACTIVE_PROFILE.set(profile)
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        _ACTIVE_PROFILE.reset(token)
+        write_profile(profiler, profile)
+
+
+def write_profile(profiler: cProfile.Profile, profile: Profile) -> None:
+    """Writes the profile collected by `profiler` to `profile.file`."""
+    import pstats
+
+    profile.file.parent.mkdir(parents=True, exist_ok=True)
+    if profile.is_collapsed:
+        stats = pstats.Stats(profiler)
+        profile.file.write_text(
+            "".join(f"{line}\n" for line in collapsed_stacks(stats))
+        )
+    else:
+        profiler.dump_stats(profile.file)
+
+    logger.debug("Wrote profile.", file=str(profile.file))
+
+
+def collapsed_stacks(stats: pstats.Stats) -> List[str]:
+    """Converts profile stats into collapsed stacks (one stack per line).
+
+    Each line has the form 'FRAME;FRAME;...;FRAME USEC', where USEC is the
+    time spent (in microseconds) in the last frame of that call stack.
+
+    NOTE: cProfile only records caller/callee pairs (NOT full call stacks), so
+    the time spent in each call stack is estimated by splitting a function's
+    time between its callers in proportion to the time spent in the function
+    when it was called by each caller. Call stacks are NOT expanded past
+    _MAX_STACK_DEPTH frames or once _MAX_STACKS call stacks have been found
+    (the time spent below such stacks is omitted).
+    """
+    raw_stats: Dict[_Func, Any] = stats.stats  # type: ignore[attr-defined]
+
+    callees: Dict[_Func, List[Tuple[_Func, float]]] = {}
+    roots = []
+    for func, (*_, callers) in raw_stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, (*_, edge_time) in callers.items():
+            callees.setdefault(caller, []).append((func, edge_time))
+
+    stack_times: Dict[Tuple[str, ...], float] = {}
+    # Each item has the form (function, parent stack, fraction of function's
+    # total time spent under this parent stack).
+    todo: List[Tuple[_Func, Tuple[_Func, ...], float]] = [
+        (root, (), 1.0) for root in reversed(roots)
+    ]
+    while todo:
+        func, parent_stack, fraction = todo.pop()
+        stack = (*parent_stack, func)
+        own_time = raw_stats[func][2]
+
+        key = tuple(_func_label(f) for f in stack)
+        stack_times[key] = stack_times.get(key, 0.0) + own_time * fraction
+
+        if len(stack) >= _MAX_STACK_DEPTH:
+            continue
+
+        for callee, edge_time in reversed(callees.get(func, [])):
+            callee_total_time = raw_stats[callee][3]
+            # Skip recursive calls, which are already accounted for.
+            if callee in stack or callee_total_time <= 0:
+                continue
+
+            if len(stack_times) + len(todo) >= _MAX_STACKS:
+                break
+
+            callee_fraction = fraction * edge_time / callee_total_time
+            if callee_fraction * callee_total_time >= _MIN_STACK_TIME:
+                todo.append((callee, stack, callee_fraction))
+
+    return [
+        f"{';'.join(key)} {round(seconds * 1e6)}"
+        for key, seconds in stack_times.items()
+        if round(seconds * 1e6) > 0
+    ]
+
+
+def _func_label(func: _Func) -> str:
+    filename, lineno, name = func
+    # Built-in functions have a filename of "~" and a line number of 0.
+    if filename == "~" and lineno == 0:
+        label = name
+    else:
+        label = f"{name} ({filename}:{lineno})"
+    return label.replace(";", ",")
@@ -0,0 +1,118 @@
+"""Hides the differences between pydantic v1 and pydantic v2.
+
+With pydantic v1, settings classes (i.e. BaseSettings) are provided by pydantic
+itself. With pydantic v2, they are provided by the separate pydantic-settings
+package and are validated by pydantic-core's (compiled) validators. Every
+other clack module should use the helpers defined here instead of using any
+version-specific pydantic APIs (e.g. `__fields__` vs `model_fields` or
+`dict()` vs `model_dump()`).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Final, Mapping, Type, get_args
+
+from pydantic.version import VERSION as PYDANTIC_VERSION
+
+
+PYDANTIC_V2: Final = not PYDANTIC_VERSION.startswith("1.")
+
+if PYDANTIC_V2:
+    from pydantic_settings import (  # type: ignore[import-not-found,no-redef,unused-ignore]  # noqa: E501
+        BaseSettings,
+    )
+else:
+    from pydantic import (  # type: ignore[attr-defined,no-redef,unused-ignore]  # noqa: E501
+        BaseSettings,
+    )
+
+
+__all__ = [
+    "BaseSettings",
+    "PYDANTIC_V2",
+    "PYDANTIC_VERSION",
+    "config_to_dict",
+    "get_config_setting",
+    "get_field_defaults",
+    "get_field_type",
+    "get_fields",
+]
+
+
+def get_fields(config_type: Type[Any]) -> Mapping[str, Any]:
+    """Returns the fields of a pydantic model type (by field name).
+
+    An empty mapping is returned for any type that is NOT a pydantic model.
+    """
+    if PYDANTIC_V2:
+        fields: Mapping[str, Any] = getattr(config_type, "model_fields", {})
+    else:
+        fields = getattr(config_type, "__fields__", {})
+    return fields
+
+
+def get_field_type(field: Any) -> Any:
+    """Returns the (already resolved) type of a field returned by get_fields().
+
+    Pydantic resolves the types of every field when a model type is created,
+    so this is MUCH cheaper than calling get_type_hints() on the model type.
+    """
+    if PYDANTIC_V2:
+        return field.annotation
+    else:
+        return field.outer_type_
+
+
+def get_field_defaults(config_type: Type[Any]) -> Dict[str, Any]:
+    """Returns the default values of a pydantic model type's fields.
+
+    Fields that are required are skipped, as are fields whose default value
+    is None but that do NOT accept None as a value.
+    """
+    result = {}
+    for key, field in get_fields(config_type).items():
+        if PYDANTIC_V2:
+            if field.is_required():
+                continue
+
+            default = field.get_default(call_default_factory=True)
+            allow_none = _allows_none(field.annotation)
+        else:
+            default = field.default
+            allow_none = field.allow_none
+
+        if default is not None or allow_none:
+            result[key] = default
+    return result
+
+
+def _allows_none(annotation: Any) -> bool:
+    if annotation is None or annotation is Any:
+        return True
+    return type(None) in get_args(annotation)
+
+
+def get_config_setting(config_type: Type[Any], name: str, default: Any) -> Any:
+    """Returns one of a pydantic model type's configuration settings.
+
+    Args:
+        config_type: The pydantic model type.
+        name: The name of the setting (e.g. "use_config_cache"). With pydantic
+          v1, settings are attributes of the model's inner `Config` class.
+          With pydantic v2, settings are keys of the model's `model_config`
+          dict.
+        default: Returned when this setting has NOT been set.
+    """
+    if PYDANTIC_V2:
+        return config_type.model_config.get(name, default)
+    else:
+        return getattr(config_type.__config__, name, default)
+
+
+def config_to_dict(cfg: Any) -> Dict[str, Any]:
+    """Converts a Config object (e.g. a pydantic model) into a dict."""
+    if PYDANTIC_V2 and hasattr(cfg, "model_dump"):
+        result: Dict[str, Any] = cfg.model_dump()
+    else:
+        result = cfg.dict()
+    return result
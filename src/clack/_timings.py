@@ -0,0 +1,241 @@
+"""Records how long each phase of a clack application's invocation takes.
+
+Timings are only recorded when the `--clack-timings[=FILE]` option (which
+clack.Parser() adds to every parser) is given on the command-line. The active
+recorder is stored in a context variable, so the instrumented code paths only
+pay for a single context variable lookup when timings are NOT being recorded.
+
+Phases can be nested (e.g. config file parsing happens during config
+discovery, which happens during config validation). The time reported for
+each phase does NOT include the time spent in any of its nested phases, so the
+phase timings add up to the total time.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+import json
+import os
+import sys
+import time
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    Final,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+
+# The option that enables timings. Its (optional) value is the JSON file that
+# the timing report is written to. The report is written to stderr otherwise.
+OPTION: Final = "--clack-timings"
+_STDERR: Final = "-"
+
+# Phase names...
+STARTUP: Final = "startup (interpreter + imports)"
+PARSER: Final = "Parser()"
+PARSE_ARGS: Final = "parse_args()"
+VERSION: Final = "--version lookup"
+DISCOVERY: Final = "config discovery"
+CONFIG_PARSING: Final = "config file parsing"
+VALIDATION: Final = "config validation"
+INIT_LOGGING: Final = "init_logging()"
+RUNNER: Final = "runner"
+OTHER: Final = "other"
+
+# Counter names...
+PATHS_PROBED: Final = "config paths probed"
+FS_CALLS: Final = "config discovery fs calls"
+FILES_PARSED: Final = "config files parsed"
+BYTES_PARSED: Final = "config bytes parsed"
+CACHE_HITS: Final = "config file cache hits"
+
+_NULL_CONTEXT: Final = nullcontext()
+
+
+class TimingRecorder:
+    """Accumulates phase timings and counters for a single invocation."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        # Maps phase names to the (exclusive) time spent in those phases.
+        self.phases: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.counters: Dict[str, int] = {}
+        # The time spent in the nested phases of each active phase.
+        self._nested_times: List[float] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Adds the time spent in this context to the `name` phase."""
+        start = time.perf_counter()
+        self._nested_times.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested_time = self._nested_times.pop()
+            self.add(name, elapsed - nested_time)
+            if self._nested_times:
+                self._nested_times[-1] += elapsed
+
+    def add(self, name: str, seconds: float) -> None:
+        """Adds `seconds` to the `name` phase."""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Adds `n` to the `name` counter."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self) -> Dict[str, Any]:
+        """Returns a JSON-serializable report of everything we recorded."""
+        startup = self.phases.get(STARTUP, 0.0)
+        total = startup + time.perf_counter() - self.start
+        phases = dict(self.phases)
+        phases[OTHER] = total - sum(phases.values())
+        return {
+            "total": total,
+            "phases": phases,
+            "calls": dict(self.calls),
+            "counters": dict(self.counters),
+        }
+
+
+_RECORDER: ContextVar[Optional[TimingRecorder]] = ContextVar(
+    "clack_timing_recorder", default=None
+)
+
+
+def get_recorder() -> Optional[TimingRecorder]:
+    """Returns the active timing recorder (or None if timings are off)."""
+    return _RECORDER.get()
+
+
+def phase(name: str) -> ContextManager[None]:
+    """Records the time spent in this context (if timings are enabled)."""
+    recorder = _RECORDER.get()
+    if recorder is None:
+        return _NULL_CONTEXT
+    return recorder.phase(name)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Adds `n` to the `name` counter (if timings are enabled)."""
+    recorder = _RECORDER.get()
+    if recorder is not None:
+        recorder.count(name, n)
+
+
+def pop_option(argv: Sequence[str]) -> Tuple[Sequence[str], Optional[str]]:
+    """Removes the --clack-timings option from `argv`.
+
+    NOTE: We remove this option ourselves (instead of letting argparse parse
+    it) since its value is optional, so argparse would otherwise treat the
+    argument that follows this option (e.g. a sub-command) as its value.
+
+    Returns:
+        A 2-tuple of the form (argv, dest), where `dest` is the file that the
+        timing report should be written to ("-" for stderr) or None if
+        timings were NOT requested.
+    """
+    dest: Optional[str] = None
+    new_argv: List[str] = []
+    for idx, arg in enumerate(argv):
+        if arg == "--":
+            new_argv.extend(argv[idx:])
+            break
+
+        if arg == OPTION:
+            dest = _STDERR
+        elif arg.startswith(OPTION + "="):
+            dest = arg[len(OPTION) + 1 :] or _STDERR
+        else:
+            new_argv.append(arg)
+
+    if dest is None:
+        return argv, None
+    return new_argv, dest
+
+
+@contextmanager
+def recording(
+    dest: str, *, app_name: str, include_startup: bool = False
+) -> Iterator[TimingRecorder]:
+    """Records timings while in this context and then reports them.
+
+    Args:
+        dest: The file that the timing report is written to (as JSON) or "-"
+          to write a human-readable report to stderr.
+        app_name: The name of the application that we are timing.
+        include_startup: If set, the time that elapsed between this process
+          starting and this context being entered is reported as the startup
+          phase (this is only supported on Linux).
+    """
+    recorder = TimingRecorder()
+    if include_startup and (process_age := _get_process_age()) is not None:
+        recorder.add(STARTUP, process_age)
+
+    token = _RECORDER.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _RECORDER.reset(token)
+
+        report = {"app_name": app_name, **recorder.report()}
+        if dest == _STDERR:
+            print(format_report(report), file=sys.stderr)
+        else:
+            with open(dest, "w") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Formats a timing report (see TimingRecorder.report()) as text."""
+    total = report["total"]
+    lines = [f"clack timings for {report['app_name']} (total: {_ms(total)}):"]
+
+    width = max(len(name) for name in [*report["phases"], *report["counters"]])
+    for name, seconds in report["phases"].items():
+        calls = report["calls"].get(name)
+        pct = 100 * seconds / total if total else 0.0
+        line = f"  {name:<{width}}  {_ms(seconds):>10}  {pct:5.1f}%"
+        if calls is not None and calls > 1:
+            line += f"  ({calls} calls)"
+        lines.append(line)
+
+    if report["counters"]:
+        lines.append("counters:")
+        for name, value in report["counters"].items():
+            lines.append(f"  {name:<{width}}  {value:>10,}")
+    return "\n".join(lines)
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1e3:,.2f}ms"
+
+
+def _get_process_age() -> Optional[float]:
+    """Returns how long ago (in seconds) this process was started.
+
+    NOTE: The resolution of this measurement is one clock tick (usually 10ms).
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            stat_fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    # The 22nd field of /proc/self/stat is this process's start time (in clock
+    # ticks since boot). The fields that follow the process name start at 3.
+    start_ticks = int(stat_fields[22 - 3])
+    return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
@@ -2,23 +2,32 @@
 
 from __future__ import annotations
 
-import argparse
 from pathlib import Path
 from typing import (
+    TYPE_CHECKING,
     Any,
     Callable,
+    ContextManager,
     Dict,
+    Iterable,
     List,
+    Mapping,
     Protocol,
     Sequence,
     Type,
     TypeVar,
+    overload,
     runtime_checkable,
 )
 
-from eris import ErisError, LazyResult, Result
-from pydantic.fields import ModelField
-from typist import PathLike
+
+if TYPE_CHECKING:  # pragma: no cover
+    # NOTE: These imports are only used in type annotations, so we avoid
+    # importing these (relatively expensive) modules at runtime.
+    import argparse
+
+    from eris import ErisError, LazyResult, Result
+    from typist import PathLike
 
 
 ClackParser = Callable[[Sequence[str]], Dict[str, Any]]
@@ -35,7 +44,9 @@ class ClackConfig(Protocol):
     should look like.
     """
 
-    __fields__: Dict[str, ModelField]
+    # Maps field names to pydantic's field objects (i.e. ModelField objects
+    # with pydantic v1 and FieldInfo objects with pydantic v2).
+    __fields__: Dict[str, Any]
 
     @classmethod
     def from_cli_args(cls: Type[Config_T], argv: Sequence[str]) -> Config_T:
@@ -45,6 +56,38 @@ class ClackConfig(Protocol):
         """Converts Config class into a dictionary."""
 
 
+@runtime_checkable
+class ClackConfigDocument(Protocol):
+    """The protocol used for loaded (i.e. parsed) configuration files."""
+
+    def get(self, key: str) -> Result[Any, ErisError]:
+        """Getter for values in this config document."""
+
+    def get_many(
+        self, keys: Iterable[str]
+    ) -> Result[Dict[str, Any], ErisError]:
+        """Getter for multiple values in this config document."""
+
+    def keys(self) -> List[str]:
+        """Returns all of the keys defined in this config document."""
+
+    def to_dict(self) -> dict[str, Any]:
+        """Converts this config document into a dict."""
+
+
+class ClackConfigTransaction(Protocol):
+    """The protocol used for config file transactions.
+
+    See ClackBulkConfigFile.transaction() for more information.
+    """
+
+    def set(self, key: str, value: Any) -> None:
+        """Schedules a config value update."""
+
+    def set_many(self, updates: Mapping[str, Any]) -> None:
+        """Schedules multiple config value updates."""
+
+
 @runtime_checkable
 class ClackConfigFile(Protocol):
     """The protocol used for configuration file classes."""
@@ -74,6 +117,44 @@ class ClackConfigFile(Protocol):
         """Converts this configuration file into a dict."""
 
 
+@runtime_checkable
+class ClackBulkConfigFile(ClackConfigFile, Protocol):
+    """The protocol used for config files that support bulk reads / writes.
+
+    All of clack's own config file classes (e.g. clack.YAMLConfigFile)
+    implement this protocol.
+    """
+
+    def get_many(
+        self, keys: Iterable[str]
+    ) -> Result[Dict[str, Any], ErisError]:
+        """Getter for multiple values in this config file.
+
+        Implementations should parse the config file (at most) once.
+        """
+
+    def load(self) -> Result[ClackConfigDocument, ErisError]:
+        """Loads this config file into memory."""
+
+    def set_many(
+        self,
+        updates: Mapping[str, Any],
+        *,
+        allow_new: bool = False,
+        fsync: bool = False,
+    ) -> LazyResult[Dict[str, Any], ErisError]:
+        """Setter for multiple values in this config file.
+
+        Implementations should write the config file (at most) once and
+        should leave it untouched if any of the `updates` fail.
+        """
+
+    def transaction(
+        self, *, allow_new: bool = False, fsync: bool = False
+    ) -> ContextManager[ClackConfigTransaction]:
+        """Batches all updates made inside this context into a single write."""
+
+
 class ClackMain(Protocol):
     """Type of the `main()` function returned by `main_factory()`."""
 
@@ -84,11 +165,42 @@ class ClackMain(Protocol):
 class ClackNewCommand(Protocol):
     """Type of the function returned by `new_command_factory()`."""
 
+    @overload
     def __call__(
         self,
         name: str,
         *,
         help: str,  # pylint: disable=redefined-builtin
+        builder: None = None,
         **kwargs: Any,
     ) -> argparse.ArgumentParser:
         """This method captures the `new_command()` function's signature."""
+
+    @overload
+    def __call__(
+        self,
+        name: str,
+        *,
+        help: str,  # pylint: disable=redefined-builtin
+        builder: Callable[[argparse.ArgumentParser], None],
+        **kwargs: Any,
+    ) -> None:
+        """Lazy subcommands are registered with a `builder` function."""
+
+
+class ClackRegisterRunner(Protocol):
+    """Type of the function returned by `register_runner_factory()`."""
+
+    @overload
+    def __call__(self, runner: ClackRunner) -> ClackRunner:
+        """This method captures the `register_runner()` function's signature."""
+
+    @overload
+    def __call__(
+        self,
+        runner: str,
+        *,
+        command: str,
+        config: str | Type[ClackConfig],
+    ) -> ClackRunner:
+        """Runners can also be registered lazily using their import paths."""
@@ -7,12 +7,15 @@ from typing import Dict, Literal, Tuple
 
 XDG_Type = Literal["cache", "config", "data", "runtime"]
 
-_HOME = os.environ.get("HOME")
 # Mapping of XDG directory types to 2-tuples of the form (envvar, default_dir).
+#
+# NOTE: The HOME envvar is read every time that a default directory is used
+# (NOT when this module is imported), since it can change during the lifetime
+# of a process (e.g. when a clack-serve process handles a client's request).
 _XDG_TYPE_MAP: Dict[XDG_Type, Tuple[str, str]] = {
-    "cache": ("XDG_CACHE_HOME", f"{_HOME}/.cache"),
-    "config": ("XDG_CONFIG_HOME", f"{_HOME}/.config"),
-    "data": ("XDG_DATA_HOME", f"{_HOME}/.local/share"),
+    "cache": ("XDG_CACHE_HOME", "{HOME}/.cache"),
+    "config": ("XDG_CONFIG_HOME", "{HOME}/.config"),
+    "data": ("XDG_DATA_HOME", "{HOME}/.local/share"),
     "runtime": ("XDG_RUNTIME_DIR", "/tmp"),
 }
 
@@ -52,5 +55,8 @@ def get_base_dir(xdg_type: XDG_Type) -> Path:
     )
 
     envvar, default_dir = _XDG_TYPE_MAP[xdg_type]
-    xdg_dir = Path(os.environ.get(envvar, default_dir))
+    if envvar in os.environ:
+        xdg_dir = Path(os.environ[envvar])
+    else:
+        xdg_dir = Path(default_dir.format(HOME=os.environ.get("HOME")))
     return xdg_dir
@@ -4,8 +4,10 @@ https://docs.pytest.org/en/6.2.x/fixture.html#conftest-py-sharing-fixtures-acros
 """
 
 import logging
+from pathlib import Path
 from typing import Iterator, cast
 
+from _pytest.monkeypatch import MonkeyPatch
 from freezegun import freeze_time
 from pytest import fixture
 import structlog
@@ -38,3 +40,11 @@ def clear_loggers() -> None:
             logger.removeHandler(handler)
 
     structlog.reset_defaults()
+
+
+@fixture(autouse=True)
+def tmp_xdg_cache(monkeypatch: MonkeyPatch, tmp_path: Path) -> Path:
+    """Make sure that our tests never write to the user's real cache dir."""
+    cache_dir = tmp_path / ".cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_dir))
+    return cache_dir
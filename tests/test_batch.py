@@ -0,0 +1,151 @@
+"""Tests for running clack applications in batches (see clack._batch)."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional, Sequence
+
+import pytest
+
+import clack
+from clack import _batch
+
+
+class Config(clack.Config):
+    """Test Config for batch runs."""
+
+    status: int = 0
+    sleep: float = 0.0
+    say: Optional[str] = None
+
+    @classmethod
+    def from_cli_args(cls, argv: Sequence[str]) -> Config:
+        """Constructs a new Config object from command-line arguments."""
+        parser = clack.Parser()
+        parser.add_argument("--status", type=int)
+        parser.add_argument("--sleep", type=float)
+        parser.add_argument("--say")
+
+        args = parser.parse_args(argv[1:])
+        kwargs = clack.filter_cli_args(args)
+
+        return Config(**kwargs)
+
+
+def run(cfg: Config) -> int:
+    """Runner function."""
+    if cfg.sleep:
+        # NOTE: We can't use time.sleep() since time is frozen in our tests.
+        import select
+
+        select.select([], [], [], cfg.sleep)
+
+    if cfg.say is not None:
+        print(cfg.say)
+        # Output written directly to the stderr file descriptor (e.g. by a C
+        # extension or a subprocess) should also be captured.
+        os.write(2, f"{cfg.say} (fd=2)\n".encode())
+
+    logging.getLogger("test_batch").warning("status=%d", cfg.status)
+    return cfg.status
+
+
+main = clack.main_factory("test_batch", run)
+
+
+def test_batch() -> None:
+    """Test the ClackApp.batch() method."""
+    argvs = [
+        ["test_batch", "--status", str(status)] for status in range(10)
+    ] + [["test_batch", "--sleep", "10"], ["test_batch", "--bad-option"]]
+
+    results = list(main.batch(argvs, jobs=3, timeout=1))
+
+    assert [result.position for result in results] == list(range(12))
+    assert [result.argv for result in results] == argvs
+    assert [result.status for result in results] == list(range(10)) + [
+        None,
+        2,
+    ]
+    assert [result.timed_out for result in results] == [False] * 10 + [
+        True,
+        False,
+    ]
+
+    for status, result in enumerate(results[:10]):
+        messages = [
+            log["message"]
+            for log in result.logs
+            if log["name"] == "test_batch"
+        ]
+        assert messages == [f"status={status}"]
+
+
+def test_batch_unordered() -> None:
+    """Test that batch results can be yielded in completion order."""
+    argvs = [["test_batch", "--sleep", "0.5"]] + [
+        ["test_batch", "--status", str(status)] for status in range(1, 5)
+    ]
+
+    results = list(main.batch(argvs, jobs=2, ordered=False))
+
+    assert sorted(result.position for result in results) == list(range(5))
+    assert results[-1].position == 0
+
+
+def test_batch_main(
+    capsys: pytest.CaptureFixture[str], tmp_path: Path
+) -> None:
+    """Test the main() function of the clack-batch script."""
+    input_file = tmp_path / "argvs.jsonl"
+    input_file.write_text(
+        "\n".join(json.dumps(["--status", str(n)]) for n in [0, 3, 0])
+    )
+
+    exit_status = _batch.main(["tests.test_batch:main", str(input_file)])
+
+    assert exit_status == 1
+    results = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()
+    ]
+    assert [result["status"] for result in results] == [0, 3, 0]
+    assert results[1]["argv"] == ["test_batch", "--status", "3"]
+
+
+def test_batch_output(capfd: pytest.CaptureFixture[str]) -> None:
+    """Test that the output of each run is captured separately."""
+    argvs = [["test_batch", "--say", f"hello {n}"] for n in range(6)]
+
+    results = list(main.batch(argvs, jobs=3))
+
+    assert [result.stdout for result in results] == [
+        f"hello {n}\n" for n in range(6)
+    ]
+    # NOTE: The application's log messages are also written to stderr.
+    assert [result.stderr.splitlines()[0] for result in results] == [
+        f"hello {n} (fd=2)" for n in range(6)
+    ]
+    assert capfd.readouterr() == ("", "")
+
+
+def test_batch_main_output(
+    capfd: pytest.CaptureFixture[str], tmp_path: Path
+) -> None:
+    """Test that clack-batch only writes JSON objects to stdout."""
+    input_file = tmp_path / "argvs.jsonl"
+    input_file.write_text(
+        "\n".join(json.dumps(["--say", f"hello {n}"]) for n in range(3))
+    )
+
+    exit_status = _batch.main(["tests.test_batch:main", str(input_file)])
+
+    assert exit_status == 0
+    results = [
+        json.loads(line) for line in capfd.readouterr().out.splitlines()
+    ]
+    assert [result["stdout"] for result in results] == [
+        f"hello {n}\n" for n in range(3)
+    ]
@@ -1,10 +1,28 @@
 """Miscellaneous tests for the clack library."""
 
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import json
+import os
+from pathlib import Path
+import pstats
+import re
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, List, Sequence
+import weakref
+
 from eris import Err
+from logrus import get_default_logfile
+from pydantic import ValidationError
 import pytest
+from pytest_mock.plugin import MockerFixture
 
 import clack
-from clack import _dynvars as dyn
+from clack import _dist_index, _dynvars as dyn, _parser, _timings as timings
+from clack._profile import Profile
+from clack._pydantic import PYDANTIC_V2
 from clack.pytest_plugin import MakeConfigFile
 
 from .shared import Config
@@ -12,7 +30,7 @@ from .shared import Config
 
 def test_new_command_factory() -> None:
     """Test the clack.new_command_factory() function."""
-    with dyn.clack_envvars_set("test_clack", [Config]):  # type: ignore[list-item]
+    with dyn.clack_envvars_set("test_clack", [Config]):  # type: ignore[list-item,unused-ignore]
         parser = clack.Parser()
         new_command = clack.new_command_factory(parser, dest="command")
         foo = new_command("foo", help="Test FOO subcommand.")
@@ -25,13 +43,428 @@ def test_new_command_factory() -> None:
         assert args.bar
 
 
+def test_parser_skips_metadata_lookups(mocker: MockerFixture) -> None:
+    """Test that clack.Parser() only inspects distributions for --version."""
+    metadata_funcs = [
+        mocker.patch(f"importlib.metadata.{name}")
+        for name in ["distribution", "distributions", "version"]
+    ]
+    with dyn.clack_envvars_set("test_clack", [Config]):
+        cfg = Config.from_cli_args(["", "--do-stuff"])
+
+    assert cfg.do_stuff
+    for metadata_func in metadata_funcs:
+        metadata_func.assert_not_called()
+
+
+def test_parser_version(mocker: MockerFixture) -> None:
+    """Test that the --version option computes its banner on demand."""
+    mock_exit = mocker.patch("argparse.ArgumentParser.exit")
+    mock_distributions = mocker.patch(
+        "importlib.metadata.distributions", return_value=[]
+    )
+    with dyn.clack_envvars_set("test_clack", [Config]):
+        parser = clack.Parser()
+        mock_distributions.assert_not_called()
+
+        parser.parse_args(["--version"])
+
+    mock_distributions.assert_called()
+    mock_exit.assert_called()
+
+
+def test_parser_caller_resolution(mocker: MockerFixture) -> None:
+    """Test how clack.Parser() finds its caller's module and executable."""
+    mock_caller = mocker.spy(_parser, "_Caller")
+    mock_iter_outer_files = mocker.spy(_parser._Caller, "iter_outer_files")
+    with dyn.clack_envvars_set("test_clack", [Config]):
+        parser = clack.Parser()
+        assert parser.description == __doc__
+        assert mock_caller.call_count == 1
+        mock_iter_outer_files.assert_not_called()
+
+        parser = clack.Parser(module="clack", executable="/bin/fake")
+        assert parser.description == clack.__doc__
+        assert mock_caller.call_count == 1
+
+    version_action = next(
+        action
+        for action in parser._actions
+        if "--version" in action.option_strings
+    )
+    assert version_action.caller_name == "clack"  # type: ignore[attr-defined]
+    get_outer_files = version_action.get_outer_files  # type: ignore[attr-defined]
+    assert list(get_outer_files()) == ["/bin/fake"]
+    mock_iter_outer_files.assert_not_called()
+
+
+def test_parser_version_walks_outer_frames(mocker: MockerFixture) -> None:
+    """Test that only --version walks the frames above clack.Parser()."""
+    mocker.patch("argparse.ArgumentParser.exit")
+    mock_iter_outer_files = mocker.spy(_parser._Caller, "iter_outer_files")
+    with dyn.clack_envvars_set("test_clack", [Config]):
+        parser = clack.Parser(module="clack")
+        mock_iter_outer_files.assert_not_called()
+
+        parser.parse_args(["--version"])
+
+    mock_iter_outer_files.assert_called_once()
+
+
+def test_dist_index(mocker: MockerFixture, tmp_xdg_cache: Path) -> None:
+    """Test the persistent package->distribution index."""
+    assert _dist_index.get_dist_name("clack") == "bolton-clack"
+    assert _dist_index.get_index_file().parent == tmp_xdg_cache / "clack"
+    assert _dist_index.get_index_file().is_file()
+
+    # Nothing has changed on disk, so no sys.path entries should be re-scanned
+    # when we load the index from disk again.
+    mock_distributions = mocker.patch("importlib.metadata.distributions")
+    mocker.patch.dict(_dist_index._INDEX_CACHE, clear=True)
+
+    assert _dist_index.get_dist_name("clack") == "bolton-clack"
+    assert _dist_index.get_dist_name("not_a_real_package") is None
+    mock_distributions.assert_not_called()
+
+
+def test_dist_index_keeps_symlinks(tmp_path: Path) -> None:
+    """Test that rewriting the distribution index preserves symlinks."""
+    real_index_file = tmp_path / "real_index.json"
+    real_index_file.write_text("{}")
+    real_index_file.chmod(0o600)
+    index_file = tmp_path / "index.json"
+    index_file.symlink_to(real_index_file)
+
+    _dist_index._write_index_file(index_file, {})
+
+    assert index_file.is_symlink()
+    assert json.loads(real_index_file.read_text())["entries"] == {}
+    assert real_index_file.stat().st_mode & 0o777 == 0o600
+
+
+def test_main_in_parallel_threads() -> None:
+    """Test that main() can be called from multiple threads at once."""
+    barrier = threading.Barrier(2, timeout=10)
+    app_names: Dict[str, str] = {}
+
+    def run(cfg: Config) -> int:
+        del cfg
+        barrier.wait()
+        app_name = dyn.get_app_name()
+        cfg_copy = clack.get_config(Config)
+        assert cfg_copy is not None
+
+        app_names[app_name] = f"do_stuff={cfg_copy.do_stuff}"
+        barrier.wait()
+
+        assert dyn.get_app_name() == app_name
+        return 0
+
+    threads = [
+        threading.Thread(
+            target=clack.main_factory(app_name, run), args=([""] + argv,)
+        )
+        for app_name, argv in [("foo", ["--do-stuff"]), ("bar", [])]
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert app_names == {"foo": "do_stuff=True", "bar": "do_stuff=False"}
+    assert "CLACK_APP_NAME" not in os.environ
+
+
+def test_get_config_in_worker_thread() -> None:
+    """Test that threads started by a runner can read the clack context."""
+    results: Dict[str, Any] = {}
+
+    def read_config() -> None:
+        results["app_name"] = dyn.get_app_name()
+        results["cfg"] = clack.get_config(Config)
+
+    def run(cfg: Config) -> int:
+        del cfg
+        thread = threading.Thread(target=clack.bind_context(read_config))
+        thread.start()
+        thread.join()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            get_config = clack.bind_context(clack.get_config)
+            futures = [executor.submit(get_config, Config) for _ in range(4)]
+            results["pool_cfgs"] = [future.result() for future in futures]
+
+            # Threads do NOT inherit the clack context implicitly.
+            results["unbound_error"] = executor.submit(
+                dyn.get_app_name
+            ).exception()
+        return 0
+
+    assert (
+        clack.main_factory("test_worker_thread", run)(["", "--do-stuff"]) == 0
+    )
+    assert results["app_name"] == "test_worker_thread"
+    assert results["cfg"].do_stuff
+    assert all(cfg is results["cfg"] for cfg in results["pool_cfgs"])
+    assert isinstance(results["unbound_error"], RuntimeError)
+
+    with pytest.raises(RuntimeError):
+        dyn.get_app_name()
+    with pytest.raises(RuntimeError):
+        clack.bind_context(read_config)
+
+
+def test_worker_threads_of_parallel_apps() -> None:
+    """Test that worker threads never see another app's clack context."""
+    barrier = threading.Barrier(2, timeout=10)
+    results: Dict[str, Any] = {}
+
+    class BaseCfg(clack.Config):
+        """Config that ignores the command-line."""
+
+        @classmethod
+        def from_cli_args(cls, argv: Sequence[str]) -> "BaseCfg":
+            """Ignores `argv`."""
+            del argv
+            return cls()
+
+    class ACfg(BaseCfg):
+        """Config of app A."""
+
+    class BCfg(BaseCfg):
+        """Config of app B."""
+
+    def read_config() -> Any:
+        return (dyn.get_app_name(), clack.get_config(clack.Config))
+
+    def run(cfg: clack.Config) -> int:
+        # Both apps are inside their runners before any worker starts.
+        barrier.wait()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(clack.bind_context(read_config))
+            results[type(cfg).__name__] = future.result()
+        barrier.wait()
+        return 0
+
+    def run_a(cfg: ACfg) -> int:
+        return run(cfg)
+
+    def run_b(cfg: BCfg) -> int:
+        return run(cfg)
+
+    apps = [clack.ClackApp("app_a", run_a), clack.ClackApp("app_b", run_b)]
+    threads = [threading.Thread(target=app.run, args=([""],)) for app in apps]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    app_name, cfg = results["ACfg"]
+    assert app_name == "app_a"
+    assert isinstance(cfg, ACfg)
+    app_name, cfg = results["BCfg"]
+    assert app_name == "app_b"
+    assert isinstance(cfg, BCfg)
+
+
+def test_clack_timings(
+    capsys: pytest.CaptureFixture[str],
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test the --clack-timings option."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "test_clack_timings.yml").write_text("do_stuff: true\n")
+
+    runs = []
+
+    def run(cfg: Config) -> int:
+        runs.append(cfg.do_stuff)
+        return 0
+
+    app = clack.ClackApp("test_clack_timings", run)
+    report_file = tmp_path / "timings.json"
+    assert app.run(["", f"--clack-timings={report_file}"]) == 0
+    assert runs == [True]
+
+    report = json.loads(report_file.read_text())
+    assert report["app_name"] == "test_clack_timings"
+    assert set(report["phases"]) == {
+        timings.PARSER,
+        timings.PARSE_ARGS,
+        timings.VALIDATION,
+        timings.DISCOVERY,
+        timings.CONFIG_PARSING,
+        timings.INIT_LOGGING,
+        timings.RUNNER,
+        timings.OTHER,
+    }
+    assert report["counters"][timings.FILES_PARSED] == 1
+    assert report["counters"][timings.BYTES_PARSED] == len("do_stuff: true\n")
+    assert report["counters"][timings.PATHS_PROBED] > 0
+
+    # The report is written to stderr when no FILE is given.
+    assert app(["", "--clack-timings"]) == 0
+    assert "clack timings for test_clack_timings" in capsys.readouterr().err
+    assert timings.get_recorder() is None
+
+    # The space-separated form is rejected, since FILE MUST use the
+    # '--clack-timings=FILE' form.
+    with pytest.raises(SystemExit):
+        app.run(["", "--clack-timings", "out.json"])
+    err = capsys.readouterr().err
+    assert "[--clack-timings[=FILE]]" in err
+    assert "error: unrecognized arguments: out.json" in err
+    assert not (tmp_path / "out.json").exists()
+
+    with pytest.raises(SystemExit):
+        app.run(["", "--help"])
+    assert "--clack-timings[=FILE]" in capsys.readouterr().out
+
+    # The option's (optional) value must NOT swallow the next argument.
+    assert timings.pop_option(["", "--clack-timings", "build"]) == (
+        ["", "build"],
+        "-",
+    )
+    assert timings.pop_option(["", "--", "--clack-timings"]) == (
+        ["", "--", "--clack-timings"],
+        None,
+    )
+
+
+def test_profile(tmp_path: Path) -> None:
+    """Test the --profile option."""
+
+    def run_profiled(cfg: Config) -> int:
+        # The --profile option is NOT part of the application's config.
+        assert not hasattr(cfg, "profile")
+        assert not hasattr(cfg, "clack_profile")
+        if cfg.do_stuff:
+            raise KeyboardInterrupt
+        return 0
+
+    app = clack.ClackApp("test_profile", run_profiled)
+
+    pstats_file = tmp_path / "runner.pstats"
+    assert app.run(["", "--profile", str(pstats_file)]) == 0
+    stats = pstats.Stats(str(pstats_file)).stats  # type: ignore[attr-defined]
+    profiled_funcs = {name for _, _, name in stats}
+    assert "run_profiled" in profiled_funcs
+    assert "from_cli_args" not in profiled_funcs
+
+    # The profile must still be written when the runner is interrupted.
+    pstats_file.unlink()
+    assert app.run(["", "--profile", str(pstats_file), "--do-stuff"]) == 130
+    assert pstats_file.is_file()
+
+    folded_file = tmp_path / "main.folded"
+    assert app.run(["", f"--profile={folded_file}@main"]) == 0
+    lines = folded_file.read_text().splitlines()
+    assert lines
+    assert all(re.fullmatch(r"[^;]+(;[^;]+)* [0-9]+", line) for line in lines)
+    assert any("from_cli_args" in line for line in lines)
+
+    assert Profile.from_arg("+", "test_profile") == Profile(
+        get_default_logfile("test_profile").with_suffix(".pstats"), "runner"
+    )
+    assert Profile.from_arg("+foo.folded@main", "test_profile") == Profile(
+        get_default_logfile("foo").with_suffix(".folded"), "main"
+    )
+    with pytest.raises(SystemExit):
+        app.run(["", "--profile", "foo.pstats@bad"])
+
+
+def test_clack_envvars_export() -> None:
+    """Test that clack variables can be exported to child processes."""
+    with dyn.clack_envvars_set("test_clack", [Config]):
+        cfg = Config(do_stuff=True)
+
+    with dyn.clack_envvars_set("test_clack", [Config], cfg=cfg):
+        assert "CLACK_APP_NAME" not in os.environ
+
+        with clack.clack_envvars_export():
+            output = subprocess.check_output(
+                [
+                    sys.executable,
+                    "-c",
+                    (
+                        "from clack import _dynvars as dyn; from tests.shared"
+                        " import Config; print(dyn.get_app_name(),"
+                        " dyn.get_config(Config).do_stuff)"
+                    ),
+                ],
+                text=True,
+            )
+
+        assert "CLACK_APP_NAME" not in os.environ
+
+    assert output.strip() == "test_clack True"
+
+
+def test_config_defaults_are_memoized(mocker: MockerFixture) -> None:
+    """Test that config defaults are only computed once per Config type."""
+    dyn._CONFIG_DEFAULTS_CACHE.pop(Config, None)
+    spy = mocker.spy(dyn, "_config_defaults_from_config_type")
+
+    for _ in range(3):
+        with dyn.clack_envvars_set("test_clack", [Config]):
+            cfg = Config.from_cli_args(["", "--do-stuff"])
+            assert dyn.get_config_defaults()["do_stuff"] is False
+
+    assert cfg.do_stuff
+    spy.assert_called_once_with(Config)
+
+
+def test_config_defaults_are_isolated() -> None:
+    """Test that memoized config defaults are NOT shared between contexts."""
+
+    class ListConfig(Config):
+        """A Config type that has a mutable default value."""
+
+        items: List[int] = [1]
+
+    with dyn.clack_envvars_set("test_clack", [ListConfig]):
+        dyn.get_config_defaults()["items"].append(2)
+
+    with dyn.clack_envvars_set("test_clack", [ListConfig]):
+        assert dyn.get_config_defaults()["items"] == [1]
+
+    # The defaults cache must NOT keep Config types alive.
+    config_type_ref = weakref.ref(ListConfig)
+    del ListConfig
+    gc.collect()
+    assert config_type_ref() is None
+
+
+def test_get_config_is_cached() -> None:
+    """Test that clack.get_config() only constructs each Config type once."""
+
+    class SubConfig(Config):
+        """A subclass of the active Config type."""
+
+        extra: int = 3
+
+    with dyn.clack_envvars_set("test_clack", [Config]):
+        cfg = Config(do_stuff=True)
+
+    with dyn.clack_envvars_set("test_clack", [Config], cfg=cfg):
+        assert clack.get_config(Config) is cfg
+        assert clack.get_config(clack.Config) is cfg
+
+        sub_cfg = clack.get_config(SubConfig)
+        assert isinstance(sub_cfg, SubConfig)
+        assert sub_cfg.do_stuff
+        assert sub_cfg.extra == 3
+        assert clack.get_config(SubConfig) is sub_cfg
+
+
 def test_config_is_immutable() -> None:
     """Test that the Config object's attributes are immutable."""
-    with dyn.clack_envvars_set("test_clack", [Config]):  # type: ignore[list-item]
+    with dyn.clack_envvars_set("test_clack", [Config]):  # type: ignore[list-item,unused-ignore]
         cfg = Config.from_cli_args(["", "--do-stuff"])
         assert cfg.do_stuff
 
-        with pytest.raises(TypeError):
+        with pytest.raises(ValidationError if PYDANTIC_V2 else TypeError):
             cfg.do_stuff = False
 
 
@@ -56,3 +489,42 @@ def test_config_file(make_config_file: MakeConfigFile) -> None:
         ("foo", "KUNG"),
         ("fool", "FOOL"),
     ]
+
+
+def test_lazy_imports() -> None:
+    """Test that a bare `import clack` does NOT import clack's dependencies."""
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            "-c",
+            (
+                "import sys; import clack; print(*sys.modules); print('---');"
+                " clack.xdg, clack.types; print(*sys.modules); print('---');"
+                " clack.Config; print(*sys.modules)"
+            ),
+        ],
+        text=True,
+    )
+    bare_modules, light_modules, config_modules = (
+        set(chunk.split()) for chunk in output.split("---")
+    )
+
+    heavy_modules = {
+        "argparse",
+        "eris",
+        "importlib.metadata",
+        "inspect",
+        "logrus",
+        "pydantic",
+        "pytest",
+        "typist",
+        "yaml",
+    }
+    assert not heavy_modules & bare_modules
+    assert not {m for m in bare_modules if m.startswith("clack.")}
+
+    assert {"clack.types", "clack.xdg"} <= light_modules
+    assert not heavy_modules & light_modules
+
+    assert {"clack._config", "pydantic"} <= config_modules
+    assert "yaml" not in config_modules
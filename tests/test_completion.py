@@ -0,0 +1,223 @@
+"""Tests for the static shell completion scripts (see clack._completion)."""
+
+from __future__ import annotations
+
+from argparse import ArgumentParser
+import shutil
+import subprocess
+from typing import Any, Dict, List, Literal, Sequence
+
+import pytest
+
+import clack
+from clack import _completion
+
+
+class Config(clack.Config):
+    """Shared Config for the completion test application."""
+
+    command: Literal["build", "deploy"]
+
+
+class BuildConfig(Config):
+    """Config for the 'build' sub-command."""
+
+    command: Literal["build"]
+    mode: str = "debug"
+
+
+class DeployConfig(Config):
+    """Config for the 'deploy' sub-command."""
+
+    command: Literal["deploy"]
+    project: str = ""
+
+
+BUILT_LAZY_COMMANDS: List[str] = []
+
+
+def build_deploy(parser: ArgumentParser) -> None:
+    """Builds the (lazy) 'deploy' sub-command's parser."""
+    BUILT_LAZY_COMMANDS.append("deploy")
+    parser.add_argument("-p", "--project")
+    parser.add_argument("--count", type=int)
+
+
+def clack_parser(argv: Sequence[str]) -> Dict[str, Any]:
+    """Parses the completion test application's command-line arguments."""
+    parser = clack.Parser()
+    new_command = clack.new_command_factory(parser)
+    build_parser = new_command("build", help="Build it.", aliases=["b"])
+    build_parser.add_argument("--mode", choices=["debug", "release"])
+    build_parser.add_argument("targets", nargs="*")
+    new_command("deploy", help="Deploy it.", builder=build_deploy)
+    return vars(parser.parse_args(argv[1:]))
+
+
+def run_build(cfg: BuildConfig) -> int:
+    """Runner for the 'build' sub-command."""
+    del cfg
+    return 0
+
+
+def run_deploy(cfg: DeployConfig) -> int:
+    """Runner for the 'deploy' sub-command."""
+    del cfg
+    return 0
+
+
+main = clack.main_factory(
+    "test_completion", runners=[run_build, run_deploy], parser=clack_parser
+)
+
+COMPLETE_SCRIPT = """
+source "$1"
+shift
+COMP_WORDS=("$@")
+COMP_CWORD=$((${#COMP_WORDS[@]} - 1))
+_clack_test_completion
+printf '%s\\n' "${COMPREPLY[@]}"
+"""
+
+
+@pytest.mark.skipif(shutil.which("bash") is None, reason="requires bash")
+@pytest.mark.parametrize(
+    "words,expected",
+    [
+        ([""], ["build", "b", "deploy"]),
+        (["-c", "foo.yml", "b", "--"], ["--help", "--mode"]),
+        (["build", "--mode", ""], ["debug", "release"]),
+        (["-v", "deploy", "--count", "3", "-p"], ["-p"]),
+        (["deploy", "--project", ""], ["alpha", "beta"]),
+        (["deploy", "--project", "=", "a"], ["alpha"]),
+        (["--log", "std"], ["stderr", "stdout"]),
+        # The --clack-timings option never consumes the next word.
+        (["--clack-timings", ""], ["build", "b", "deploy"]),
+        (["--clack-timings", "=", "test_"], ["test_completion.bash"]),
+    ],
+)
+def test_bash_completion(
+    tmp_path: Any, words: List[str], expected: List[str]
+) -> None:
+    """Test the bash completion script by completing some command-lines."""
+    script = tmp_path / "test_completion.bash"
+    script.write_text(
+        main.completion_script(
+            dynamic={"--project": "printf 'alpha\\nbeta\\n'"}
+        )
+    )
+
+    proc = subprocess.run(
+        ["bash", "-c", COMPLETE_SCRIPT, "bash", str(script)]
+        + ["test_completion", *words],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+    )
+
+    assert proc.stdout.split() == expected
+
+
+def test_completion_builds_lazy_commands() -> None:
+    """Test that lazy sub-commands are walked (and built) by the generator."""
+    BUILT_LAZY_COMMANDS.clear()
+
+    script = main.completion_script("zsh")
+
+    assert BUILT_LAZY_COMMANDS == ["deploy"]
+    assert script.startswith("#compdef test_completion\n")
+    assert "'#0:deploy') cpath=/deploy; npos=0; continue ;;" in script
+    assert "-h --help -p --project --count; return 0 ;;" in script
+    assert "compdef _clack_test_completion test_completion" in script
+
+
+def test_dynamic_completion_is_cached(tmp_path: Any) -> None:
+    """Test that the output of dynamic commands is cached."""
+    if shutil.which("bash") is None:  # pragma: no cover
+        pytest.skip("requires bash")
+
+    counter = tmp_path / "counter"
+    script = tmp_path / "test_completion.bash"
+    script.write_text(
+        main.completion_script(
+            dynamic={"project": f"echo x >>{counter}; echo alpha"}
+        )
+    )
+
+    for _ in range(3):
+        proc = subprocess.run(
+            ["bash", "-c", COMPLETE_SCRIPT, "bash", str(script)]
+            + ["test_completion", "deploy", "-p", ""],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        assert proc.stdout.split() == ["alpha"]
+
+    assert counter.read_text() == "x\n"
+
+
+def test_completion_main(capsys: pytest.CaptureFixture[str]) -> None:
+    """Test the main() function of the clack-completion script."""
+    exit_status = _completion.main(
+        ["tests.test_completion:main", "--shell", "bash"]
+    )
+
+    assert exit_status == 0
+    assert (
+        "complete -F _clack_test_completion test_completion"
+        in capsys.readouterr().out
+    )
+
+
+@pytest.mark.parametrize("shell", ["bash", "zsh"])
+def test_completion_script_syntax(tmp_path: Any, shell: str) -> None:
+    """Test that the generated scripts are syntactically valid."""
+    if shutil.which(shell) is None:  # pragma: no cover
+        pytest.skip(f"requires {shell}")
+
+    script = tmp_path / f"test_completion.{shell}"
+    script.write_text(
+        main.completion_script(
+            shell,  # type: ignore[arg-type]
+            dynamic={"--project": "printf 'alpha\\nbeta\\n'"},
+        )
+    )
+
+    subprocess.run([shell, "-n", str(script)], check=True)
+
+
+def test_dynamic_cache_keys() -> None:
+    """Test that dynamic commands are cached per sub-command and dest."""
+    parser = ArgumentParser(prog="keys")
+    subparsers = parser.add_subparsers(dest="command")
+    for name in ["foo", "bar"]:
+        subparsers.add_parser(name).add_argument("--name")
+
+    script = _completion.completion_script(parser, dynamic={"name": "echo x"})
+
+    assert "_clack_keys_dynamic foo%2Fname 'echo x'" in script
+    assert "_clack_keys_dynamic bar%2Fname 'echo x'" in script
+
+
+def test_only_clack_parsers_are_intercepted() -> None:
+    """Test that parsers NOT created by clack.Parser() parse normally."""
+
+    def pre_parsing_parser(argv: Sequence[str]) -> Dict[str, Any]:
+        pre_parser = ArgumentParser(add_help=False)
+        pre_parser.add_argument("--mode")
+        pre_parser.parse_known_args(argv[1:])
+        return clack_parser(argv)
+
+    app = clack.main_factory(
+        "test_completion",
+        runners=[run_build, run_deploy],
+        parser=pre_parsing_parser,
+    )
+    old_parse_known_args = ArgumentParser.parse_known_args
+
+    script = app.completion_script()
+
+    assert "-h --help -p --project --count; return 0 ;;" in script
+    assert ArgumentParser.parse_known_args is old_parse_known_args
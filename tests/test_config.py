@@ -0,0 +1,211 @@
+"""Tests for the clack.Config class and its config file discovery logic."""
+
+import os
+from pathlib import Path
+import time
+from typing import Any, Dict, List, Optional
+
+from _pytest.monkeypatch import MonkeyPatch
+import pytest
+from pytest import fixture
+from pytest_mock.plugin import MockerFixture
+
+import clack
+from clack import (
+    JSONConfigFile,
+    MsgpackConfigFile,
+    YAMLConfigFile,
+    _config_file,
+    _dynvars as dyn,
+    clack_envvars_set,
+)
+from clack._config import (
+    config_settings_from_app_name,
+    config_settings_from_config_file,
+)
+from clack._config_file import DOCUMENT_CACHE
+from clack._discovery import DirectoryScanner
+from clack._pydantic import config_to_dict, get_config_setting
+
+
+@fixture(name="xdg_config")
+def xdg_config_fixture(monkeypatch: MonkeyPatch, tmp_path: Path) -> Path:
+    """Returns a temporary XDG config dir (and chdirs to a temporary CWD)."""
+    xdg_config = tmp_path / ".config"
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(xdg_config))
+
+    cwd = tmp_path / "cwd"
+    cwd.mkdir()
+    monkeypatch.chdir(cwd)
+
+    return xdg_config
+
+
+def test_discovery_without_config_files(xdg_config: Path) -> None:
+    """Test config file discovery when no config files exist."""
+    del xdg_config
+
+    scanner = DirectoryScanner()
+    result = config_settings_from_app_name(
+        [YAMLConfigFile], "app", scanner=scanner
+    )
+
+    assert result == {}
+    assert scanner.fs_calls <= 3
+
+
+def test_discovery_probe_budget(xdg_config: Path) -> None:
+    """Test that config file discovery stays within its probe budget."""
+    YAMLConfigFile.new(xdg_config / "clack" / "global.yml", foo="G", bar=1)
+    YAMLConfigFile.new(xdg_config / "app" / "config.yaml", foo="U", baz=2)
+    local_config_file = YAMLConfigFile.new(Path(".app/app.yml"), foo="L")
+
+    scanner = DirectoryScanner()
+    result = config_settings_from_app_name(
+        [YAMLConfigFile], "app", scanner=scanner
+    )
+
+    config_file = result.pop("config_file")
+    assert config_file.path == local_config_file.path
+    assert result == {"bar": 1, "baz": 2, "foo": "L"}
+    # One os.scandir() call for each of the following directories:
+    #   ~/.config/clack, ~/.config/app, ./, and ./.app
+    assert scanner.fs_calls <= 4
+
+
+def test_multi_format_discovery(xdg_config: Path) -> None:
+    """Test config file discovery when multiple formats are enabled."""
+    pytest.importorskip("msgpack")
+
+    JSONConfigFile.new(xdg_config / "clack" / "global.json", foo="G", bar=1)
+    YAMLConfigFile.new(xdg_config / "app" / "config.yml", foo="U", baz=2)
+    JSONConfigFile.new(xdg_config / "app" / "config.json", foo="J", baz=3)
+    local_config_file = MsgpackConfigFile.new(Path(".app/app.msgpack"), qux=4)
+
+    scanner = DirectoryScanner()
+    result = config_settings_from_app_name(
+        [YAMLConfigFile, JSONConfigFile, MsgpackConfigFile],
+        "app",
+        scanner=scanner,
+    )
+
+    config_file = result.pop("config_file")
+    assert isinstance(config_file, MsgpackConfigFile)
+    assert config_file.path == local_config_file.path
+    # The YAML config file is preferred over the JSON config file.
+    assert result == {"bar": 1, "baz": 2, "foo": "U", "qux": 4}
+    assert scanner.fs_calls <= 4
+
+
+def test_config_file_option_uses_file_suffix(tmp_path: Path) -> None:
+    """Test that the -c/--config option picks parsers by file suffix."""
+    json_path = tmp_path / "app.json"
+    JSONConfigFile.new(json_path, foo="J")
+
+    result = config_settings_from_config_file([YAMLConfigFile], json_path)
+    assert isinstance(result.pop("config_file"), JSONConfigFile)
+    assert result == {"foo": "J"}
+
+    with clack_envvars_set("app", [clack.Config]):
+        args = clack.Parser().parse_args(["-c", str(json_path)])
+    assert isinstance(args.config_file, JSONConfigFile)
+
+
+def test_config_cache(mocker: MockerFixture, xdg_config: Path) -> None:
+    """Test the (opt-in) on-disk cache of merged config settings."""
+    YAMLConfigFile.new(xdg_config / "clack" / "global.yml", foo="G", bar=1)
+    YAMLConfigFile.new(Path(".app/app.yml"), foo="L")
+    yaml_load = mocker.spy(_config_file, "yaml_load")
+
+    def settings() -> Dict[str, Any]:
+        DOCUMENT_CACHE.clear()
+        result = config_settings_from_app_name(
+            [YAMLConfigFile], "app", use_cache=True
+        )
+        result["config_file"] = result["config_file"].path
+        return result
+
+    old_times = iter(range(3600, 0, -60))
+
+    def backdate() -> None:
+        # Config cache entries are NOT trusted when the files / directories
+        # they depend on have been modified very recently.
+        old_time = time.time() - next(old_times)
+        for top in [xdg_config, Path.cwd()]:
+            for root, dirs, files in os.walk(top):
+                for name in [root, *dirs, *files]:
+                    os.utime(os.path.join(root, name), (old_time, old_time))
+
+    backdate()
+    expected = {"bar": 1, "config_file": Path(".app/app.yml"), "foo": "L"}
+    assert settings() == expected
+    assert yaml_load.call_count == 2
+
+    # Warm start...
+    assert settings() == expected
+    assert yaml_load.call_count == 2
+
+    # A loaded config file changes...
+    YAMLConfigFile.new(Path(".app/app.yml"), foo="LL")
+    backdate()
+    assert settings() == {**expected, "foo": "LL"}
+
+    # A config file with a higher precedence is created...
+    YAMLConfigFile.new(Path("app.yml"), foo="CWD")
+    backdate()
+    assert settings() == {
+        **expected,
+        "config_file": Path("app.yml"),
+        "foo": "CWD",
+    }
+
+    # A config file is created in a directory that did NOT exist before...
+    YAMLConfigFile.new(xdg_config / "app" / "config.yml", baz=2)
+    backdate()
+    assert settings() == {
+        **expected,
+        "baz": 2,
+        "config_file": Path("app.yml"),
+        "foo": "CWD",
+    }
+
+    yaml_load.reset_mock()
+    assert settings()["baz"] == 2
+    assert yaml_load.call_count == 0
+
+
+class SourcesConfig(clack.Config):
+    """Config used to test clack.Config's settings sources."""
+
+    foo: str = "default"
+    bar: int = 0
+    baz: Optional[int] = None
+    items: List[int] = []
+
+
+def test_config_settings_sources(
+    monkeypatch: MonkeyPatch, xdg_config: Path
+) -> None:
+    """Test where clack.Config loads its values from (on any pydantic)."""
+    YAMLConfigFile.new(xdg_config / "app" / "config.yml", foo="F", bar="2")
+    monkeypatch.setenv("BAR", "3")
+
+    with clack_envvars_set("app", [SourcesConfig]):
+        cfg = SourcesConfig(items=["1", "2"])
+        assert dyn.get_config_defaults() == {
+            "config_file": None,
+            "logs": [],
+            "verbose": 0,
+            "foo": "default",
+            "bar": 0,
+            "baz": None,
+            "items": [],
+        }
+
+    assert (cfg.foo, cfg.bar, cfg.items) == ("F", 3, [1, 2])
+    assert isinstance(cfg.config_file, YAMLConfigFile)
+    assert config_to_dict(cfg)["bar"] == 3
+    assert get_config_setting(SourcesConfig, "use_config_cache", None) is False
+    assert get_config_setting(SourcesConfig, "config_file_types", None) == [
+        YAMLConfigFile
+    ]
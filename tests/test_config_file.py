@@ -0,0 +1,362 @@
+"""Tests for the ClackConfigFile protocol's implementations."""
+
+# NOTE: pylint infers that eris's Result.unwrap() always raises.
+# pylint: disable=unreachable
+
+import os
+from pathlib import Path
+import stat
+import sys
+from types import SimpleNamespace
+from typing import Any, Dict, List, Type
+
+from eris import ErisError, Err
+import pytest
+from pytest_mock.plugin import MockerFixture
+import yaml
+
+from clack import (
+    YAML_BACKEND,
+    JSONConfigFile,
+    MsgpackConfigFile,
+    TOMLConfigFile,
+    YAMLConfigFile,
+    _config_file,
+)
+from clack._config_file import (
+    CONFIG_FILE_TYPES,
+    DOCUMENT_CACHE,
+    ConfigFileBase,
+    DocumentCache,
+    _find_yaml_backend,
+    config_file_type_from_path,
+    yaml_load,
+)
+from clack.pytest_plugin import MakeConfigFile
+from clack.types import (
+    ClackBulkConfigFile,
+    ClackConfigDocument,
+    ClackConfigFile,
+)
+
+
+# Maps config file types to the optional modules that they depend on.
+_OPTIONAL_MODULES: Dict[Type[Any], List[str]] = {
+    TOMLConfigFile: ["tomli_w"] + (
+        ["tomli"] if sys.version_info < (3, 11) else []
+    ),
+    MsgpackConfigFile: ["msgpack"],
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_document_cache() -> None:
+    """Make sure that every test starts with an empty document cache."""
+    DOCUMENT_CACHE.clear()
+
+
+def test_yaml_files_are_parsed_once(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    """Test that we only parse a YAML file again after it changes."""
+    yaml_load_spy = mocker.spy(_config_file, "yaml_load")
+    cf = YAMLConfigFile.new(tmp_path / "clack.yml", foo="FOO", bar=[1, 2])
+
+    assert cf.to_dict().unwrap() == {"foo": "FOO", "bar": [1, 2]}
+    assert cf.get("foo").unwrap() == "FOO"
+    assert YAMLConfigFile(cf.path).get("bar").unwrap() == [1, 2]
+    assert yaml_load_spy.call_count == 1
+
+    assert cf.set("foo", "KUNG").unwrap() == "FOO"
+    assert cf.get("foo").unwrap() == "KUNG"
+    assert yaml_load_spy.call_count == 2
+
+
+def test_bulk_reads(make_config_file: MakeConfigFile) -> None:
+    """Test the get_many() and load() ClackBulkConfigFile methods."""
+    cf = make_config_file("clack.yml", **{f"k{i}": i for i in range(50)})
+    assert isinstance(cf, ClackBulkConfigFile)
+
+    assert cf.get_many(["k1", "k3"]).unwrap() == {"k1": 1, "k3": 3}
+    assert isinstance(cf.get_many(["k1", "not_a_key"]), Err)
+
+    doc = cf.load().unwrap()
+    assert isinstance(doc, ClackConfigDocument)
+    assert doc.get("k5").unwrap() == 5
+    assert isinstance(doc.get("not_a_key"), Err)
+    assert doc.get_many(["k7", "k9"]).unwrap() == {"k7": 7, "k9": 9}
+    assert sorted(doc.keys()) == sorted(f"k{i}" for i in range(50))
+    assert doc.to_dict() == cf.to_dict().unwrap()
+
+
+@pytest.mark.parametrize(
+    "contents", ['"foo": 1\nbar: 2\n', "{foo: 1, bar: 2}\n", "? foo\n: 1\n"]
+)
+def test_yaml_set_unmatched_existing_key(
+    tmp_path: Path, contents: str
+) -> None:
+    """Test that YAML keys we can't edit in place are NOT duplicated."""
+    path = tmp_path / "clack.yml"
+    path.write_text(contents)
+    cf = YAMLConfigFile(path)
+
+    cf.set("foo", 3).unwrap()
+
+    assert cf.get("foo").unwrap() == 3
+    assert yaml.safe_load(path.read_text())["foo"] == 3
+    assert path.read_text().count("foo") == 1
+
+
+def test_bulk_reads_from_empty_file(tmp_path: Path) -> None:
+    """Test that an empty config file is treated like an empty dict."""
+    path = tmp_path / "clack.yml"
+    path.write_text("")
+    cf = YAMLConfigFile(path)
+
+    assert isinstance(cf.get("foo"), Err)
+    assert isinstance(cf.get_many(["foo"]), Err)
+    assert cf.get_many([]).unwrap() == {}
+    assert cf.to_dict().unwrap() == {}
+
+    doc = cf.load().unwrap()
+    assert isinstance(doc.get("foo"), Err)
+    assert doc.keys() == []
+    assert doc.to_dict() == {}
+
+
+def test_get_many_parses_once(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Test that YAMLConfigFile.get_many() only parses its file once."""
+    cf = YAMLConfigFile.new(tmp_path / "clack.yml", foo=1, bar=2, baz=3)
+    yaml_load_spy = mocker.spy(_config_file, "yaml_load")
+
+    assert cf.get_many(["foo", "bar", "baz"]).unwrap() == {
+        "foo": 1,
+        "bar": 2,
+        "baz": 3,
+    }
+    assert yaml_load_spy.call_count == 1
+
+
+def test_cached_documents_are_read_only(tmp_path: Path) -> None:
+    """Test that callers cannot corrupt the document cache."""
+    cf = YAMLConfigFile.new(tmp_path / "clack.yml", foo={"bar": [1, 2]})
+
+    config_dict = cf.to_dict().unwrap()
+    config_dict["foo"]["bar"].append(3)
+    config_dict["foo"]["baz"] = True
+
+    assert cf.to_dict().unwrap() == {"foo": {"bar": [1, 2]}}
+    with pytest.raises(TypeError):
+        DOCUMENT_CACHE.get(cf.path, yaml_load)["foo"]["baz"] = True
+
+
+def test_document_cache_eviction(tmp_path: Path) -> None:
+    """Test that the least recently used documents are evicted first."""
+    paths = []
+    for name in ["a", "b", "c"]:
+        path = tmp_path / f"{name}.yml"
+        path.write_text(f"name: {name}\n")
+        paths.append(path)
+
+    file_size = paths[0].stat().st_size
+    cache = DocumentCache(max_bytes=2 * file_size)
+    parsed_paths = []
+
+    def parse(data: bytes) -> object:
+        result = yaml_load(data)
+        parsed_paths.append(result["name"])
+        return result
+
+    for path in [paths[0], paths[1], paths[0], paths[2], paths[0], paths[1]]:
+        cache.get(path, parse)
+
+    assert parsed_paths == ["a", "b", "c", "b"]
+
+
+def test_yaml_backend() -> None:
+    """Test that we use libyaml (when available) and fall back otherwise."""
+    if yaml.__with_libyaml__:
+        assert YAML_BACKEND == "libyaml"
+    else:
+        assert YAML_BACKEND == "python"
+
+    pure_yaml = SimpleNamespace(
+        SafeLoader=yaml.SafeLoader, SafeDumper=yaml.SafeDumper
+    )
+    backend = _find_yaml_backend(pure_yaml)  # type: ignore[arg-type]
+    assert backend.name == "python"
+    assert backend.loader is yaml.SafeLoader
+    assert backend.dumper is yaml.SafeDumper
+
+
+def test_set_many(mocker: MockerFixture, tmp_path: Path) -> None:
+    """Test that YAMLConfigFile.set_many() parses and writes files once."""
+    cf = YAMLConfigFile.new(tmp_path / "clack.yml", foo=1, bar=2)
+    cf.path.chmod(0o600)
+    yaml_load_spy = mocker.spy(_config_file, "yaml_load")
+    replace = mocker.spy(os, "replace")
+
+    old_values = cf.set_many({"foo": 3, "baz": 4}, allow_new=True).unwrap()
+
+    assert old_values == {"foo": 1, "baz": None}
+    assert cf.to_dict().unwrap() == {"foo": "3", "bar": 2, "baz": "4"}
+    assert yaml_load_spy.call_count == 2
+    assert replace.call_count == 1
+    assert stat.S_IMODE(cf.path.stat().st_mode) == 0o600
+    assert [p.name for p in tmp_path.iterdir()] == ["clack.yml"]
+
+
+def test_set_many_through_symlink(tmp_path: Path) -> None:
+    """Test that writing to a symlinked config file preserves the symlink."""
+    real_dir = tmp_path / "dotfiles"
+    real_dir.mkdir()
+    real_cf = YAMLConfigFile.new(real_dir / "clack.yml", foo=1)
+    real_cf.path.chmod(0o640)
+    # Only privileged users can give files away to other users.
+    owner = (12345, 12345) if os.geteuid() == 0 else None
+    if owner is not None:
+        os.chown(real_cf.path, *owner)
+
+    link = tmp_path / "clack.yml"
+    link.symlink_to(real_cf.path)
+    cf = YAMLConfigFile(link)
+
+    assert cf.set_many({"foo": 2, "bar": 3}, allow_new=True).unwrap() == {
+        "foo": 1,
+        "bar": None,
+    }
+    assert link.is_symlink()
+    assert real_cf.to_dict().unwrap() == {"foo": "2", "bar": "3"}
+
+    real_stat = real_cf.path.stat()
+    assert stat.S_IMODE(real_stat.st_mode) == 0o640
+    if owner is not None:
+        assert (real_stat.st_uid, real_stat.st_gid) == owner
+    assert sorted(p.name for p in real_dir.iterdir()) == ["clack.yml"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "clack.yml",
+        "dotfiles",
+    ]
+
+
+def test_set_many_is_all_or_nothing(tmp_path: Path) -> None:
+    """Test that set_many() does NOT write anything if a key is missing."""
+    cf = YAMLConfigFile.new(tmp_path / "clack.yml", foo=1)
+    old_contents = cf.path.read_text()
+
+    assert isinstance(cf.set_many({"foo": 2, "bar": 3}).result(), Err)
+    assert cf.path.read_text() == old_contents
+
+
+def test_transaction(tmp_path: Path) -> None:
+    """Test the YAMLConfigFile.transaction() context manager."""
+    cf = YAMLConfigFile.new(tmp_path / "clack.yml", foo=1, bar=2)
+
+    with cf.transaction() as tx:
+        tx.set("foo", "a")
+        tx.set_many({"bar": "b"})
+    assert cf.to_dict().unwrap() == {"foo": "a", "bar": "b"}
+
+    with pytest.raises(ValueError):
+        with cf.transaction() as tx:
+            tx.set("foo", "c")
+            raise ValueError
+    assert cf.get("foo").unwrap() == "a"
+
+    with pytest.raises(ErisError):
+        with cf.transaction() as tx:
+            tx.set("not_a_key", "d")
+    assert cf.to_dict().unwrap() == {"foo": "a", "bar": "b"}
+
+
+@pytest.mark.parametrize("config_file_type", CONFIG_FILE_TYPES)
+def test_config_file_formats(
+    config_file_type: Type[ClackConfigFile], tmp_path: Path
+) -> None:
+    """Test every config file format that clack supports."""
+    for module_name in _OPTIONAL_MODULES.get(config_file_type, []):
+        pytest.importorskip(module_name)
+
+    ext = config_file_type.extensions[0]
+    cf = config_file_type.new(
+        tmp_path / f"clack.{ext}", foo="FOO", bar=[1, 2], baz={"a": True}
+    )
+
+    assert isinstance(cf, ClackBulkConfigFile)
+    assert cf.to_dict().unwrap() == {
+        "foo": "FOO",
+        "bar": [1, 2],
+        "baz": {"a": True},
+    }
+    assert cf.get_many(["foo", "bar"]).unwrap() == {
+        "foo": "FOO",
+        "bar": [1, 2],
+    }
+
+    old_values = cf.set_many({"foo": "KUNG", "new": "NEW"}, allow_new=True)
+    assert old_values.unwrap() == {"foo": "FOO", "new": None}
+    assert cf.get("foo").unwrap() == "KUNG"
+    assert cf.get("new").unwrap() == "NEW"
+    assert isinstance(cf.set("not_a_key", 1).result(), Err)
+
+
+def test_basic_config_file_protocol(tmp_path: Path) -> None:
+    """Test that bulk methods are NOT required by ClackConfigFile."""
+
+    class BasicConfigFile:
+        """Config file type that only implements the basic protocol."""
+
+        extensions: List[str] = ["basic"]
+
+        def __init__(self, path: Path) -> None:
+            self.path = path
+
+        def get(self, key: str) -> Any:
+            """Not implemented."""
+
+        @classmethod
+        def new(cls, path: Path, **kwargs: Any) -> "BasicConfigFile":
+            """Not implemented."""
+            del kwargs
+            return cls(path)
+
+        def set(self, key: str, value: Any, *, allow_new: bool = False) -> Any:
+            """Not implemented."""
+
+        def to_dict(self) -> Any:
+            """Not implemented."""
+
+    cf: object = BasicConfigFile.new(tmp_path / "clack.basic")
+    assert isinstance(cf, ClackConfigFile)
+    assert not isinstance(cf, ClackBulkConfigFile)
+
+
+def test_config_file_base_is_abstract(tmp_path: Path) -> None:
+    """Test that ConfigFileBase subclasses MUST define parse() and dump()."""
+
+    # pylint: disable-next=abstract-method
+    class ParseOnlyConfigFile(ConfigFileBase):
+        """Config file type that forgot to define dump()."""
+
+        @staticmethod
+        def parse(data: bytes) -> Any:
+            """Parses nothing."""
+            del data
+            return {}
+
+    with pytest.raises(TypeError, match="dump"):
+        # pylint: disable-next=abstract-class-instantiated
+        ParseOnlyConfigFile(tmp_path / "foo.conf")  # type: ignore[abstract]
+
+
+def test_config_file_type_from_path() -> None:
+    """Test that config file types are chosen using file extensions."""
+    assert config_file_type_from_path("foo.yaml") is YAMLConfigFile
+    assert config_file_type_from_path("foo.TOML") is TOMLConfigFile
+    assert config_file_type_from_path("foo.json") is JSONConfigFile
+    assert config_file_type_from_path("foo.msgpack") is MsgpackConfigFile
+    assert config_file_type_from_path("foo.conf") is YAMLConfigFile
+    assert (
+        config_file_type_from_path("foo.conf", [JSONConfigFile])
+        is JSONConfigFile
+    )
@@ -0,0 +1,269 @@
+"""Tests for clack's warm daemon mode (see clack._daemon)."""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from pathlib import Path
+import select
+import signal
+import subprocess
+import sys
+import time
+from typing import Iterator, Sequence
+
+import pytest
+from pytest import fixture
+from pytest_mock.plugin import MockerFixture
+
+import clack
+from clack import _daemon, _daemon_client, xdg
+
+
+class Config(clack.Config):
+    """Test Config for daemon runs."""
+
+    status: int = 0
+    wait: bool = False
+
+    @classmethod
+    def from_cli_args(cls, argv: Sequence[str]) -> Config:
+        """Constructs a new Config object from command-line arguments."""
+        parser = clack.Parser()
+        parser.add_argument("--status", type=int)
+        parser.add_argument("--wait", action="store_true")
+
+        args = parser.parse_args(argv[1:])
+        kwargs = clack.filter_cli_args(args)
+
+        return Config(**kwargs)
+
+
+def run(cfg: Config) -> int:
+    """Runner function."""
+    if cfg.wait:
+        try:
+            print(f"waiting pid={os.getpid()}", flush=True)
+            # NOTE: We can't use time.sleep() since time is frozen in our tests.
+            select.select([], [], [], 30)
+        except KeyboardInterrupt:
+            print("interrupted")
+            return 42
+        return 1
+
+    print(
+        f"cwd={os.getcwd()} foo={os.environ.get('FOO')}"
+        f" config_dir={xdg.get_base_dir('config')}"
+    )
+    return cfg.status
+
+
+main = clack.main_factory("test_daemon", run)
+
+
+@fixture(name="socket_path")
+def socket_path_fixture(tmp_path: Path) -> Iterator[Path]:
+    """Serves the test_daemon application on the returned socket path."""
+    socket_path = tmp_path / "test_daemon.sock"
+    server = multiprocessing.get_context("fork").Process(
+        target=main.serve,
+        kwargs={"socket_path": socket_path, "poll_interval": 0.1},
+    )
+    server.start()
+    try:
+        for _ in range(100):
+            if socket_path.exists():
+                break
+            time.sleep(0.1)
+
+        yield socket_path
+    finally:
+        server.terminate()
+        server.join(10)
+
+    assert server.exitcode == 128 + 15
+    assert not socket_path.exists()
+
+
+def client_args(*args: str) -> list[str]:
+    """Returns the command-line arguments of a clack-client invocation."""
+    return [sys.executable, "-m", "clack._daemon_client", "test_daemon", *args]
+
+
+def test_serve(socket_path: Path, tmp_path: Path) -> None:
+    """Test that clack-client invocations are served by clack-serve."""
+    client_dir = tmp_path / "client"
+    client_dir.mkdir()
+    home_dir = tmp_path / "home"
+    env = dict(
+        os.environ,
+        FOO="bar",
+        HOME=str(home_dir),
+        CLACK_DAEMON_SOCKET=str(socket_path),
+    )
+    env.pop("XDG_CONFIG_HOME", None)
+    proc = subprocess.run(
+        client_args("--status", "3"),
+        capture_output=True,
+        check=False,
+        cwd=client_dir,
+        env=env,
+        text=True,
+    )
+    assert proc.returncode == 3
+    assert (
+        proc.stdout
+        == f"cwd={client_dir} foo=bar config_dir={home_dir}/.config\n"
+    )
+
+
+def test_client_forwards_signals(socket_path: Path) -> None:
+    """Test that clack-client forwards signals to the application."""
+    env = dict(os.environ, CLACK_DAEMON_SOCKET=str(socket_path))
+    for signum, expected_status in [
+        (signal.SIGINT, 42),
+        (signal.SIGTERM, 128 + signal.SIGTERM),
+    ]:
+        proc = subprocess.Popen(
+            client_args("--wait"), env=env, stdout=subprocess.PIPE, text=True
+        )
+        assert proc.stdout is not None
+        try:
+            assert proc.stdout.readline().startswith("waiting pid=")
+            wait_for_forwarding(proc.pid)
+            proc.send_signal(signum)
+            assert proc.wait(10) == expected_status
+        finally:
+            proc.kill()
+            proc.wait()
+
+
+def test_client_forwards_sigtstp(socket_path: Path) -> None:
+    """Test that suspending clack-client also suspends the application."""
+    env = dict(os.environ, CLACK_DAEMON_SOCKET=str(socket_path))
+    proc = subprocess.Popen(
+        client_args("--wait"), env=env, stdout=subprocess.PIPE, text=True
+    )
+    assert proc.stdout is not None
+    try:
+        line = proc.stdout.readline()
+        assert line.startswith("waiting pid=")
+        app_pid = int(line.split("=")[1])
+        wait_for_forwarding(proc.pid)
+
+        proc.send_signal(signal.SIGTSTP)
+        wait_for_process_state(proc.pid, "T")
+        wait_for_process_state(app_pid, "T")
+
+        proc.send_signal(signal.SIGCONT)
+        wait_for_process_state(app_pid, "S")
+
+        proc.send_signal(signal.SIGINT)
+        assert proc.wait(10) == 42
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def wait_for_forwarding(pid: int) -> None:
+    """Waits until the clack-client process with PID `pid` forwards signals.
+
+    NOTE: The application can start writing to its stdout BEFORE clack-client
+    has received its PID (and has installed its signal handlers).
+    """
+    status_path = Path(f"/proc/{pid}/status")
+    for _ in range(100):
+        for line in status_path.read_text().splitlines():
+            key, _, value = line.partition(":")
+            # SigCgt is the (hex) bitmask of the signals that are caught.
+            if key == "SigCgt" and int(value, 16) >> (signal.SIGTSTP - 1) & 1:
+                return
+        time.sleep(0.1)
+    raise AssertionError(f"Process {pid} never started forwarding signals.")
+
+
+def wait_for_process_state(pid: int, state: str) -> None:
+    """Waits until the process with PID `pid` is in the given `state`."""
+    stat_path = Path(f"/proc/{pid}/stat")
+    for _ in range(100):
+        # NOTE: The process state follows the (parenthesized) process name.
+        if stat_path.read_text().rpartition(")")[2].split()[0] == state:
+            return
+        time.sleep(0.1)
+    raise AssertionError(f"Process {pid} never reached the {state!r} state.")
+
+
+def test_client_without_server(tmp_path: Path) -> None:
+    """Test the clack-client script's exit status when no server exists."""
+    env = dict(os.environ, CLACK_DAEMON_SOCKET=str(tmp_path / "missing.sock"))
+    proc = subprocess.run(
+        [sys.executable, "-m", "clack._daemon_client", "test_daemon"],
+        capture_output=True,
+        check=False,
+        env=env,
+        text=True,
+    )
+    assert proc.returncode == _daemon_client.EXIT_NO_SERVER
+
+
+def test_source_watcher(tmp_path: Path) -> None:
+    """Test that the SourceWatcher class detects source file changes."""
+    source_file = tmp_path / "some_module.py"
+    source_file.write_text("X = 1\n")
+    os.utime(source_file, ns=(1_000_000_000, 1_000_000_000))
+
+    watcher = _daemon.SourceWatcher(extra_paths=[source_file], min_interval=0)
+    assert str(source_file) in watcher.paths
+    assert str(Path(__file__).resolve()) in watcher.paths
+    assert not watcher.changed()
+
+    os.utime(source_file, ns=(2_000_000_000, 2_000_000_000))
+    assert watcher.changed()
+
+
+def test_source_watcher_site_packages() -> None:
+    """Test that installed distributions are watched via site-packages."""
+    # The pytest package was installed into a site-packages directory.
+    site_dir = os.path.dirname(os.path.dirname(pytest.__file__))
+
+    watcher = _daemon.SourceWatcher()
+    assert site_dir in watcher.paths
+    assert not any(
+        path.startswith(os.path.join(site_dir, "")) for path in watcher.paths
+    )
+
+
+def test_source_watcher_rate_limit(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    """Test that the SourceWatcher class only checks for changes so often."""
+    source_file = tmp_path / "some_module.py"
+    source_file.write_text("X = 1\n")
+    os.utime(source_file, ns=(1_000_000_000, 1_000_000_000))
+
+    mock_monotonic = mocker.patch.object(
+        _daemon.time, "monotonic", return_value=100.0
+    )
+    watcher = _daemon.SourceWatcher(extra_paths=[source_file], min_interval=1)
+    os.utime(source_file, ns=(2_000_000_000, 2_000_000_000))
+
+    mock_stat = mocker.spy(_daemon.os, "stat")
+    mock_monotonic.return_value = 100.5
+    assert not watcher.changed()
+    mock_stat.assert_not_called()
+
+    mock_monotonic.return_value = 101.0
+    assert watcher.changed()
+    mock_monotonic.return_value = 101.1
+    assert watcher.changed()
+
+
+def test_client_usage(capsys: pytest.CaptureFixture[str]) -> None:
+    """Test that clack-client prints usage errors to stderr."""
+    assert _daemon_client.main(["clack-client"]) == 2
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert captured.err == "usage: clack-client APP_NAME [ARG ...]\n"
+
+    assert _daemon_client.main(["clack-client", "--help"]) == 0
+    assert "usage: clack-client" in capsys.readouterr().out
@@ -0,0 +1,51 @@
+"""Tests for clack.new_command_factory() and the other helper functions."""
+
+from argparse import ArgumentParser
+from typing import Callable
+
+import pytest
+
+import clack
+from clack import _dynvars as dyn
+
+from .shared import Config
+
+
+def test_lazy_new_command(capsys: pytest.CaptureFixture[str]) -> None:
+    """Test that lazy subcommands are only built if they are chosen."""
+    built = []
+
+    def builder_factory(name: str) -> Callable[[ArgumentParser], None]:
+        def builder(parser: ArgumentParser) -> None:
+            built.append(name)
+            parser.add_argument(f"--{name}", action="store_true")
+
+        return builder
+
+    with dyn.clack_envvars_set("test_clack", [Config]):
+        parser = clack.Parser()
+        new_command = clack.new_command_factory(parser, dest="command")
+        for name in ["bar", "baz", "foo"]:
+            new_command(
+                name,
+                help=f"Test {name.upper()} subcommand.",
+                builder=builder_factory(name),
+                aliases=[name[0] + name],
+            )
+
+        args = parser.parse_args(["ffoo", "--foo"])
+        assert args.command == "ffoo"
+        assert args.foo
+        assert built == ["foo"]
+
+        args = parser.parse_args(["foo"])
+        assert "foo" not in clack.filter_cli_args(args)
+        assert built == ["foo"]
+
+        with pytest.raises(SystemExit):
+            parser.parse_args(["--help"])
+        assert built == ["foo"]
+
+    help_text = capsys.readouterr().out
+    for name in ["bar", "baz", "foo"]:
+        assert f"Test {name.upper()} subcommand." in help_text
@@ -0,0 +1,252 @@
+"""Tests for clack.main_factory() and the ClackApp class."""
+
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import os
+from pathlib import Path
+import sys
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+
+from _pytest.capture import CaptureFixture
+import pytest
+from pytest import fixture
+from pytest_mock.plugin import MockerFixture
+
+import clack
+from clack import _main, _parser
+from clack.types import ClackRunner
+
+from .data.e2e import simple, subcommands
+from .shared import Config
+
+
+def test_main_runners_dispatch(mocker: MockerFixture) -> None:
+    """Test that main() resolves each runner's type hints only once."""
+    spy = mocker.spy(_main, "get_type_hints")
+    main = clack.main_factory(
+        "subcommands",
+        runners=subcommands.ALL_RUNNERS,
+        parser=subcommands.clack_parser,
+    )
+
+    for argv in [
+        ["bar", "5"],
+        ["baz", "--baz"],
+        ["foo", "--foo", "FOO"],
+        ["bar", "6"],
+    ]:
+        assert main(["subcommands"] + argv) == 0
+
+    num_runners = len(subcommands.ALL_RUNNERS)
+    assert spy.call_count == num_runners
+
+
+def test_unhashable_runner(capsys: CaptureFixture) -> None:
+    """Test that runners do NOT need to be hashable."""
+
+    class CountCalls:
+        """Runner decorator that is unhashable, since it defines __eq__()."""
+
+        def __init__(self, run: Callable[[simple.Config], int]) -> None:
+            functools.update_wrapper(self, run)
+            self.run = run
+            self.calls = 0
+
+        def __eq__(self, other: Any) -> bool:
+            return isinstance(other, CountCalls) and self.run == other.run
+
+        def __call__(self, cfg: simple.Config) -> int:
+            self.calls += 1
+            return self.run(cfg)
+
+    run = CountCalls(simple.run)
+    main = clack.main_factory("simple", run)
+
+    assert main(["simple", "--some-bar", "1"]) == 0
+    assert main(["simple", "--some-bar", "2", "--baz"]) == 0
+    assert run.calls == 2
+
+    captured = capsys.readouterr()
+    assert captured.out.splitlines() == [
+        "foo=FOO bar=1 baz=False",
+        "foo=FOO bar=2 baz=True",
+    ]
+
+
+def test_clack_app(mocker: MockerFixture) -> None:
+    """Test the ClackApp class's parse() and run() methods."""
+    runs = []
+
+    def run(cfg: Config) -> int:
+        runs.append(cfg.do_stuff)
+        return 0
+
+    app = clack.ClackApp("test_clack_app", run)
+    cfg = app.parse(["", "--do-stuff"])
+    assert isinstance(cfg, Config)
+    assert cfg.do_stuff is True
+
+    spy = mocker.spy(_main, "init_logging")
+    old_environ = dict(os.environ)
+    for argv in [[""], ["", "--do-stuff"], [""]]:
+        assert app.run(argv) == 0
+    assert os.environ == old_environ
+
+    assert runs == [False, True, False]
+    assert spy.call_count == 1
+
+
+LAZY_APP_CONFIGS = """
+from typing import Literal
+
+import clack
+
+
+class Config(clack.Config):
+    command: Literal["heavy", "status"]
+
+
+class HeavyConfig(Config):
+    command: Literal["heavy"]
+    n: int = 1
+
+
+class StatusConfig(Config):
+    command: Literal["status"]
+
+
+def run_status(cfg: StatusConfig) -> int:
+    print("status")
+    return 0
+"""
+
+LAZY_APP_HEAVY = """
+from .configs import HeavyConfig
+
+
+def run(cfg: HeavyConfig) -> int:
+    print(f"heavy n={cfg.n}")
+    return 0
+"""
+
+
+@fixture(name="lazy_app")
+def lazy_app_fixture(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> Iterator[ModuleType]:
+    """Creates the lazy_app package and returns its configs module."""
+    app_dir = tmp_path / "lazy_app"
+    app_dir.mkdir()
+    (app_dir / "__init__.py").write_text("")
+    (app_dir / "configs.py").write_text(LAZY_APP_CONFIGS)
+    (app_dir / "heavy.py").write_text(LAZY_APP_HEAVY)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    from lazy_app import configs  # type: ignore[import-not-found]
+
+    try:
+        yield configs
+    finally:
+        for name in ["lazy_app", "lazy_app.configs", "lazy_app.heavy"]:
+            sys.modules.pop(name, None)
+
+
+def make_lazy_app_main(
+    configs: ModuleType, n_defaults: List[Any] = None
+) -> clack.ClackApp:
+    """Returns the main() function of the lazy_app package.
+
+    The default value of the 'heavy' sub-command's -n option is appended to
+    `n_defaults` whenever this sub-command's parser is built.
+    """
+    all_runners: List[ClackRunner] = []
+    register_runner = clack.register_runner_factory(all_runners)
+    register_runner(configs.run_status)
+    register_runner(
+        "lazy_app.heavy:run",
+        command="heavy",
+        config="lazy_app.configs:HeavyConfig",
+    )
+    with pytest.raises(AssertionError):
+        register_runner("lazy_app.heavy:run")  # type: ignore[call-overload]
+
+    def parser(argv: Sequence[str]) -> Dict[str, Any]:
+        parser = clack.Parser()
+        new_command = clack.new_command_factory(parser)
+        new_command("status", help="The 'status' subcommand.")
+        heavy_parser = new_command("heavy", help="The 'heavy' subcommand.")
+        heavy_parser.add_argument("-n", "--n", type=int)
+        if n_defaults is not None:
+            n_defaults.append(heavy_parser.get_default("n"))
+        return vars(parser.parse_args(argv[1:]))
+
+    return clack.main_factory("lazy_app", runners=all_runners, parser=parser)
+
+
+def test_register_runner_by_import_path(
+    capsys: pytest.CaptureFixture[str], lazy_app: ModuleType
+) -> None:
+    """Test that runners can be registered lazily (by their import paths)."""
+    main = make_lazy_app_main(lazy_app)
+
+    assert main(["lazy_app", "status"]) == 0
+    assert "lazy_app.heavy" not in sys.modules
+
+    assert main(["lazy_app", "heavy", "-n", "5"]) == 0
+    assert "lazy_app.heavy" in sys.modules
+    assert capsys.readouterr().out == "status\nheavy n=5\n"
+
+
+def test_lazy_runner_config_defaults(
+    capsys: pytest.CaptureFixture[str], lazy_app: ModuleType
+) -> None:
+    """Test that a lazy runner's Config defaults are known while parsing."""
+    n_defaults: List[Any] = []
+    main = make_lazy_app_main(lazy_app, n_defaults)
+
+    assert main(["lazy_app", "status"]) == 0
+    assert main(["lazy_app", "heavy"]) == 0
+    assert main(["lazy_app", "heavy", "-n", "3"]) == 0
+    # The 'heavy' sub-command's Config type is only imported once the parser
+    # chooses this sub-command, so the first 'heavy' command-line is parsed
+    # twice (once without and once with this Config type's defaults).
+    default = _parser.ARGPARSE_ARGUMENT_DEFAULT
+    assert n_defaults == [default, default, 1, 1]
+    assert capsys.readouterr().out == "status\nheavy n=1\nheavy n=3\n"
+
+
+def test_lazy_runner_chosen_by_parser(
+    capsys: pytest.CaptureFixture[str],
+    lazy_app: ModuleType,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Test that option values never choose a lazy runner's sub-command."""
+    monkeypatch.chdir(tmp_path)
+    n_defaults: List[Any] = []
+    main = make_lazy_app_main(lazy_app, n_defaults)
+
+    assert main(["lazy_app", "-L", "heavy", "status"]) == 0
+    assert "lazy_app.heavy" not in sys.modules
+
+    assert main(["lazy_app", "-L", "status", "heavy"]) == 0
+    assert "lazy_app.heavy" in sys.modules
+    assert n_defaults[-1] == 1
+    assert capsys.readouterr().out == "status\nheavy n=1\n"
+
+
+def test_command_index_shared_by_threads(
+    lazy_app: ModuleType, mocker: MockerFixture
+) -> None:
+    """Test that parallel invocations of one ClackApp share a command index."""
+    spy = mocker.spy(_main._CommandIndex, "from_runners")
+    main = make_lazy_app_main(lazy_app)
+
+    argvs = [["lazy_app", "heavy", "-n", "2"], ["lazy_app", "status"]] * 8
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        cfgs = list(executor.map(main.parse, argvs))
+
+    assert [vars(cfg)["command"] for cfg in cfgs] == ["heavy", "status"] * 8
+    assert [vars(cfg).get("n") for cfg in cfgs] == [2, None] * 8
+    assert spy.call_count == 1
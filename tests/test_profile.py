@@ -0,0 +1,58 @@
+"""Tests for the clack._profile module."""
+
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+from clack import _profile
+
+
+_Func = Tuple[str, int, str]
+
+
+def _func(name: str) -> _Func:
+    return ("app.py", 1, name)
+
+
+def _make_stats(
+    levels: List[List[str]], *, total_time: float
+) -> SimpleNamespace:
+    """Returns fake pstats.Stats for a layered call graph.
+
+    Every function in `levels[i + 1]` is called by every function in
+    `levels[i]` (so the number of distinct call stacks grows exponentially
+    with the number of levels).
+    """
+    raw_stats: Dict[_Func, Any] = {}
+    for idx, level in enumerate(levels):
+        callers = levels[idx - 1] if idx else []
+        edge_time = total_time / len(callers) if callers else 0.0
+        for name in level:
+            raw_stats[_func(name)] = (
+                1,
+                1,
+                1.0,
+                total_time,
+                {_func(caller): (1, 1, 1.0, edge_time) for caller in callers},
+            )
+    return SimpleNamespace(stats=raw_stats)
+
+
+def test_collapsed_stacks_bounds_stack_count() -> None:
+    """Test that collapsed_stacks() bounds the number of stacks it expands."""
+    levels = [[f"f{idx}a", f"f{idx}b"] for idx in range(40)]
+    stats = _make_stats(levels, total_time=1e6)
+
+    lines = _profile.collapsed_stacks(stats)  # type: ignore[arg-type]
+    assert 0 < len(lines) <= _profile._MAX_STACKS
+
+
+def test_collapsed_stacks_bounds_stack_depth() -> None:
+    """Test that collapsed_stacks() bounds the depth of each stack."""
+    levels = [[f"f{idx}"] for idx in range(4 * _profile._MAX_STACK_DEPTH)]
+    stats = _make_stats(levels, total_time=1.0)
+
+    lines = _profile.collapsed_stacks(stats)  # type: ignore[arg-type]
+    assert len(lines) == _profile._MAX_STACK_DEPTH
+    stack, usec = lines[-1].rsplit(" ", 1)
+    assert len(stack.split(";")) == _profile._MAX_STACK_DEPTH
+    assert usec == "1000000"
@@ -4,6 +4,7 @@ import os
 from pathlib import Path
 from typing import Iterator
 
+from _pytest.monkeypatch import MonkeyPatch
 from pytest import fixture, mark
 
 from clack import xdg
@@ -57,3 +58,10 @@ def test_xdg_init(key: xdg.XDG_Type, expected: Path) -> None:
 def test_xdg_get_base_dir(key: xdg.XDG_Type, expected: Path) -> None:
     """Test the xdg.get_base_dir() function."""
     assert expected == xdg.get_base_dir(key)
+
+
+def test_xdg_home_changes(monkeypatch: MonkeyPatch, tmp_path: Path) -> None:
+    """Test that the default XDG directories follow the HOME envvar."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    assert xdg.get_base_dir("config") == tmp_path / ".config"
+    assert xdg.get_full_dir("cache", "foo") == tmp_path / ".cache" / "foo"